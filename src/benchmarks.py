@@ -0,0 +1,183 @@
+import os
+import sys
+import marshal
+import time
+import shutil
+import subprocess
+import tempfile
+from collections.abc import Callable
+import htmlnode
+from site_index import parse_front_matter
+from markdown_to_html import markdown_to_html_node
+from html_emitter import markdown_to_html
+from parse_cache import data_to_node, node_to_data
+
+CONTENT_DIR = "./content"
+
+
+def load_pages(content_dir: str = CONTENT_DIR) -> list[str]:
+    """
+    Markdown bodies of every page under content_dir.
+    """
+    pages: list[str] = []
+    for dir_path, _, file_names in os.walk(content_dir):
+        for file_name in sorted(file_names):
+            if file_name.endswith(".md"):
+                with open(os.path.join(dir_path, file_name), "r") as file_object:
+                    pages.append(parse_front_matter(file_object.read())[1])
+    return pages
+
+
+def best_time(function: Callable[[], object], rounds: int = 5) -> float:
+    best = float("inf")
+    for _ in range(rounds):
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def bench_escape(repeat: int = 200) -> None:
+    """
+    Render the site's pages with and without escaping in
+    text_node_to_html_node, and time escape_html alone on clean and dirty
+    text against an unconditional str.translate.
+    """
+    pages = load_pages()
+    if not pages:
+        print(f"No pages found under {CONTENT_DIR}")
+        return
+
+    def render_all() -> None:
+        for _ in range(repeat):
+            for page in pages:
+                markdown_to_html_node(page).to_html()
+
+    escaped = best_time(render_all)
+    original_escapes = (htmlnode.escape_html, htmlnode.escape_attribute)
+    htmlnode.escape_html = htmlnode.escape_attribute = lambda text: text
+    try:
+        unescaped = best_time(render_all)
+    finally:
+        htmlnode.escape_html, htmlnode.escape_attribute = original_escapes
+    rendered = repeat * len(pages)
+    print(f"Rendered {rendered} pages")
+    print(f"  without escaping: {unescaped * 1000:.1f} ms")
+    print(f"  with escaping:    {escaped * 1000:.1f} ms ({(escaped - unescaped) / unescaped:+.1%})")
+
+    clean = "In the vast and intricate weave of the legendarium, amidst heroes of renown"
+    dirty = clean + " & <others>"
+    count = 100000
+    for label, text in (("clean text", clean), ("text to escape", dirty)):
+        fast = best_time(lambda: [htmlnode.escape_html(text) for _ in range(count)])
+        translate = best_time(lambda: [text.translate(htmlnode.HTML_ESCAPE_TABLE) for _ in range(count)])
+        print(f"  {label}: escape_html {fast / count * 1e9:.0f} ns, str.translate {translate / count * 1e9:.0f} ns")
+
+
+SYNTHETIC_PARAGRAPH = (
+    "In the vast and intricate weave of the legendarium, amidst heroes of renown and tales of "
+    "high adventure, there exists a **curious** anomaly that has long been a point of _contention_."
+)
+
+
+def make_corpus(root: str, pages: int, sections: int = 20, tags: int = 50) -> None:
+    """
+    Write a synthetic site (content/, static/, template.html) with the given
+    number of pages under root. Pages are spread over sections and tagged,
+    so every listing kind is exercised; output is deterministic.
+    """
+    os.makedirs(os.path.join(root, "static"), exist_ok=True)
+    with open(os.path.join(root, "static", "index.css"), "w") as file_object:
+        file_object.write("body { margin: 0; }\n")
+    with open(os.path.join(root, "template.html"), "w") as file_object:
+        file_object.write('<html><head><title>{{ Title }}</title><link href="/index.css" rel="stylesheet" /></head><body>{{ Content }}</body></html>\n')
+    for number in range(pages):
+        page_dir = os.path.join(root, "content", f"section{number % sections}", f"page{number}")
+        os.makedirs(page_dir, exist_ok=True)
+        day = number % 28 + 1
+        month = number // 28 % 12 + 1
+        page_tags = f"tag{number % tags}, tag{number * 7 % tags}"
+        with open(os.path.join(page_dir, "index.md"), "w") as file_object:
+            file_object.write(
+                f"---\ndate: 2020-{month:02d}-{day:02d}\ntags: {page_tags}\n---\n\n"
+                f"# Synthetic page {number}\n\n{SYNTHETIC_PARAGRAPH}\n\n"
+                f"- [Previous](/section{(number - 1) % sections}/page{number - 1}/)\n- Item with `code`\n\n"
+                f"> A quote on page {number}\n\n```python\nprint({number})\n```\n\n{SYNTHETIC_PARAGRAPH}\n"
+            )
+
+
+def bench_memory(pages: int = int(os.environ.get("BENCH_PAGES", "100000"))) -> None:
+    """
+    Build a synthetic site of BENCH_PAGES pages (100,000 by default) with
+    and without --low-memory, each in its own process, and report the peak
+    RSS and wall time of each build.
+    """
+    source_dir = os.path.dirname(os.path.abspath(__file__))
+    with tempfile.TemporaryDirectory() as root:
+        make_corpus(root, pages)
+        shutil.copytree(source_dir, os.path.join(root, "src"), ignore=shutil.ignore_patterns("__pycache__"))
+        print(f"Synthetic site of {pages} pages in {root}")
+        for label, flags in (("default", []), ("--low-memory", ["--low-memory"])):
+            for state in ("docs", ".ssg-cache"):
+                shutil.rmtree(os.path.join(root, state), ignore_errors=True)
+            start = time.perf_counter()
+            result = subprocess.run([sys.executable, os.path.join("src", "main.py"), *flags], cwd=root, capture_output=True, text=True, check=True)
+            elapsed = time.perf_counter() - start
+            peak = [line for line in result.stdout.splitlines() if line.startswith("Peak memory")]
+            print(f"  {label}: {peak[-1] if peak else 'Peak memory: unknown'}, {elapsed:.1f} s")
+
+
+def bench_deep(depth: int = 10000, repeat: int = 20) -> None:
+    """
+    Time the tree operations on a tree depth levels deep (10,000 by
+    default) and on a flat tree of as many nodes, and render a markdown
+    quote nested as deep through the tree and the direct emitter.
+    """
+    deep = htmlnode.LeafNode(None, "deep")
+    for _ in range(depth):
+        deep = htmlnode.ParentNode("blockquote", [deep])
+    flat = htmlnode.ParentNode("div", [htmlnode.LeafNode("b", "flat") for _ in range(depth)])
+    deep_twin = marshal_round_trip(deep)
+    flat_twin = marshal_round_trip(flat)
+    operations: list[tuple[str, Callable[[htmlnode.HTMLNode, htmlnode.HTMLNode], object]]] = [
+        ("to_html", lambda node, twin: node.to_html()),
+        ("iter_html", lambda node, twin: "".join(node.iter_html())),
+        ("==", lambda node, twin: node == twin),
+        ("repr", lambda node, twin: repr(node)),
+        ("walk", lambda node, twin: sum(1 for _ in htmlnode.walk(node))),
+        ("parse cache round trip", lambda node, twin: marshal_round_trip(node)),
+    ]
+    print(f"Trees of {depth + 1} nodes, {depth} levels deep and flat ({repeat} rounds)")
+    for label, operation in operations:
+        deep_time = best_time(lambda: [operation(deep, deep_twin) for _ in range(repeat)])
+        flat_time = best_time(lambda: [operation(flat, flat_twin) for _ in range(repeat)])
+        print(f"  {label}: {deep_time / repeat * 1000:.2f} ms deep, {flat_time / repeat * 1000:.2f} ms flat")
+    markdown = "> " * depth + "**deep**"
+    tree_time = best_time(lambda: markdown_to_html_node(markdown).to_html())
+    emitter_time = best_time(lambda: markdown_to_html(markdown))
+    print(f"  markdown quoted {depth} levels deep: {tree_time * 1000:.1f} ms through the tree, {emitter_time * 1000:.1f} ms emitted directly")
+
+
+def marshal_round_trip(node: htmlnode.HTMLNode) -> htmlnode.HTMLNode:
+    return data_to_node(marshal.loads(marshal.dumps(node_to_data(node))))
+
+
+BENCHMARKS = {
+    "escape": bench_escape,
+    "memory": bench_memory,
+    "deep": bench_deep,
+}
+
+
+def main() -> None:
+    names = sys.argv[1:] or list(BENCHMARKS)
+    for name in names:
+        if name not in BENCHMARKS:
+            print(f"Unknown benchmark '{name}'; available: {', '.join(BENCHMARKS)}")
+            sys.exit(1)
+        print(f"== {name}")
+        BENCHMARKS[name]()
+
+
+if __name__ == "__main__":
+    main()
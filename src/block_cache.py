@@ -0,0 +1,126 @@
+import os
+import marshal
+import hashlib
+from collections import OrderedDict
+from collections.abc import Callable
+from blocknode import Block
+from highlight import HIGHLIGHTER_VERSION
+
+# rendered blocks a BlockCache keeps; the least recently used go first
+DEFAULT_MAX_BLOCKS = 50000
+LOW_MEMORY_MAX_BLOCKS = 5000
+
+BlockKey = tuple[str, str]
+
+
+class BlockCache():
+    """
+    Rendered HTML chunks of top-level blocks, keyed by block type and the
+    hash of the block's text, so a page with one edited paragraph renders
+    only that paragraph again and stitches the rest together from cached
+    chunks. Chunks are kept as the emitter wrote them, so the minifier sees
+    the same stream either way.
+
+    A bounded LRU: past max_entries, the least recently used blocks are
+    evicted. Entries are loaded from and saved to a marshal file at path,
+    oldest first. Hits and misses are counted for the build and for the
+    last page (see start_page); page_ratios keeps each page's hit ratio.
+    """
+    def __init__(self, path: str, parser_version: int, max_entries: int = DEFAULT_MAX_BLOCKS) -> None:
+        self.path = path
+        self.parser_version = parser_version
+        self.max_entries = max_entries
+        self.entries: OrderedDict[BlockKey, tuple[str, ...]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.last_hits = 0
+        self.last_misses = 0
+        self.page_ratios: dict[str, float] = {}
+        self.load()
+
+    def key(self, block: Block, skip_images: bool = False) -> BlockKey | None:
+        """
+        The key of a block: its type and a hash over its whole subtree
+        (types, fence info strings and lines), or None if skip_images is set
+        and the block has an image, whose attributes depend on the image
+        file rather than on the text.
+        """
+        digest = hashlib.sha256(f"{self.parser_version}\0{HIGHLIGHTER_VERSION}\0".encode())
+        stack = [block]
+        while stack:
+            current = stack.pop()
+            text = "\n".join(current.lines)
+            if skip_images and "![" in text:
+                return None
+            digest.update(f"{current.block_type.value}\0{current.info}\0{len(current.lines)}\0{len(current.children)}\0".encode())
+            digest.update(text.encode())
+            stack.extend(reversed(current.children))
+        return block.block_type.value, digest.hexdigest()
+
+    def emit(self, block: Block, out: list[str], render: Callable[[Block, list[str]], None], skip_images: bool = False) -> None:
+        """
+        Write the chunks of block to out, from the cache or through render.
+        """
+        key = self.key(block, skip_images)
+        if key is None:
+            render(block, out)
+            return
+        chunks = self.entries.get(key)
+        if chunks is not None:
+            self.entries.move_to_end(key)
+            self.hits += 1
+            self.last_hits += 1
+            out.extend(chunks)
+            return
+        self.misses += 1
+        self.last_misses += 1
+        start = len(out)
+        render(block, out)
+        self.entries[key] = tuple(out[start:])
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+    def start_page(self) -> None:
+        self.last_hits = 0
+        self.last_misses = 0
+
+    def finish_page(self, dest_path: str) -> float | None:
+        """
+        Record and return the hit ratio of the page since start_page, or
+        None if none of its blocks went through the cache.
+        """
+        lookups = self.last_hits + self.last_misses
+        if not lookups:
+            return None
+        ratio = self.page_ratios[dest_path] = self.last_hits / lookups
+        return ratio
+
+    def reset_stats(self) -> None:
+        self.hits = self.misses = self.evictions = 0
+        self.page_ratios = {}
+        self.start_page()
+
+    def load(self) -> None:
+        try:
+            with open(self.path, "rb") as file_object:
+                entries = marshal.load(file_object)
+        except (OSError, EOFError, ValueError, TypeError):
+            return
+        self.entries = OrderedDict(entries[max(len(entries) - self.max_entries, 0):])
+
+    def save(self) -> None:
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        with open(self.path + ".tmp", "wb") as file_object:
+            marshal.dump(list(self.entries.items()), file_object)
+        os.replace(self.path + ".tmp", self.path)
+
+    def describe(self) -> str:
+        lookups = self.hits + self.misses
+        rate = self.hits / lookups if lookups else 0.0
+        ratios = sorted(self.page_ratios.values())
+        line = f"Block cache: {self.hits} hits, {self.misses} misses ({rate:.1%} hit rate), {self.evictions} evictions"
+        if ratios:
+            line += f"; per-page hit ratio min {ratios[0]:.0%}, median {ratios[len(ratios) // 2]:.0%}"
+        return line
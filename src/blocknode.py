@@ -6,4 +6,63 @@ class BlockType(Enum):
     CODE = "code"
     QUOTE = "quote"
     UNORDERED_LIST = "unordered_list"
-    ORDERED_LIST = "ordered_list"
\ No newline at end of file
+    ORDERED_LIST = "ordered_list"
+    LIST_ITEM = "list_item"
+
+
+class Block():
+    """
+    A node of the block tree built by markdown_blocks.parse_blocks.
+
+    Leaf blocks (paragraphs, headings, code) carry their source lines with
+    container prefixes (quote markers, list indentation) already removed;
+    containers (quotes, lists, list items) carry child blocks. Code blocks
+    keep the fence's info string.
+    """
+    def __init__(self, block_type: BlockType | None, lines: list[str] | None = None, children: list["Block"] | None = None, info: str = "") -> None:
+        self.block_type = block_type
+        self.lines = lines if lines is not None else []
+        self.children = children if children is not None else []
+        self.info = info
+        # scanner state: list item content indent, code fence length
+        self.indent = 0
+        self.fence_length = 0
+        # index of the first source line of the block
+        self.start = 0
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, Block):
+            return False
+        # pairs of blocks still to compare
+        pairs: list[tuple[Block, Block]] = [(self, other)]
+        while pairs:
+            left, right = pairs.pop()
+            if (left.block_type, left.lines, left.info, len(left.children)) != (right.block_type, right.lines, right.info, len(right.children)):
+                return False
+            for left_child, right_child in zip(left.children, right.children):
+                if not isinstance(left_child, Block) or not isinstance(right_child, Block):
+                    if not left_child == right_child:
+                        return False
+                else:
+                    pairs.append((left_child, right_child))
+        return True
+
+    def __repr__(self) -> str:
+        # entries are (True, text) to write as it is or (False, block) to
+        # write the repr of
+        parts: list[str] = []
+        stack: list[tuple[bool, object]] = [(False, self)]
+        while stack:
+            is_text, item = stack.pop()
+            if is_text or not isinstance(item, Block):
+                parts.append(item if is_text else repr(item))
+            elif not item.children:
+                parts.append(f"Block({item.block_type}, lines={item.lines}, info='{item.info}')")
+            else:
+                parts.append(f"Block({item.block_type}, children=[")
+                stack.append((True, "])"))
+                for index in range(len(item.children) - 1, -1, -1):
+                    stack.append((False, item.children[index]))
+                    if index:
+                        stack.append((True, ", "))
+        return "".join(parts)
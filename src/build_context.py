@@ -0,0 +1,148 @@
+import json
+import hashlib
+from collections.abc import Callable
+from site_index import SiteIndex, FEED_SIZE
+from fingerprint import AssetHashCache, AssetManifest
+from minify import HtmlMinifier
+from parse_cache import ParseCache
+from depgraph import DependencyGraph
+from memory import check_memory_limit
+from mapped_source import MMAP_THRESHOLD
+from linkcheck import LinkIndex
+from search_index import SearchIndex
+from interning import NodeInterner
+from block_cache import BlockCache
+
+
+class BuildContext():
+    """
+    Everything a build threads through page generation: optional stages
+    (metadata index, asset manifest, image annotation, minifier, parse
+    cache) and the dependency graph used for incremental builds.
+
+    A default-constructed context runs the plain pipeline.
+    """
+    def __init__(
+        self,
+        site_index: SiteIndex | None = None,
+        manifest: AssetManifest | None = None,
+        static_dir: str | None = None,
+        minifier: HtmlMinifier | None = None,
+        parse_cache: ParseCache | None = None,
+        graph: DependencyGraph | None = None,
+        hash_cache: AssetHashCache | None = None,
+        previous_index: SiteIndex | None = None,
+        explain: bool = False,
+    ) -> None:
+        self.site_index = site_index
+        self.manifest = manifest
+        self.static_dir = static_dir
+        self.minifier = minifier
+        self.parse_cache = parse_cache
+        self.graph = graph
+        self.hash_cache = hash_cache if hash_cache is not None else AssetHashCache()
+        self.previous_index = previous_index
+        self.explain = explain
+        self.template_path: str | None = None
+        # root of the content tree, for directory-based layout selection
+        self.content_dir: str | None = None
+        # when set, only sources it accepts are part of the build (sharding)
+        self.page_filter: Callable[[str], bool] | None = None
+        # settings that change rendered output; recorded as "config:<name>" inputs
+        self.config: dict[str, str] = {}
+        # sources larger than this many bytes are memory-mapped and streamed
+        self.mmap_threshold = MMAP_THRESHOLD
+        # peak RSS in bytes the build may reach; checked after every output
+        self.memory_limit: int | None = None
+        # when set, the links and anchor ids of every page are recorded for
+        # the link checker
+        self.links: LinkIndex | None = None
+        # when set, the text of every page is indexed for full-text search
+        self.search: SearchIndex | None = None
+        # when set, the trees of pages are interned, so repeated fragments
+        # are held and serialized once
+        self.interner: NodeInterner | None = None
+        # when set, pages that need no tree are emitted block by block, with
+        # unchanged blocks taken from this cache
+        self.block_cache: BlockCache | None = None
+        self.rebuilt = 0
+        self.skipped = 0
+        self._inputs: dict[str, str] | None = None
+        self._listing_fingerprints: dict[str, str] | None = None
+
+    def fingerprint(self, key: str) -> str:
+        """
+        Current fingerprint of a dependency-graph input key.
+        """
+        kind, _, name = key.partition(":")
+        if kind == "file":
+            try:
+                return self.hash_cache.get_hash(name)
+            except OSError:
+                return "missing"
+        if kind == "asset":
+            if self.manifest is None:
+                return name
+            return self.manifest.urls.get(name, name)
+        if kind == "config":
+            return self.config.get(name, "")
+        if kind == "listing":
+            return self.listing_fingerprints().get(name, "missing")
+        raise ValueError(f"Unknown dependency kind: '{kind}'")
+
+    def listing_fingerprints(self) -> dict[str, str]:
+        """
+        A digest of the metadata of every page in each listing, in listing
+        order, by listing key ("feed" for the entries of the feed).
+        Listings are only written once all pages are in the index, so this
+        is computed once, on first use.
+        """
+        if self._listing_fingerprints is None:
+            self._listing_fingerprints = {}
+            if self.site_index is not None:
+                for key, entries in self.site_index.listings().items():
+                    digest = hashlib.sha256()
+                    for entry in entries:
+                        digest.update(json.dumps(entry.to_dict(), sort_keys=True).encode())
+                        digest.update(b"\0")
+                    self._listing_fingerprints[key] = digest.hexdigest()
+                digest = hashlib.sha256()
+                for entry in self.site_index.feed_entries(FEED_SIZE):
+                    digest.update(json.dumps(entry.to_dict(), sort_keys=True).encode())
+                    digest.update(b"\0")
+                self._listing_fingerprints["feed"] = digest.hexdigest()
+        return self._listing_fingerprints
+
+    def rebuild_reasons(self, output: str) -> list[str]:
+        if self.graph is None:
+            return ["incremental builds are off"]
+        return self.graph.rebuild_reasons(output, self.fingerprint)
+
+    def report(self, output: str, reasons: list[str]) -> None:
+        if self.memory_limit is not None:
+            check_memory_limit(self.memory_limit, output)
+        if reasons:
+            self.rebuilt += 1
+            if self.explain:
+                print(f"Rebuilding {output}: {'; '.join(reasons)}")
+        else:
+            self.skipped += 1
+            if self.explain:
+                print(f"Up to date: {output}")
+
+    def begin_output(self) -> None:
+        if self.graph is not None:
+            self._inputs = {}
+
+    def depends_on(self, key: str) -> None:
+        if self._inputs is not None and key not in self._inputs:
+            self._inputs[key] = self.fingerprint(key)
+
+    def depends_on_config(self) -> None:
+        for name in self.config:
+            self.depends_on(f"config:{name}")
+
+    def finish_output(self, output: str) -> None:
+        if self.graph is not None and self._inputs is not None:
+            self.graph.record(output, self._inputs)
+        self._inputs = None
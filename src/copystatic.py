@@ -1,13 +1,22 @@
 import os
 import shutil
+from fingerprint import AssetManifest
 
-def copy_files_recursive(source_dir_path: str, dest_dir_path: str, is_top_level: bool = True) -> None:
+def copy_files_recursive(source_dir_path: str, dest_dir_path: str, is_top_level: bool = True, manifest: AssetManifest | None = None, exclude_extensions: tuple[str, ...] = (), clean_dest: bool = True, copied: list[str] | None = None) -> None:
     """
     Recursively copies all files and directories from source_dir_path to dest_dir_path.
 
     Args:
         source_dir_path (str): The path to the source directory.
         dest_dir_path (str): The path to the destination directory.
+        manifest (AssetManifest | None): When given, files are published under
+            content-hashed names and the mapping is recorded in the manifest.
+        exclude_extensions (tuple[str, ...]): File extensions that are not
+            copied, e.g. stylesheets that are published as a bundle instead.
+        clean_dest (bool): Clear an existing destination first. Incremental
+            builds keep it, so up-to-date pages are not lost.
+        copied (list[str] | None): When given, the path of every copied file
+            is appended to it.
     """
     if not os.path.exists(source_dir_path):
         raise FileNotFoundError(f"Source directory '{source_dir_path}' does not exist.")
@@ -17,7 +26,7 @@ def copy_files_recursive(source_dir_path: str, dest_dir_path: str, is_top_level:
     if dest_abs == source_abs or dest_abs.startswith(source_abs + os.sep):
         raise ValueError("Destination directory cannot be the same as or a subdirectory of the source directory.")
     
-    if is_top_level and os.path.exists(dest_dir_path):
+    if is_top_level and clean_dest and os.path.exists(dest_dir_path):
         shutil.rmtree(dest_dir_path)
         os.makedirs(dest_dir_path)
         print(f"Destination directory '{dest_dir_path}' already exists. It has been cleared.")
@@ -31,10 +40,17 @@ def copy_files_recursive(source_dir_path: str, dest_dir_path: str, is_top_level:
         dest_item_path = os.path.join(dest_dir_path, item)
 
         if os.path.isfile(source_item_path):
+            if exclude_extensions and item.endswith(exclude_extensions):
+                print(f"Skipped file: {source_item_path}")
+                continue
+            if manifest is not None:
+                dest_item_path = os.path.join(dest_dir_path, manifest.publish_name(source_item_path))
             shutil.copy(source_item_path, dest_item_path)
+            if copied is not None:
+                copied.append(dest_item_path)
             print(f"Copied file: {source_item_path} -> {dest_item_path}")
         elif os.path.isdir(source_item_path):
-            copy_files_recursive(source_item_path, dest_item_path, is_top_level=False)
+            copy_files_recursive(source_item_path, dest_item_path, is_top_level=False, manifest=manifest, exclude_extensions=exclude_extensions, copied=copied)
             print(f"Copied directory: {source_item_path} -> {dest_item_path}")
         else:
             print(f"Skipped unknown item type: {source_item_path}")
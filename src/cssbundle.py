@@ -0,0 +1,213 @@
+import os
+import re
+import json
+import shutil
+import hashlib
+from fingerprint import AssetHashCache, AssetManifest, fingerprinted_name
+
+# bump when the bundling or minification output changes
+CSS_BUNDLER_VERSION = "2"
+
+IMPORT_RE = re.compile(r"""@import\s+(?:url\(\s*)?(["']?)([^"')\s;]+)\1\s*\)?\s*([^;]*);""")
+# string literals and comments, found together so that a quote inside a
+# comment or "/*" inside a string is not mistaken for the other
+LITERAL_RE = re.compile(r"""("(?:\\.|[^"\\])*"|'(?:\\.|[^'\\])*'|/\*.*?\*/)""", re.DOTALL)
+URL_RE = re.compile(r"""url\(\s*(["']?)([^"')\s]+)\1\s*\)""")
+WHITESPACE_RE = re.compile(r"\s+")
+AROUND_PUNCTUATION_RE = re.compile(r"\s*([{};,>])\s*")
+AFTER_COLON_RE = re.compile(r":\s+")
+
+
+def is_remote(url: str) -> bool:
+    return url.startswith(("http://", "https://", "//"))
+
+
+def strip_comments(text: str) -> str:
+    """
+    Remove comments (except /*! license */ ones) outside string literals.
+    """
+    pieces = LITERAL_RE.split(text)
+    for index in range(1, len(pieces), 2):  # odd indexes are literals
+        if pieces[index].startswith("/*") and not pieces[index].startswith("/*!"):
+            pieces[index] = ""
+    return "".join(pieces)
+
+
+def rebase_urls(text: str, from_dir: str, to_dir: str) -> str:
+    """
+    Rewrite the relative url() references of CSS from a file in from_dir so
+    that they resolve the same from a file in to_dir.
+    """
+    def replace(match: re.Match) -> str:
+        quote, url = match.group(1), match.group(2)
+        if is_remote(url) or url.startswith(("/", "#", "data:")):
+            return match.group(0)
+        path, separator, suffix = url.partition("?") if "?" in url else url.partition("#")
+        rebased = os.path.relpath(os.path.join(from_dir, path), to_dir).replace(os.sep, "/")
+        return f"url({quote}{rebased}{separator}{suffix}{quote})"
+
+    return URL_RE.sub(replace, text)
+
+
+def bundle_css(entry_path: str) -> tuple[str, list[str]]:
+    """
+    Inline every local @import of entry_path, recursively and in order.
+    Each file is included once; imports with a media query are wrapped in
+    an @media block, and remote imports are hoisted to the top, where CSS
+    requires them. Relative url() references of imported files are
+    rewritten to resolve from the entry's directory, where the bundle is
+    published. Returns the bundled text and the input files used.
+    """
+    inputs: list[str] = []
+    remote_imports: list[str] = []
+    entry_dir = os.path.dirname(os.path.abspath(entry_path))
+
+    def inline(path: str) -> str:
+        path = os.path.abspath(path)
+        if path in inputs:
+            return ""
+        inputs.append(path)
+        with open(path, "r") as file_object:
+            text = file_object.read()
+
+        def replace(match: re.Match) -> str:
+            url, media = match.group(2), match.group(3).strip()
+            if is_remote(url):
+                remote_imports.append(match.group(0))
+                return ""
+            imported = inline(os.path.join(os.path.dirname(path), url))
+            if media:
+                return f"@media {media}{{{imported}}}"
+            return imported
+
+        # the text between imports is rebased; inlined imports already are,
+        # and the @import URLs themselves are resolved from this file above
+        text = strip_comments(text)
+        file_dir = os.path.dirname(path)
+        pieces: list[str] = []
+        position = 0
+        for match in IMPORT_RE.finditer(text):
+            pieces.append(rebase_urls(text[position:match.start()], file_dir, entry_dir))
+            pieces.append(replace(match))
+            position = match.end()
+        pieces.append(rebase_urls(text[position:], file_dir, entry_dir))
+        return "".join(pieces)
+
+    body = inline(entry_path)
+    return "\n".join(remote_imports + [body]), inputs
+
+
+def minify_css(text: str) -> str:
+    """
+    Strip comments (except /*! license */ ones) and redundant whitespace.
+    String literals are left exactly as written.
+    """
+    pieces = LITERAL_RE.split(strip_comments(text))
+    for index in range(0, len(pieces), 2):  # odd indexes are literals
+        code = WHITESPACE_RE.sub(" ", pieces[index])
+        code = AROUND_PUNCTUATION_RE.sub(r"\1", code)
+        pieces[index] = AFTER_COLON_RE.sub(":", code)
+    return "".join(pieces).replace(";}", "}").strip()
+
+
+def find_entry_stylesheets(static_dir: str) -> list[str]:
+    """
+    Stylesheets that are not @imported by another stylesheet.
+    """
+    stylesheets: list[str] = []
+    imported: set[str] = set()
+    for dir_path, _, file_names in os.walk(static_dir):
+        for file_name in file_names:
+            if not file_name.endswith(".css"):
+                continue
+            path = os.path.abspath(os.path.join(dir_path, file_name))
+            stylesheets.append(path)
+            with open(path, "r") as file_object:
+                for match in IMPORT_RE.finditer(file_object.read()):
+                    if not is_remote(match.group(2)):
+                        imported.add(os.path.abspath(os.path.join(dir_path, match.group(2))))
+    return sorted(path for path in stylesheets if path not in imported)
+
+
+class CssBundleCache():
+    """
+    Bundled stylesheets on disk, keyed by the hashes of every input file.
+    For each entry stylesheet the list of inputs from the last bundle is
+    remembered, so an unchanged bundle is found from (cached) input hashes
+    alone, without reading or parsing any CSS.
+    """
+    def __init__(self, cache_dir: str, hash_cache: AssetHashCache) -> None:
+        self.cache_dir = cache_dir
+        self.hash_cache = hash_cache
+        self.index_path = os.path.join(cache_dir, "bundles.json")
+        self.hits = 0
+        self.misses = 0
+        try:
+            with open(self.index_path, "r") as file_object:
+                self.bundles: dict[str, dict] = json.load(file_object)
+        except (OSError, ValueError):
+            self.bundles = {}
+
+    def inputs_key(self, inputs: list[str]) -> str | None:
+        digest = hashlib.sha256(CSS_BUNDLER_VERSION.encode())
+        for path in inputs:
+            try:
+                file_hash = self.hash_cache.get_hash(path)
+            except OSError:
+                return None
+            digest.update(f"{path}\0{file_hash}\0".encode())
+        return digest.hexdigest()
+
+    def bundle(self, entry_path: str) -> str:
+        """
+        Path of the cached, minified bundle for entry_path.
+        """
+        entry_path = os.path.abspath(entry_path)
+        record = self.bundles.get(entry_path)
+        if record is not None:
+            key = self.inputs_key(record["inputs"])
+            cached_path = os.path.join(self.cache_dir, f"{key}.css")
+            if key == record["key"] and os.path.exists(cached_path):
+                self.hits += 1
+                return cached_path
+        self.misses += 1
+        text, inputs = bundle_css(entry_path)
+        key = self.inputs_key(inputs)
+        cached_path = os.path.join(self.cache_dir, f"{key}.css")
+        os.makedirs(self.cache_dir, exist_ok=True)
+        with open(cached_path, "w") as file_object:
+            file_object.write(minify_css(text))
+        if record is not None and record["key"] != key:
+            stale_path = os.path.join(self.cache_dir, f"{record['key']}.css")
+            if os.path.exists(stale_path):
+                os.remove(stale_path)
+        self.bundles[entry_path] = {"inputs": inputs, "key": key}
+        return cached_path
+
+    def save(self) -> None:
+        os.makedirs(self.cache_dir, exist_ok=True)
+        with open(self.index_path, "w") as file_object:
+            json.dump(self.bundles, file_object, indent=1, sort_keys=True)
+
+
+def publish_css_bundles(static_dir: str, dest_dir_path: str, manifest: AssetManifest, bundle_cache: CssBundleCache) -> list[str]:
+    """
+    Bundle and minify every entry stylesheet in static_dir and publish each
+    under a content-hashed name, recording the new URL in the manifest.
+    Returns the published paths.
+    """
+    published: list[str] = []
+    for entry_path in find_entry_stylesheets(static_dir):
+        cached_path = bundle_cache.bundle(entry_path)
+        rel_path = os.path.relpath(entry_path, os.path.abspath(static_dir)).replace(os.sep, "/")
+        rel_dir, file_name = os.path.split(rel_path)
+        published_name = fingerprinted_name(file_name, bundle_cache.hash_cache.get_hash(cached_path))
+        dest_dir = os.path.join(dest_dir_path, rel_dir)
+        os.makedirs(dest_dir, exist_ok=True)
+        dest_path = os.path.join(dest_dir, published_name)
+        shutil.copyfile(cached_path, dest_path)
+        prefix = f"/{rel_dir}/" if rel_dir else "/"
+        manifest.urls[prefix + file_name] = prefix + published_name
+        published.append(dest_path)
+    bundle_cache.save()
+    return published
@@ -0,0 +1,162 @@
+import io
+import os
+import json
+import socket
+import contextlib
+import socketserver
+from collections.abc import Callable
+from fingerprint import AssetHashCache
+from parse_cache import MemoryParseCache, DEFAULT_MAX_BYTES
+from interning import NodeInterner
+from block_cache import BlockCache
+
+# requests and responses are single lines of JSON; a request names its
+# "command", a response says whether it is "ok" and carries the "output"
+# the command printed, plus whatever else the command returns
+ENCODING = "utf-8"
+
+
+class WarmCaches():
+    """
+    Caches a daemon keeps from one build to the next: asset and source
+    hashes, parsed markdown trees, rendered blocks and interned subtrees
+    (with their serialized HTML). Compiled templates and highlighted
+    code are already kept for the life of the process (see load_template
+    and highlight_cache), so they stay warm too.
+    """
+    def __init__(self) -> None:
+        self.hash_caches: dict[str, AssetHashCache] = {}
+        self.parse_caches: dict[str, MemoryParseCache] = {}
+        self.block_caches: dict[str, BlockCache] = {}
+        self._interner: NodeInterner | None = None
+
+    def hash_cache(self, path: str) -> AssetHashCache:
+        """
+        The hash cache persisted at path, loaded from disk the first time
+        only. Entries are still checked against each file's size and mtime.
+        """
+        cache = self.hash_caches.get(path)
+        if cache is None:
+            cache = self.hash_caches[path] = AssetHashCache(path)
+        cache.hits = cache.misses = 0
+        return cache
+
+    def parse_cache(self, cache_dir: str, parser_version: int, max_bytes: int = DEFAULT_MAX_BYTES) -> MemoryParseCache:
+        cache = self.parse_caches.get(cache_dir)
+        if cache is None or cache.parser_version != parser_version:
+            cache = self.parse_caches[cache_dir] = MemoryParseCache(cache_dir, parser_version, max_bytes)
+        cache.max_bytes = max_bytes
+        cache.evictions = 0
+        return cache
+
+    def block_cache(self, path: str, parser_version: int, max_entries: int) -> BlockCache:
+        """
+        The block cache saved at path, loaded from disk the first time only.
+        """
+        cache = self.block_caches.get(path)
+        if cache is None or cache.parser_version != parser_version:
+            cache = self.block_caches[path] = BlockCache(path, parser_version, max_entries)
+        cache.max_entries = max_entries
+        cache.reset_stats()
+        return cache
+
+    def interner(self, max_entries: int) -> NodeInterner:
+        interner = self._interner
+        if interner is None:
+            interner = self._interner = NodeInterner(max_entries)
+        interner.max_entries = max_entries
+        interner.reset_stats()
+        return interner
+
+
+Handler = Callable[[dict], dict]
+
+
+class DaemonServer(socketserver.UnixStreamServer):
+    """
+    Serves requests on a Unix socket, one at a time: builds share the
+    output tree and state files, so they must not overlap. Each command is
+    a handler taking the request and returning the fields of the response;
+    everything it prints is captured into the response's "output".
+    """
+    def __init__(self, socket_path: str, handlers: dict[str, Handler]) -> None:
+        self.socket_path = socket_path
+        self.handlers = handlers
+        self.stopping = False
+        if os.path.exists(socket_path):
+            if is_running(socket_path):
+                raise ValueError(f"A daemon is already listening on {socket_path}")
+            os.remove(socket_path)
+        os.makedirs(os.path.dirname(os.path.abspath(socket_path)), exist_ok=True)
+        super().__init__(socket_path, RequestHandler)
+
+    def handle(self, request: dict) -> dict:
+        command = request.get("command")
+        if command == "stop":
+            self.stopping = True
+            return {"ok": True, "output": "Daemon stopping\n"}
+        if command == "ping":
+            return {"ok": True, "output": ""}
+        handler = self.handlers.get(command)
+        if handler is None:
+            return {"ok": False, "output": "", "error": f"Unknown command '{command}'; available: {', '.join(['ping', 'stop', *self.handlers])}"}
+        output = io.StringIO()
+        try:
+            with contextlib.redirect_stdout(output), contextlib.redirect_stderr(output):
+                response = {"ok": True, **handler(request)}
+        except SystemExit as error:
+            # argparse errors and sys.exit() in a command fail the request,
+            # not the daemon
+            if not error.code:
+                response = {"ok": True}
+            else:
+                response = {"ok": False, "error": error.code if isinstance(error.code, str) else f"exit status {error.code}"}
+        except Exception as error:
+            response = {"ok": False, "error": f"{type(error).__name__}: {error}"}
+        response["output"] = output.getvalue()
+        return response
+
+    def serve_until_stopped(self) -> None:
+        try:
+            while not self.stopping:
+                self.handle_request()
+        finally:
+            self.server_close()
+            with contextlib.suppress(OSError):
+                os.remove(self.socket_path)
+
+
+class RequestHandler(socketserver.StreamRequestHandler):
+    def handle(self) -> None:
+        line = self.rfile.readline()
+        try:
+            request = json.loads(line.decode(ENCODING))
+            if not isinstance(request, dict):
+                raise ValueError("a request must be a JSON object")
+        except ValueError as error:
+            response = {"ok": False, "output": "", "error": f"Bad request: {error}"}
+        else:
+            response = self.server.handle(request)
+        self.wfile.write(json.dumps(response).encode(ENCODING) + b"\n")
+
+
+def send_request(socket_path: str, request: dict) -> dict:
+    """
+    Send one request to the daemon on socket_path and wait for its
+    response. Raises OSError if no daemon is listening.
+    """
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as connection:
+        connection.connect(socket_path)
+        connection.sendall(json.dumps(request).encode(ENCODING) + b"\n")
+        with connection.makefile("rb") as stream:
+            line = stream.readline()
+    if not line:
+        raise OSError(f"The daemon on {socket_path} closed the connection without answering")
+    return json.loads(line.decode(ENCODING))
+
+
+def is_running(socket_path: str) -> bool:
+    try:
+        return send_request(socket_path, {"command": "ping"}).get("ok", False)
+    except (OSError, ValueError):
+        return False
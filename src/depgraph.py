@@ -0,0 +1,128 @@
+import os
+import json
+from collections.abc import Callable
+from spill import DiskMapping, open_database, open_generations, mark_complete
+
+# input keys are "<kind>:<name>"; these are the kinds the build records
+INPUT_KINDS = {
+    "file": "file",
+    "asset": "asset reference",
+    "config": "setting",
+    "listing": "listing",
+}
+
+
+def describe_input(key: str) -> str:
+    kind, _, name = key.partition(":")
+    return f"{INPUT_KINDS.get(kind, kind)} '{name}'"
+
+
+class DependencyGraph():
+    """
+    For every output file, the exact inputs it was built from and the
+    fingerprint each input had at the time: source and template files,
+    asset URLs it references, settings like the basepath, and (for listings)
+    the metadata of the pages listed.
+
+    The graph of the previous build is loaded from disk; an output only has
+    to be rebuilt when one of its recorded inputs now has a different
+    fingerprint. Outputs that were not rebuilt carry their record over.
+    """
+    def __init__(self, path: str | None = None) -> None:
+        self.path = path
+        self.previous: dict[str, dict[str, str]] = {}
+        self.current: dict[str, dict[str, str]] = {}
+        if path is not None:
+            try:
+                with open(path, "r") as file_object:
+                    self.previous = json.load(file_object)
+            except (OSError, ValueError):
+                self.previous = {}
+
+    def rebuild_reasons(self, output: str, fingerprint: Callable[[str], str]) -> list[str]:
+        """
+        Why output must be rebuilt; an empty list means it is up to date.
+        """
+        inputs = self.previous.get(output)
+        if inputs is None:
+            return ["not built before"]
+        if not os.path.exists(output):
+            return ["output is missing"]
+        reasons: list[str] = []
+        for key, old_fingerprint in inputs.items():
+            # graphs of older builds can name kinds that are no longer recorded
+            if key.partition(":")[0] not in INPUT_KINDS:
+                reasons.append(f"{describe_input(key)} is no longer tracked")
+            elif fingerprint(key) != old_fingerprint:
+                reasons.append(f"{describe_input(key)} changed")
+        return reasons
+
+    def record(self, output: str, inputs: dict[str, str]) -> None:
+        self.current[output] = dict(inputs)
+
+    def keep(self, output: str) -> None:
+        """
+        Carry over the previous record of an output that was up to date.
+        """
+        self.current[output] = self.previous[output]
+
+    def stale_outputs(self) -> list[str]:
+        """
+        Outputs of the previous build that this build no longer produces.
+        """
+        return sorted(set(self.previous) - set(self.current))
+
+    def remove_stale_outputs(self) -> list[str]:
+        """
+        Delete stale outputs (and their precompressed siblings) from disk,
+        along with the directory they were in if that is now empty.
+        """
+        removed: list[str] = []
+        for output in self.stale_outputs():
+            for path in (output, output + ".gz"):
+                if os.path.isfile(path):
+                    os.remove(path)
+                    removed.append(path)
+            output_dir = os.path.dirname(output)
+            if output_dir and os.path.isdir(output_dir) and not os.listdir(output_dir):
+                os.rmdir(output_dir)
+        return removed
+
+    def save(self) -> None:
+        if self.path is None:
+            return
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        with open(self.path, "w") as file_object:
+            # a one-shot dumps without indent runs in the C encoder; the
+            # graph has an entry per output, so this is most of a no-op build
+            file_object.write(json.dumps(self.current, sort_keys=True))
+
+
+class DiskDependencyGraph(DependencyGraph):
+    """
+    A DependencyGraph whose records live in an SQLite file instead of in
+    memory (see --low-memory). The previous build's records are read one
+    output at a time and the current build's are written as they come.
+
+    The file holds the records of two builds. When a build saves, its
+    records become the previous ones for the next build; a build that never
+    saved leaves the last complete records in place.
+    """
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.connection = open_database(path)
+        self.previous: DiskMapping | dict[str, dict[str, str]]
+        self.current: DiskMapping
+        self.previous, self.current = open_generations(self.connection)
+
+    def stale_outputs(self) -> list[str]:
+        if not isinstance(self.previous, DiskMapping):
+            return super().stale_outputs()
+        rows = self.connection.execute("SELECT key FROM previous WHERE key NOT IN (SELECT key FROM current) ORDER BY key")
+        return [output for (output,) in rows]
+
+    def save(self) -> None:
+        mark_complete(self.connection)
+
+    def close(self) -> None:
+        self.connection.close()
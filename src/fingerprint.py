@@ -0,0 +1,139 @@
+import os
+import re
+import json
+import hashlib
+from spill import DiskMapping, open_database
+
+HASH_LENGTH = 8
+CHUNK_SIZE = 1 << 16
+
+# href="/..." and src="/..." attributes that point at site-local files
+LOCAL_REFERENCE_RE = re.compile(r'(\b(?:href|src)=")(/[^"?#]*)([^"]*")')
+
+
+def file_digest(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as file_object:
+        for chunk in iter(lambda: file_object.read(CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def fingerprinted_name(file_name: str, digest: str) -> str:
+    """
+    Insert a short content hash before the extension:
+    'index.css' becomes 'index.3f2a9c1d.css'.
+    """
+    stem, extension = os.path.splitext(file_name)
+    return f"{stem}.{digest[:HASH_LENGTH]}{extension}"
+
+
+class AssetHashCache():
+    """
+    Content hashes of assets, persisted between builds. An asset is only
+    re-hashed when its size or mtime differs from the cached entry.
+    """
+    def __init__(self, cache_path: str | None = None) -> None:
+        self.cache_path = cache_path
+        self.entries: dict[str, tuple[int, int, str]] = {}
+        self.hits = 0
+        self.misses = 0
+        if cache_path is not None:
+            self.load()
+
+    def load(self) -> None:
+        try:
+            with open(self.cache_path, "r") as file_object:
+                data = json.load(file_object)
+        except (OSError, ValueError):
+            return
+        for path, (size, mtime_ns, digest) in data.items():
+            self.entries[path] = (size, mtime_ns, digest)
+
+    def save(self) -> None:
+        if self.cache_path is None:
+            return
+        os.makedirs(os.path.dirname(os.path.abspath(self.cache_path)), exist_ok=True)
+        with open(self.cache_path, "w") as file_object:
+            file_object.write(json.dumps(self.entries, sort_keys=True))
+
+    def get_hash(self, path: str) -> str:
+        stat = os.stat(path)
+        key = os.path.abspath(path)
+        cached = self.entries.get(key)
+        if cached is not None and cached[0] == stat.st_size and cached[1] == stat.st_mtime_ns:
+            self.hits += 1
+            return cached[2]
+        self.misses += 1
+        digest = file_digest(path)
+        self.entries[key] = (stat.st_size, stat.st_mtime_ns, digest)
+        return digest
+
+
+class DiskAssetHashCache(AssetHashCache):
+    """
+    An AssetHashCache kept in an SQLite file instead of in memory, for
+    sites with more sources than are worth holding (see --low-memory).
+    """
+    def load(self) -> None:
+        self.connection = open_database(self.cache_path)
+        self.entries = DiskMapping(self.connection, "hashes")
+
+    def save(self) -> None:
+        self.connection.commit()
+
+
+class AssetManifest():
+    """
+    Maps the site-relative URL of every published asset to the URL it was
+    actually published under ('/index.css' -> '/index.3f2a9c1d.css').
+    """
+    def __init__(self, source_root: str, hash_cache: AssetHashCache | None = None) -> None:
+        self.source_root = os.path.abspath(source_root)
+        self.hash_cache = hash_cache if hash_cache is not None else AssetHashCache()
+        self.urls: dict[str, str] = {}
+
+    def publish_name(self, source_path: str) -> str:
+        """
+        File name to publish source_path under; records the mapping.
+        """
+        file_name = os.path.basename(source_path)
+        published_name = fingerprinted_name(file_name, self.hash_cache.get_hash(source_path))
+        rel_path = os.path.relpath(os.path.abspath(source_path), self.source_root).replace(os.sep, "/")
+        rel_dir = os.path.dirname(rel_path)
+        prefix = f"/{rel_dir}/" if rel_dir else "/"
+        self.urls[prefix + file_name] = prefix + published_name
+        return published_name
+
+    def rewrite_html(self, html: str) -> str:
+        """
+        Point local href/src attributes at the fingerprinted URLs. Must run
+        before the basepath is applied, while references still start with '/'.
+        """
+        if not self.urls:
+            return html
+        def replace(match: re.Match) -> str:
+            published_url = self.urls.get(match.group(2))
+            if published_url is None:
+                return match.group(0)
+            return match.group(1) + published_url + match.group(3)
+        return LOCAL_REFERENCE_RE.sub(replace, html)
+
+    def save(self, path: str) -> None:
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, "w") as file_object:
+            json.dump(self.urls, file_object, indent=1, sort_keys=True)
+
+    @classmethod
+    def load(cls, path: str, source_root: str) -> "AssetManifest | None":
+        """
+        Load a saved manifest, or None if there is none.
+        """
+        try:
+            with open(path, "r") as file_object:
+                urls = json.load(file_object)
+        except (OSError, ValueError):
+            return None
+        manifest = cls(source_root)
+        manifest.urls = urls
+        return manifest
@@ -0,0 +1,14 @@
+import os
+
+
+def write_file(path: str, data: str | bytes, mtime_ns: int | None = None) -> str:
+    """
+    Write data to path for a test, creating missing directories first, and
+    return the path. mtime_ns, when given, becomes the file's mtime.
+    """
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb" if isinstance(data, bytes) else "w") as file_object:
+        file_object.write(data)
+    if mtime_ns is not None:
+        os.utime(path, ns=(mtime_ns, mtime_ns))
+    return path
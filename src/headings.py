@@ -0,0 +1,100 @@
+import re
+import html
+import functools
+from htmlnode import HTMLNode, LeafNode, ParentNode, escape_html, walk
+
+HEADING_TAGS = {f"h{level}": level for level in range(1, 7)}
+# the level 1 heading is the page title; the table of contents starts below it
+TOC_MIN_LEVEL = 2
+SLUG_STRIP_RE = re.compile(r"[^\w\s-]")
+SLUG_SEPARATOR_RE = re.compile(r"[\s_-]+")
+
+
+@functools.lru_cache(maxsize=4096)
+def slugify(text: str) -> str:
+    """
+    URL fragment for a heading's text: lowercase words joined by hyphens,
+    punctuation dropped ("Why Tom's *Hat*?" -> "why-toms-hat"). Memoized,
+    as the same headings come back on page after page.
+    """
+    slug = SLUG_SEPARATOR_RE.sub("-", SLUG_STRIP_RE.sub("", text.lower())).strip("-")
+    return slug or "section"
+
+
+def node_text(node: HTMLNode) -> str:
+    """
+    The text of a tree with its markup removed and entities decoded.
+    """
+    return html.unescape("".join(descendant.value for descendant in walk(node) if descendant.children is None and descendant.value))
+
+
+class HeadingIds():
+    """
+    Gives the headings of one page ids, in document order. A slug that is
+    already taken on the page gets the first free "-1", "-2", ... suffix.
+    """
+    def __init__(self) -> None:
+        self.used: set[str] = set()
+        # per slug, the suffix number to try next; every number below it is
+        # taken, so a page repeating one heading does not rescan them all
+        self.next_number: dict[str, int] = {}
+
+    def claim(self, text: str) -> str:
+        """
+        The id for the next heading, whose text is text.
+        """
+        slug = slugify(text)
+        number = self.next_number.get(slug, 0)
+        unique = f"{slug}-{number}" if number else slug
+        while unique in self.used:
+            number += 1
+            unique = f"{slug}-{number}"
+        self.next_number[slug] = number + 1
+        self.used.add(unique)
+        return unique
+
+    def assign(self, node: HTMLNode) -> None:
+        node.props = {**(node.props or {}), "id": self.claim(node_text(node))}
+
+
+def heading_entries(nodes: list[HTMLNode]) -> list[tuple[int, str, str]]:
+    """
+    (level, id, text) of every heading with an id among nodes, the top
+    level of a page's tree.
+    """
+    entries: list[tuple[int, str, str]] = []
+    for node in nodes:
+        level = HEADING_TAGS.get(node.tag)
+        if level is not None and node.props and "id" in node.props:
+            entries.append((level, node.props["id"], node_text(node)))
+    return entries
+
+
+def toc_to_html_node(entries: list[tuple[int, str, str]]) -> HTMLNode | None:
+    """
+    A nested list of links to the headings from TOC_MIN_LEVEL down, or None
+    if the page has none. A heading nests under the closest preceding
+    heading of a higher level.
+    """
+    root: list[HTMLNode] = []
+    # (level, list items go into, <li> that list belongs to)
+    stack: list[tuple[int, list[HTMLNode], ParentNode | None]] = [(0, root, None)]
+    for level, slug, text in entries:
+        if level < TOC_MIN_LEVEL:
+            continue
+        while stack[-1][0] >= level:
+            stack.pop()
+        _, items, owner = stack[-1]
+        if not items and owner is not None:
+            owner.children.append(ParentNode("ul", items))
+        item = ParentNode("li", [LeafNode("a", escape_html(text), {"href": f"#{slug}"})])
+        items.append(item)
+        stack.append((level, [], item))
+    if not root:
+        return None
+    return ParentNode("nav", [ParentNode("ul", root)], {"class": "toc"})
+
+
+def toc_html(entries: list[tuple[int, str, str]]) -> str:
+    node = toc_to_html_node(entries)
+    return "" if node is None else node.to_html()
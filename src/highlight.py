@@ -0,0 +1,230 @@
+import io
+import os
+import re
+import json
+import keyword
+import builtins
+import hashlib
+import tokenize
+from htmlnode import escape_html
+
+# bump when the highlighted markup changes, to invalidate cached output
+# (along with markdown_to_html.PARSER_VERSION, for cached page trees)
+HIGHLIGHTER_VERSION = 1
+# entries kept on disk; ones used by the current build are kept first
+MAX_CACHE_ENTRIES = 5000
+# a language name goes into a class attribute; anything else is no language
+LANGUAGE_RE = re.compile(r"[\w+#.-]+")
+
+LANGUAGE_ALIASES = {
+    "py": "python",
+    "py3": "python",
+    "python3": "python",
+    "js": "javascript",
+    "sh": "shell",
+    "bash": "shell",
+}
+
+BUILTIN_NAMES = frozenset(name for name in dir(builtins) if not name.startswith("_"))
+STRING_TOKEN_TYPES = frozenset(
+    getattr(tokenize, name) for name in ("STRING", "FSTRING_START", "FSTRING_MIDDLE", "FSTRING_END") if hasattr(tokenize, name)
+)
+
+GENERIC_KEYWORDS = frozenset("""
+    if else elif for while do return break continue switch case default try catch finally
+    throw raise function func fn def class struct enum interface import from export package
+    const let var static public private protected new delete this self true false null nil
+    none in of is and or not async await yield with as type match
+""".split())
+GENERIC_TOKEN_RE = re.compile(r"""
+    (?P<c>//[^\n]*|\#[^\n]*|/\*.*?\*/)
+    |(?P<s>"(?:\\.|[^"\\\n])*"|'(?:\\.|[^'\\\n])*'|`(?:\\.|[^`\\])*`)
+    |(?P<m>\b(?:0[xX][0-9a-fA-F]+|\d+(?:\.\d+)?(?:[eE][+-]?\d+)?)\b)
+    |(?P<w>\b[A-Za-z_][A-Za-z0-9_]*\b)
+""", re.VERBOSE | re.DOTALL)
+
+
+def normalize_language(info: str) -> str:
+    """
+    Language named by a fence info string ("```Python title=x" -> "python"),
+    or "" when there is none or it is not a plain name (like 'x"><script>').
+    """
+    words = info.strip().split()
+    if not words or not LANGUAGE_RE.fullmatch(words[0]):
+        return ""
+    language = words[0].lower()
+    return LANGUAGE_ALIASES.get(language, language)
+
+
+def _span(css_class: str | None, text: str) -> str:
+    if css_class is None:
+        return escape_html(text)
+    return f'<span class="{css_class}">{escape_html(text)}</span>'
+
+
+def _python_class(token: tokenize.TokenInfo, previous: str) -> str | None:
+    if token.type == tokenize.NAME:
+        if previous == "def":
+            return "nf"
+        if previous == "class":
+            return "nc"
+        if previous == "@":
+            return "nd"
+        if keyword.iskeyword(token.string):
+            return "k"
+        if token.string in BUILTIN_NAMES:
+            return "nb"
+        return None
+    if token.type in STRING_TOKEN_TYPES:
+        return "s"
+    if token.type == tokenize.NUMBER:
+        return "m"
+    if token.type == tokenize.COMMENT:
+        return "c"
+    if token.type == tokenize.OP:
+        return "o"
+    return None
+
+
+def highlight_python(code: str) -> str:
+    """
+    Highlight Python source with the stdlib tokenizer. The text between
+    tokens is copied through, so the markup reproduces code exactly.
+    Raises tokenize.TokenError or SyntaxError on code tokenize rejects.
+    """
+    line_offsets = [0]
+    for line in code.splitlines(keepends=True):
+        line_offsets.append(line_offsets[-1] + len(line))
+    pieces: list[str] = []
+    position = 0
+    previous = ""
+    for token in tokenize.generate_tokens(io.StringIO(code).readline):
+        if token.type == tokenize.ENDMARKER:
+            break
+        start = line_offsets[token.start[0] - 1] + token.start[1]
+        end = line_offsets[token.end[0] - 1] + token.end[1]
+        if start < position or start == end:
+            continue
+        if start > position:
+            pieces.append(escape_html(code[position:start]))
+        pieces.append(_span(_python_class(token, previous), code[start:end]))
+        position = end
+        if token.type in (tokenize.NAME, tokenize.OP):
+            previous = token.string
+    pieces.append(escape_html(code[position:]))
+    return "".join(pieces)
+
+
+def highlight_generic(code: str) -> str:
+    """
+    Language-agnostic highlighting of comments, strings, numbers and common
+    keywords, for languages without a dedicated tokenizer.
+    """
+    pieces: list[str] = []
+    position = 0
+    for match in GENERIC_TOKEN_RE.finditer(code):
+        css_class = match.lastgroup
+        if css_class == "w":
+            if match.group().lower() not in GENERIC_KEYWORDS:
+                continue
+            css_class = "k"
+        pieces.append(escape_html(code[position:match.start()]))
+        pieces.append(_span(css_class, match.group()))
+        position = match.end()
+    pieces.append(escape_html(code[position:]))
+    return "".join(pieces)
+
+
+def highlight(code: str, language: str) -> str:
+    """
+    Highlighted, escaped markup for code in language, made of text and
+    <span class="..."> elements.
+    """
+    if language == "python":
+        try:
+            return highlight_python(code)
+        except (tokenize.TokenError, SyntaxError):
+            pass
+    return highlight_generic(code)
+
+
+class HighlightCache():
+    """
+    Highlighted markup keyed by language and the hash of the code, so a
+    block that has not changed is never tokenized again. Entries can be
+    loaded from and saved to a JSON file of at most MAX_CACHE_ENTRIES;
+    entries not used since loading are the first to be dropped.
+    """
+    def __init__(self) -> None:
+        self.entries: dict[str, str] = {}
+        self.used: set[str] = set()
+        # when set, markup highlighted once this many entries are held is
+        # returned but not kept (low-memory builds)
+        self.max_entries: int | None = None
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, code: str, language: str) -> str:
+        digest = hashlib.sha256(f"{HIGHLIGHTER_VERSION}\0{language}\0".encode())
+        digest.update(code.encode())
+        return digest.hexdigest()
+
+    def highlight(self, code: str, language: str) -> str:
+        key = self.key(code, language)
+        markup = self.entries.get(key)
+        if markup is not None:
+            self.hits += 1
+            self.used.add(key)
+            return markup
+        self.misses += 1
+        markup = highlight(code, language)
+        if self.max_entries is None or len(self.entries) < self.max_entries:
+            self.entries[key] = markup
+            self.used.add(key)
+        return markup
+
+    def load(self, path: str) -> None:
+        try:
+            with open(path, "r") as file_object:
+                self.entries.update(json.load(file_object))
+        except (OSError, ValueError):
+            pass
+        self.used = set()
+        self.hits = 0
+        self.misses = 0
+
+    def save(self, path: str) -> None:
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        keys = sorted(self.used)
+        keys += sorted(key for key in self.entries if key not in self.used)
+        with open(path, "w") as file_object:
+            json.dump({key: self.entries[key] for key in keys[:MAX_CACHE_ENTRIES]}, file_object)
+
+
+highlight_cache = HighlightCache()
+
+
+def dedent_code(lines: list[str]) -> str:
+    """
+    The lines of a code block with their common leading spaces removed,
+    ending with a newline. Blank lines do not count towards the indent.
+    """
+    indents = [len(line) - len(line.lstrip(" ")) for line in lines if line.strip()]
+    min_indent = min(indents, default=0)
+    code = "\n".join(line[min_indent:] if line.strip() else "" for line in lines)
+    if not code.endswith("\n"):
+        code += "\n"
+    return code
+
+
+def code_block_html(lines: list[str], info: str) -> tuple[str, str]:
+    """
+    (language, markup) for the inside of a fenced code block's <code>: the
+    language named by the info string ("" for none) and the code, escaped,
+    or highlighted through highlight_cache when a language is given.
+    """
+    code = dedent_code(lines)
+    language = normalize_language(info)
+    if not language:
+        return "", escape_html(code)
+    return language, highlight_cache.highlight(code, language)
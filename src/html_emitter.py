@@ -0,0 +1,246 @@
+from collections.abc import Callable, Iterable, Iterator
+from blocknode import Block, BlockType
+from textnode import TextType
+from inline_markdown import extract_markdown_images, extract_markdown_links
+from htmlnode import escape_html, escape_attribute
+from markdown_blocks import parse_blocks
+from highlight import code_block_html
+from headings import HeadingIds
+from block_cache import BlockCache
+
+INLINE_TAGS = {TextType.BOLD: "b", TextType.ITALIC: "i", TextType.CODE: "code"}
+# in the order text_to_textnodes splits on them
+DELIMITERS = (
+    ("***", TextType.BOLD_ITALIC),
+    ("___", TextType.BOLD_ITALIC),
+    ("**", TextType.BOLD),
+    ("__", TextType.BOLD),
+    ("*", TextType.ITALIC),
+    ("_", TextType.ITALIC),
+    ("`", TextType.CODE),
+)
+# text without any of these is a single text node
+INLINE_MARKERS = ("*", "_", "`", "[")
+CONTAINER_TAGS = {
+    BlockType.QUOTE: "blockquote",
+    BlockType.UNORDERED_LIST: "ul",
+    BlockType.ORDERED_LIST: "ol",
+    BlockType.LIST_ITEM: "li",
+}
+
+
+def props_html(props: dict) -> str:
+    return "".join(f' {key}="{value}"' for key, value in props.items())
+
+
+Token = tuple[TextType, str, str | None]
+
+
+def inline_tokens(text: str) -> list[Token]:
+    """
+    text_to_textnodes as (text type, text, url) tuples: the same splits in
+    the same order, and the same ValueError for an unmatched delimiter.
+    """
+    if not text:
+        return [(TextType.TEXT, "", None)]
+    tokens: list[Token] = [(TextType.TEXT, text, None)]
+    if not any(marker in text for marker in INLINE_MARKERS):
+        return tokens
+    for delimiter, delimited_type in DELIMITERS:
+        if delimiter not in text:
+            continue
+        if any(token[1].count(delimiter) % 2 for token in tokens):
+            raise ValueError("Invalid Markdown syntax: unmatched delimiter")
+        split_tokens: list[Token] = []
+        for token in tokens:
+            if token[0] != TextType.TEXT or delimiter not in token[1]:
+                split_tokens.append(token)
+                continue
+            for index, part in enumerate(token[1].split(delimiter)):
+                if part:
+                    split_tokens.append((delimited_type if index % 2 else TextType.TEXT, part, None))
+        tokens = split_tokens
+    if "[" in text:
+        tokens = split_references(tokens, extract_markdown_images, "![{}]({})", TextType.IMAGE)
+        tokens = split_references(tokens, extract_markdown_links, "[{}]({})", TextType.LINK)
+    return tokens
+
+
+def split_references(tokens: list[Token], extract: Callable[[str], list[tuple[str, str]]], snippet: str, reference_type: TextType) -> list[Token]:
+    """
+    split_nodes_image and split_nodes_link on tokens.
+    """
+    split_tokens: list[Token] = []
+    for token in tokens:
+        references = extract(token[1]) if token[0] == TextType.TEXT else None
+        if not references:
+            split_tokens.append(token)
+            continue
+        remaining = token[1]
+        for reference_text, url in references:
+            before, remaining = remaining.split(snippet.format(reference_text, url), 1)
+            if before:
+                split_tokens.append((TextType.TEXT, before, None))
+            split_tokens.append((reference_type, reference_text, url))
+        if remaining:
+            split_tokens.append((TextType.TEXT, remaining, None))
+    return split_tokens
+
+
+class HTMLEmitter():
+    """
+    Renders parsed blocks straight to HTML chunks, without building TextNode
+    leaves and HTMLNode trees first. The output is the same, chunk for
+    chunk, as markdown_to_html_node(...).iter_html(); the tree path stays
+    for passes that need to look at the tree.
+
+    Top-level headings get ids as in markdown_to_html_node, and are listed
+    in headings as (level, id, text) for the table of contents. When
+    image_props is given, it sees (and may add to) the attributes of every
+    image before it is written.
+
+    With a block_cache, the other top-level blocks are taken from it when
+    their text has been rendered before; headings are always rendered, as
+    their ids depend on the rest of the page, and so are blocks with images
+    when image_props is given.
+    """
+    def __init__(self, image_props: Callable[[dict], None] | None = None, block_cache: BlockCache | None = None) -> None:
+        self.image_props = image_props
+        self.block_cache = block_cache
+        self.heading_ids = HeadingIds()
+        self.headings: list[tuple[int, str, str]] = []
+
+    def render(self, markdown: str) -> list[str]:
+        """
+        The chunks of a whole document, wrapped in a <div>.
+        """
+        out = ["<div>"]
+        for block in parse_blocks(markdown):
+            self.emit_top_block(block, out)
+        out.append("</div>")
+        return out
+
+    def iter_html(self, blocks: Iterable[Block], visit: Callable[[Block], None] | None = None) -> Iterator[str]:
+        """
+        Streaming counterpart of render for a stream of top-level blocks
+        (see iter_blocks_html). visit, when given, sees each block before it
+        is written.
+        """
+        yield "<div>"
+        out: list[str] = []
+        for block in blocks:
+            if visit is not None:
+                visit(block)
+            self.emit_top_block(block, out)
+            yield from out
+            out.clear()
+        yield "</div>"
+
+    def emit_top_block(self, block: Block, out: list[str]) -> None:
+        if block.block_type == BlockType.HEADING:
+            self.emit_heading(block, out, top_level=True)
+        elif self.block_cache is not None:
+            self.block_cache.emit(block, out, self.emit_block, skip_images=self.image_props is not None)
+        else:
+            self.emit_block(block, out)
+
+    def emit_block(self, block: Block, out: list[str]) -> None:
+        # blocks still to write, and the closing tags of the containers
+        # they are in
+        stack: list[Block | str] = [block]
+        while stack:
+            block = stack.pop()
+            if isinstance(block, str):
+                out.append(block)
+                continue
+            block_type = block.block_type
+            if block_type == BlockType.PARAGRAPH:
+                out.append("<p>")
+                self.emit_inline(" ".join(" ".join(block.lines).split()), out)
+                out.append("</p>")
+            elif block_type == BlockType.HEADING:
+                self.emit_heading(block, out)
+            elif block_type == BlockType.CODE:
+                language, markup = code_block_html(block.lines, block.info.lstrip("`"))
+                out.append("<pre>")
+                out.append(f'<code class="language-{language}">' if language else "<code>")
+                out.append(markup)
+                out.append("</code>")
+                out.append("</pre>")
+            elif block_type in CONTAINER_TAGS:
+                tag = CONTAINER_TAGS[block_type]
+                out.append(f"<{tag}>")
+                stack.append(f"</{tag}>")
+                stack.extend(reversed(self.emit_container(block, out)))
+            else:
+                raise ValueError(f"Unsupported BlockType: {block_type}")
+
+    def emit_heading(self, block: Block, out: list[str], top_level: bool = False) -> None:
+        prefix, text = " ".join(block.lines[0].split()).split(" ", 1)
+        level = min(len(prefix), 6)
+        start = len(out)
+        out.append("")
+        plain = self.emit_inline(text, out)
+        if top_level:
+            slug = self.heading_ids.claim(plain)
+            self.headings.append((level, slug, plain))
+            out[start] = f'<h{level} id="{slug}">'
+        else:
+            out[start] = f"<h{level}>"
+        out.append(f"</h{level}>")
+
+    def emit_container(self, block: Block, out: list[str]) -> list[Block]:
+        """
+        Write what comes first inside a quote, list or list item, and return
+        the child blocks still to write; see container_children.
+        """
+        children = block.children
+        if block.block_type in (BlockType.UNORDERED_LIST, BlockType.ORDERED_LIST):
+            return children
+        paragraphs = sum(1 for child in children if child.block_type == BlockType.PARAGRAPH)
+        if children and children[0].block_type == BlockType.PARAGRAPH and paragraphs == 1:
+            self.emit_inline(" ".join(" ".join(children[0].lines).split()), out)
+            children = children[1:]
+        return children
+
+    def emit_inline(self, text: str, out: list[str]) -> str:
+        """
+        Write the inline markup of text; returns its plain text (without
+        image alt texts), as headings.node_text would read it back.
+        """
+        tokens = inline_tokens(text)
+        if len(tokens) == 1 and tokens[0][0] == TextType.TEXT:
+            out.append(escape_html(text))
+            return text
+        plain: list[str] = []
+        for text_type, token_text, url in tokens:
+            if text_type == TextType.TEXT:
+                out.append(escape_html(token_text))
+            elif text_type in INLINE_TAGS:
+                tag = INLINE_TAGS[text_type]
+                out.append(f"<{tag}>")
+                out.append(escape_html(token_text))
+                out.append(f"</{tag}>")
+            elif text_type == TextType.LINK:
+                out.append(f'<a href="{escape_attribute(url)}">')
+                out.append(escape_html(token_text))
+                out.append("</a>")
+            elif text_type == TextType.IMAGE:
+                props = {"src": escape_attribute(url), "alt": escape_attribute(token_text)}
+                if self.image_props is not None:
+                    self.image_props(props)
+                out.append(f"<img{props_html(props)}>")
+                out.append("")
+                out.append("</img>")
+                continue
+            else:
+                raise ValueError(f"Unsupported TextType: {text_type}")
+            plain.append(token_text)
+        return "".join(plain)
+
+
+def markdown_to_html(markdown: str) -> str:
+    """
+    The HTML of markdown_to_html_node(markdown).to_html(), rendered directly.
+    """
+    return "".join(HTMLEmitter().render(markdown))
@@ -1,5 +1,31 @@
+from collections.abc import Callable, Iterator
 from textnode import TextNode, TextType
 
+# translate tables are built once; the fast paths in the escape functions
+# skip translating strings with nothing to escape, which is most of them
+HTML_ESCAPE_TABLE = str.maketrans({"&": "&amp;", "<": "&lt;", ">": "&gt;"})
+ATTRIBUTE_ESCAPE_TABLE = str.maketrans({"&": "&amp;", "<": "&lt;", ">": "&gt;", '"': "&quot;"})
+
+
+def escape_html(text: str) -> str:
+    """
+    Escape text for use as element content.
+    """
+    # substring tests are much cheaper than translate() on clean text
+    if "&" in text or "<" in text or ">" in text:
+        return text.translate(HTML_ESCAPE_TABLE)
+    return text
+
+
+def escape_attribute(value: str) -> str:
+    """
+    Escape text for use inside a double-quoted attribute value.
+    """
+    if "&" in value or "<" in value or ">" in value or '"' in value:
+        return value.translate(ATTRIBUTE_ESCAPE_TABLE)
+    return value
+
+
 class HTMLNode():
     def __init__(self, tag: str = None, value: str = None, children: list = None, props: dict = None) -> None:
         self.tag = tag
@@ -9,6 +35,14 @@ class HTMLNode():
 
     def to_html(self) -> str:
         raise NotImplementedError("to_html method must be implemented by subclasses")
+
+    def iter_html(self) -> Iterator[str]:
+        """
+        Serialize the node as a stream of chunks. Opening tags, text and
+        closing tags are always separate chunks, so stream consumers such as
+        the minifier can tell them apart without re-parsing the HTML.
+        """
+        raise NotImplementedError("iter_html method must be implemented by subclasses")
     
     def props_to_html(self) -> str:
         result = ""
@@ -21,13 +55,64 @@ class HTMLNode():
     def __eq__(self, other: object) -> bool:
         if not isinstance(other, HTMLNode):
             return False
-        if self.tag == other.tag and self.value == other.value and self.children == other.children and self.props == other.props:
-            return True
-        return False
+        # pairs of nodes still to compare
+        pairs: list[tuple[HTMLNode, HTMLNode]] = [(self, other)]
+        while pairs:
+            left, right = pairs.pop()
+            if left.tag != right.tag or left.value != right.value or left.props != right.props:
+                return False
+            if left.children is None or right.children is None:
+                if left.children is not right.children:
+                    return False
+                continue
+            if len(left.children) != len(right.children):
+                return False
+            for left_child, right_child in zip(left.children, right.children):
+                if left_child.__class__ is LeafNode and right_child.__class__ is LeafNode:
+                    # leaves are compared in place rather than stacked
+                    if left_child.tag != right_child.tag or left_child.value != right_child.value or left_child.props != right_child.props:
+                        return False
+                elif isinstance(left_child, HTMLNode) and isinstance(right_child, HTMLNode):
+                    pairs.append((left_child, right_child))
+                elif not left_child == right_child:
+                    return False
+        return True
+
+    def repr_parts(self) -> tuple[str, list | None, str]:
+        """
+        __repr__ in three parts: the text before the list of children, the
+        children (None when there is no list to show) and the text after.
+        """
+        fields = f"HTMLNode(tag='{self.tag}', value='{self.value}', children="
+        if not isinstance(self.children, list):
+            return f"{fields}{self.children!r}, props={self.props})", None, ""
+        return fields, self.children, f", props={self.props})"
 
     def __repr__(self) -> str:
-        return f"HTMLNode(tag='{self.tag}', value='{self.value}', children={self.children}, props={self.props})"
-    
+        # entries are (True, text) to write as it is or (False, object) to
+        # write the repr of
+        parts: list[str] = []
+        stack: list[tuple[bool, object]] = [(False, self)]
+        while stack:
+            is_text, item = stack.pop()
+            if is_text:
+                parts.append(item)
+            elif not isinstance(item, HTMLNode) or type(item).__repr__ is not HTMLNode.__repr__:
+                parts.append(repr(item))
+            else:
+                head, children, tail = item.repr_parts()
+                parts.append(head)
+                if children is None:
+                    parts.append(tail)
+                    continue
+                stack.append((True, "]" + tail))
+                for index in range(len(children) - 1, -1, -1):
+                    stack.append((False, children[index]))
+                    if index:
+                        stack.append((True, ", "))
+                stack.append((True, "["))
+        return "".join(parts)
+
 
 class LeafNode(HTMLNode):
     def __init__(self, tag: str, value: str, props: dict = None) -> None:
@@ -39,9 +124,19 @@ class LeafNode(HTMLNode):
         if self.tag is None:
             return f"{self.value}"
         return f"<{self.tag}{self.props_to_html()}>{self.value}</{self.tag}>"
+
+    def iter_html(self) -> Iterator[str]:
+        if self.value is None:
+            raise ValueError("All leaf nodes must have a value")
+        if self.tag is None:
+            yield self.value
+            return
+        yield f"<{self.tag}{self.props_to_html()}>"
+        yield self.value
+        yield f"</{self.tag}>"
     
-    def __repr__(self) -> str:
-        return f"LeafNode(tag='{self.tag}', value='{self.value}', props={self.props})"
+    def repr_parts(self) -> tuple[str, list | None, str]:
+        return f"LeafNode(tag='{self.tag}', value='{self.value}', props={self.props})", None, ""
     
     
 
@@ -50,37 +145,125 @@ class ParentNode(HTMLNode):
         super().__init__(tag, None, children, props)
 
     def to_html(self) -> str:
+        # iter_html's walk, collecting chunks into a list rather than
+        # yielding them one by one
         if self.tag is None:
             raise ValueError("All parent nodes must have a tag")
         if self.children is None:
             raise ValueError("All parent nodes must have children")
-        the_inside: str = ""
-        for child in self.children:
-            if not isinstance(child, HTMLNode):
-                raise ValueError("All children must be HTMLNode instances")
-            the_inside += child.to_html()
-            
-        return f"<{self.tag}{self.props_to_html()}>{the_inside}</{self.tag}>"
-    
-    def __repr__(self) -> str:
-        return f"ParentNode(tag='{self.tag}', children={self.children}, props={self.props})"
+        parts: list[str] = [f"<{self.tag}{self.props_to_html()}>"]
+        append = parts.append
+        stack: list[tuple[Iterator, str]] = [(iter(self.children), f"</{self.tag}>")]
+        while stack:
+            children, closing_tag = stack[-1]
+            for child in children:
+                if child.__class__ is LeafNode:
+                    if child.value is None:
+                        raise ValueError("All leaf nodes must have a value")
+                    if child.tag is None:
+                        append(child.value)
+                    else:
+                        append(f"<{child.tag}{child.props_to_html()}>{child.value}</{child.tag}>")
+                elif isinstance(child, ParentNode):
+                    if child.tag is None:
+                        raise ValueError("All parent nodes must have a tag")
+                    if child.children is None:
+                        raise ValueError("All parent nodes must have children")
+                    append(f"<{child.tag}{child.props_to_html()}>")
+                    stack.append((iter(child.children), f"</{child.tag}>"))
+                    break
+                elif isinstance(child, HTMLNode):
+                    append(child.to_html())
+                else:
+                    raise ValueError("All children must be HTMLNode instances")
+            else:
+                stack.pop()
+                append(closing_tag)
+        return "".join(parts)
+
+    def iter_html(self) -> Iterator[str]:
+        if self.tag is None:
+            raise ValueError("All parent nodes must have a tag")
+        if self.children is None:
+            raise ValueError("All parent nodes must have children")
+        yield f"<{self.tag}{self.props_to_html()}>"
+        # (children still to write, closing tag of their parent); leaves are
+        # written in place
+        stack: list[tuple[Iterator, str]] = [(iter(self.children), f"</{self.tag}>")]
+        while stack:
+            children, closing_tag = stack[-1]
+            for child in children:
+                if child.__class__ is LeafNode:
+                    if child.value is None:
+                        raise ValueError("All leaf nodes must have a value")
+                    if child.tag is None:
+                        yield child.value
+                    else:
+                        yield f"<{child.tag}{child.props_to_html()}>"
+                        yield child.value
+                        yield f"</{child.tag}>"
+                elif isinstance(child, ParentNode):
+                    if child.tag is None:
+                        raise ValueError("All parent nodes must have a tag")
+                    if child.children is None:
+                        raise ValueError("All parent nodes must have children")
+                    yield f"<{child.tag}{child.props_to_html()}>"
+                    stack.append((iter(child.children), f"</{child.tag}>"))
+                    break
+                elif isinstance(child, HTMLNode):
+                    yield from child.iter_html()
+                else:
+                    raise ValueError("All children must be HTMLNode instances")
+            else:
+                stack.pop()
+                yield closing_tag
+
+    def repr_parts(self) -> tuple[str, list | None, str]:
+        if not isinstance(self.children, list):
+            return f"ParentNode(tag='{self.tag}', children={self.children!r}, props={self.props})", None, ""
+        return f"ParentNode(tag='{self.tag}', children=", self.children, f", props={self.props})"
+
+
+def walk(node: HTMLNode, descend: Callable[[HTMLNode], bool] | None = None) -> Iterator[HTMLNode]:
+    """
+    Every node of the tree, in document order (each node before its
+    children). The children of a node are only visited when descend, if
+    given, returns True for it.
+
+    Markdown can nest quotes and lists thousands of levels deep, past
+    Python's recursion limit, so no pass over node or block trees recurses:
+    passes that only visit nodes use walk, and the serializers, comparisons
+    and converters keep a stack of their own.
+    """
+    stack: list[HTMLNode] = [node]
+    while stack:
+        node = stack.pop()
+        yield node
+        children = node.children
+        if children and (descend is None or descend(node)):
+            stack.extend(reversed(children))
+
 
 def text_node_to_html_node(text_node: TextNode) -> LeafNode:
+    """
+    Convert a TextNode to a LeafNode. Text and attribute values are escaped
+    here, once, so the serializers can emit node values as they are.
+    """
     if text_node.text_type == TextType.TEXT:
-        return LeafNode(None, text_node.text)
+        return LeafNode(None, escape_html(text_node.text))
     elif text_node.text_type == TextType.BOLD:
-        return LeafNode("b", text_node.text)
+        return LeafNode("b", escape_html(text_node.text))
     elif text_node.text_type == TextType.ITALIC:
-        return LeafNode("i", text_node.text)
+        return LeafNode("i", escape_html(text_node.text))
     elif text_node.text_type == TextType.CODE:
-        return LeafNode("code", text_node.text)
+        return LeafNode("code", escape_html(text_node.text))
     elif text_node.text_type == TextType.LINK:
         if text_node.url is None:
             raise ValueError("Link TextNode must have a URL")
-        return LeafNode("a", text_node.text, {"href": text_node.url})
+        return LeafNode("a", escape_html(text_node.text), {"href": escape_attribute(text_node.url)})
     elif text_node.text_type == TextType.IMAGE:
         if text_node.url is None:
             raise ValueError("Image TextNode must have a URL")
-        return LeafNode("img", "", {"src": text_node.url, "alt": text_node.text})
+        return LeafNode("img", "", {"src": escape_attribute(text_node.url), "alt": escape_attribute(text_node.text)})
     else:
         raise ValueError(f"Unsupported TextType: {text_node.text_type}")
@@ -0,0 +1,136 @@
+import os
+import struct
+from htmlnode import HTMLNode, walk
+
+# JPEG start-of-frame markers carry the image size; DHT/JPG/DAC share the range
+JPEG_SOF_MARKERS = {0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF}
+
+_size_cache: dict[str, tuple[int, tuple[int, int] | None]] = {}
+
+
+def _png_size(header: bytes) -> tuple[int, int] | None:
+    if len(header) < 24 or header[12:16] != b"IHDR":
+        return None
+    return struct.unpack(">II", header[16:24])
+
+
+def _gif_size(header: bytes) -> tuple[int, int] | None:
+    if len(header) < 10:
+        return None
+    return struct.unpack("<HH", header[6:10])
+
+
+def _webp_size(header: bytes) -> tuple[int, int] | None:
+    chunk = header[12:16]
+    if chunk == b"VP8 " and len(header) >= 30:
+        width, height = struct.unpack("<HH", header[26:30])
+        return width & 0x3FFF, height & 0x3FFF
+    if chunk == b"VP8L" and len(header) >= 25:
+        bits = int.from_bytes(header[21:25], "little")
+        return (bits & 0x3FFF) + 1, ((bits >> 14) & 0x3FFF) + 1
+    if chunk == b"VP8X" and len(header) >= 30:
+        width = int.from_bytes(header[24:27], "little") + 1
+        height = int.from_bytes(header[27:30], "little") + 1
+        return width, height
+    return None
+
+
+def _jpeg_size(file_object) -> tuple[int, int] | None:
+    """
+    Walk the JPEG segment headers, seeking over segment bodies, until a
+    start-of-frame marker is found. Only a few bytes per segment are read.
+    """
+    file_object.seek(2)
+    while True:
+        marker = file_object.read(2)
+        if len(marker) < 2 or marker[0] != 0xFF:
+            return None
+        code = marker[1]
+        while code == 0xFF:  # fill bytes
+            next_byte = file_object.read(1)
+            if not next_byte:
+                return None
+            code = next_byte[0]
+        if code == 0xD8 or 0xD0 <= code <= 0xD7:  # markers without a length
+            continue
+        length_bytes = file_object.read(2)
+        if len(length_bytes) < 2:
+            return None
+        length = struct.unpack(">H", length_bytes)[0]
+        if code in JPEG_SOF_MARKERS:
+            frame = file_object.read(5)
+            if len(frame) < 5:
+                return None
+            height, width = struct.unpack(">HH", frame[1:5])
+            return width, height
+        if code in (0xD9, 0xDA):  # end of image / start of scan: no frame header found
+            return None
+        file_object.seek(length - 2, os.SEEK_CUR)
+
+
+def read_image_size(path: str) -> tuple[int, int] | None:
+    """
+    Return (width, height) of a PNG, GIF, WebP or JPEG file by reading only
+    its header bytes, or None if the format is unknown or the file is corrupt.
+    """
+    with open(path, "rb") as file_object:
+        header = file_object.read(32)
+        if header.startswith(b"\x89PNG\r\n\x1a\n"):
+            return _png_size(header)
+        if header[:6] in (b"GIF87a", b"GIF89a"):
+            return _gif_size(header)
+        if header[:4] == b"RIFF" and header[8:12] == b"WEBP":
+            return _webp_size(header)
+        if header[:2] == b"\xff\xd8":
+            return _jpeg_size(file_object)
+    return None
+
+
+def cached_image_size(path: str) -> tuple[int, int] | None:
+    """
+    read_image_size memoized by path and mtime, so an image that appears on
+    many pages is only sniffed once per change.
+    """
+    try:
+        mtime_ns = os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+    cached = _size_cache.get(path)
+    if cached is not None and cached[0] == mtime_ns:
+        return cached[1]
+    size = read_image_size(path)
+    _size_cache[path] = (mtime_ns, size)
+    return size
+
+
+def is_local_url(url: str) -> bool:
+    return url.startswith("/") and not url.startswith("//")
+
+
+def annotate_image_props(props: dict, static_dir: str, image_files: set[str] | None = None) -> None:
+    """
+    Add width/height (when the file can be sniffed) and lazy-loading hints to
+    the attributes of an <img> that points at a local file under static_dir.
+    The image file consulted is added to image_files when it is given.
+    """
+    if not is_local_url(props.get("src", "")):
+        return
+    rel_path = props["src"].split("?", 1)[0].split("#", 1)[0].lstrip("/")
+    image_path = os.path.join(static_dir, rel_path)
+    if image_files is not None:
+        image_files.add(image_path)
+    size = cached_image_size(image_path)
+    if size is not None:
+        props.setdefault("width", str(size[0]))
+        props.setdefault("height", str(size[1]))
+    props.setdefault("loading", "lazy")
+    props.setdefault("decoding", "async")
+
+
+def annotate_images(node: HTMLNode, static_dir: str, image_files: set[str] | None = None) -> None:
+    """
+    annotate_image_props for every <img> in the tree.
+    """
+    for descendant in walk(node):
+        if descendant.tag == "img" and descendant.props:
+            annotate_image_props(descendant.props, static_dir, image_files)
@@ -0,0 +1,183 @@
+import sys
+import types
+from collections.abc import Iterator, Mapping
+from htmlnode import HTMLNode, LeafNode, ParentNode
+
+# distinct subtrees a NodeInterner remembers; past this, new subtrees are
+# still converted but not kept (low-memory builds keep fewer)
+DEFAULT_MAX_ENTRIES = 200000
+LOW_MEMORY_MAX_ENTRIES = 20000
+STRUCTURE_FIELDS = frozenset({"tag", "value", "children", "props"})
+
+
+class FrozenNode(HTMLNode):
+    """
+    An immutable node: a leaf when children is None, as for LeafNode, and a
+    parent with a tuple of frozen children otherwise. Props are a read-only
+    mapping. Frozen nodes hash by structure, so equal subtrees hash equal.
+
+    A node that NodeInterner found more than once is shared: its chunks are
+    computed the first time it is serialized and reused from then on.
+    """
+    def __init__(self, tag: str | None, value: str | None, children: tuple["FrozenNode", ...] | None, props: Mapping[str, str] | None) -> None:
+        object.__setattr__(self, "tag", tag)
+        object.__setattr__(self, "value", value)
+        object.__setattr__(self, "children", children)
+        object.__setattr__(self, "props", None if props is None else types.MappingProxyType(dict(props)))
+        object.__setattr__(self, "_hash", hash((tag, value, None if props is None else frozenset(props.items()), children)))
+        self.shared = False
+        self.chunks: tuple[str, ...] | None = None
+
+    def __setattr__(self, name: str, value: object) -> None:
+        if name in STRUCTURE_FIELDS:
+            raise AttributeError(f"FrozenNode.{name} cannot be changed")
+        object.__setattr__(self, name, value)
+
+    def __hash__(self) -> int:
+        return self._hash
+
+    def repr_parts(self) -> tuple[str, list | None, str]:
+        props = None if self.props is None else dict(self.props)
+        if self.children is None:
+            return f"FrozenNode(tag='{self.tag}', value='{self.value}', props={props})", None, ""
+        return f"FrozenNode(tag='{self.tag}', children=", list(self.children), f", props={props})"
+
+    def to_html(self) -> str:
+        return "".join(self.iter_html())
+
+    def iter_html(self) -> Iterator[str]:
+        if self.chunks is None and self.shared:
+            self.chunks = tuple(self._serialize(cache_shared=False))
+        if self.chunks is not None:
+            return iter(self.chunks)
+        return self._serialize(cache_shared=True)
+
+    def _serialize(self, cache_shared: bool) -> Iterator[str]:
+        """
+        The chunks of the node, as ParentNode.iter_html writes them. Shared
+        nodes below it reuse their chunks; with cache_shared, the topmost
+        ones compute and keep them first. The nodes inside a shared node are
+        written out in its chunks rather than cached again.
+        """
+        if self.children is None:
+            if self.tag is None:
+                yield self.value
+            else:
+                yield f"<{self.tag}{self.props_to_html()}>"
+                yield self.value
+                yield f"</{self.tag}>"
+            return
+        yield f"<{self.tag}{self.props_to_html()}>"
+        stack: list[tuple[Iterator[FrozenNode], str]] = [(iter(self.children), f"</{self.tag}>")]
+        while stack:
+            children, closing_tag = stack[-1]
+            for child in children:
+                if child.chunks is None and cache_shared and child.shared:
+                    child.chunks = tuple(child._serialize(cache_shared=False))
+                if child.chunks is not None:
+                    yield from child.chunks
+                elif child.children is None:
+                    if child.tag is None:
+                        yield child.value
+                    else:
+                        yield f"<{child.tag}{child.props_to_html()}>"
+                        yield child.value
+                        yield f"</{child.tag}>"
+                else:
+                    yield f"<{child.tag}{child.props_to_html()}>"
+                    stack.append((iter(child.children), f"</{child.tag}>"))
+                    break
+            else:
+                stack.pop()
+                yield closing_tag
+
+
+def node_size(node: HTMLNode) -> int:
+    """
+    Bytes held by a node object itself: the object, its attributes, props
+    dict, children list and value string (not the children).
+    """
+    size = sys.getsizeof(node) + sys.getsizeof(node.__dict__)
+    for part in (node.props, node.children, node.value):
+        if part is not None:
+            size += sys.getsizeof(part)
+    return size
+
+
+class NodeInterner():
+    """
+    Canonical frozen nodes by structure. Interning a tree replaces every
+    subtree that was seen before, on this page or an earlier one, with the
+    same FrozenNode, so repeated fragments (shared lists, notices, footers)
+    are held and serialized once.
+
+    Counts lookups and hits, and estimates the bytes of the duplicate nodes
+    that were replaced by shared ones.
+    """
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES) -> None:
+        self.nodes: dict[tuple, FrozenNode] = {}
+        self.max_entries = max_entries
+        self.lookups = 0
+        self.hits = 0
+        self.bytes_saved = 0
+
+    def reset_stats(self) -> None:
+        self.lookups = self.hits = self.bytes_saved = 0
+
+    def intern(self, node: HTMLNode) -> FrozenNode:
+        """
+        The interned, frozen form of a tree of LeafNodes and ParentNodes
+        (or frozen nodes). Subtrees are interned children first, as the key
+        of a parent holds its frozen children.
+        """
+        # frozen subtrees, in order, whose parent is not finished yet
+        done: list[FrozenNode] = []
+        # (node, True once its children have been pushed)
+        stack: list[tuple[HTMLNode, bool]] = [(node, False)]
+        while stack:
+            current, expanded = stack.pop()
+            if isinstance(current, FrozenNode):
+                done.append(current)
+                continue
+            if isinstance(current, LeafNode):
+                if current.value is None:
+                    raise ValueError("All leaf nodes must have a value")
+                children = None
+            elif isinstance(current, ParentNode):
+                if current.tag is None:
+                    raise ValueError("All parent nodes must have a tag")
+                if current.children is None:
+                    raise ValueError("All parent nodes must have children")
+                if not expanded:
+                    stack.append((current, True))
+                    for child in reversed(current.children):
+                        if not isinstance(child, HTMLNode):
+                            raise ValueError("All children must be HTMLNode instances")
+                        stack.append((child, False))
+                    continue
+                count = len(current.children)
+                children = tuple(done[len(done) - count:])
+                del done[len(done) - count:]
+            else:
+                raise ValueError(f"Cannot intern a {type(current).__name__}")
+            done.append(self._lookup(current, children))
+        return done[0]
+
+    def _lookup(self, node: HTMLNode, children: tuple[FrozenNode, ...] | None) -> FrozenNode:
+        props = node.props
+        key = (node.tag, node.value, None if props is None else tuple(props.items()), children)
+        self.lookups += 1
+        frozen = self.nodes.get(key)
+        if frozen is not None:
+            self.hits += 1
+            self.bytes_saved += node_size(node)
+            frozen.shared = True
+            return frozen
+        frozen = FrozenNode(node.tag, node.value, children, props)
+        if len(self.nodes) < self.max_entries:
+            self.nodes[key] = frozen
+        return frozen
+
+    def describe(self) -> str:
+        rate = self.hits / self.lookups if self.lookups else 0.0
+        return f"Interned nodes: {self.hits} of {self.lookups} reused ({rate:.1%} hit rate), about {self.bytes_saved // 1024} KiB of duplicates saved"
@@ -0,0 +1,247 @@
+import os
+import re
+import json
+import html
+import urllib.parse
+from concurrent.futures import ProcessPoolExecutor
+from collections.abc import Iterable, Iterator
+from htmlnode import HTMLNode, walk
+from blocknode import Block, BlockType
+from site_index import dest_path_to_url
+from spill import DiskMapping, open_database, open_generations, mark_complete
+
+LINK_ATTRIBUTES = ("href", "src")
+# "https:", "mailto:" and the like; anything with a scheme is not checked
+SCHEME_RE = re.compile(r"[a-zA-Z][a-zA-Z0-9+.-]*:")
+# below this many pages the checks run in this process; starting workers
+# would take longer than the checks
+PARALLEL_MIN_PAGES = 2000
+CHUNK_PAGES = 500
+
+
+def node_links(node: HTMLNode) -> Iterator[tuple[str, str]]:
+    """
+    (attribute, target) of every link and image in the tree, in document
+    order. Targets are unescaped, as they were written in the markdown.
+    """
+    for descendant in walk(node):
+        if descendant.props:
+            for attribute in LINK_ATTRIBUTES:
+                if attribute in descendant.props:
+                    yield attribute, html.unescape(descendant.props[attribute])
+
+
+def node_ids(node: HTMLNode) -> Iterator[str]:
+    for descendant in walk(node):
+        if descendant.props and "id" in descendant.props:
+            yield html.unescape(descendant.props["id"])
+
+
+def block_lines(block: Block, first_line: int = 1) -> Iterator[tuple[int, str]]:
+    """
+    (line number, text) of the source lines of a block's paragraphs and
+    headings, numbered from first_line for the first line of the document.
+    """
+    stack = [block]
+    while stack:
+        block = stack.pop()
+        if block.block_type in (BlockType.PARAGRAPH, BlockType.HEADING):
+            for offset, line in enumerate(block.lines):
+                yield first_line + block.start + offset, line
+        stack.extend(reversed(block.children))
+
+
+class PageLinks():
+    """
+    The links and anchor ids of one rendered page, gathered from its tree
+    as it is rendered. Each link gets the number of the source line it was
+    written on: the first line, at or after the previous link's, that
+    contains its target.
+    """
+    def __init__(self) -> None:
+        self.links: list[list] = []
+        self.ids: list[str] = []
+
+    def add(self, node: HTMLNode, numbered_lines: Iterable[tuple[int, str]]) -> None:
+        lines = list(numbered_lines)
+        position = 0
+        for attribute, target in node_links(node):
+            for index in range(position, len(lines)):
+                if target in lines[index][1]:
+                    position = index
+                    break
+            line = lines[position][0] if lines else 0
+            self.links.append([attribute, target, line])
+        self.ids.extend(node_ids(node))
+
+
+class LinkIndex():
+    """
+    The links and anchor ids of every rendered page by source, kept between
+    builds like the dependency graph: pages that are not rebuilt carry
+    their record over, so the checker always sees the whole site.
+    """
+    def __init__(self, dest_root: str, path: str | None = None) -> None:
+        self.dest_root = dest_root
+        self.path = path
+        self.previous: dict[str, dict] = {}
+        self.current: dict[str, dict] = {}
+        if path is not None:
+            try:
+                with open(path, "r") as file_object:
+                    self.previous = json.load(file_object)
+            except (OSError, ValueError):
+                self.previous = {}
+
+    def record(self, source: str, dest_path: str, page: PageLinks) -> None:
+        output = os.path.relpath(dest_path, self.dest_root).replace(os.sep, "/")
+        self.current[source] = {"output": output, "url": dest_path_to_url(dest_path, self.dest_root), "links": page.links, "ids": page.ids}
+
+    def keep(self, source: str) -> None:
+        self.current[source] = self.previous[source]
+
+    def pages(self) -> Iterator[tuple[str, dict]]:
+        for source in sorted(self.current):
+            yield source, self.current[source]
+
+    def save(self) -> None:
+        if self.path is None:
+            return
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        with open(self.path, "w") as file_object:
+            file_object.write(json.dumps(self.current, sort_keys=True))
+
+    def close(self) -> None:
+        pass
+
+
+class DiskLinkIndex(LinkIndex):
+    """
+    A LinkIndex kept in an SQLite file (see --low-memory).
+    """
+    def __init__(self, dest_root: str, path: str) -> None:
+        self.dest_root = dest_root
+        self.path = path
+        self.connection = open_database(path)
+        self.previous: DiskMapping | dict[str, dict]
+        self.current: DiskMapping
+        self.previous, self.current = open_generations(self.connection)
+
+    def pages(self) -> Iterator[tuple[str, dict]]:
+        return iter(self.current.items())
+
+    def save(self) -> None:
+        mark_complete(self.connection)
+
+    def close(self) -> None:
+        self.connection.close()
+
+
+def output_paths(dest_root: str) -> set[str]:
+    """
+    Every file under dest_root, as a "/"-separated relative path.
+    """
+    paths: set[str] = set()
+    for dir_path, _, file_names in os.walk(dest_root):
+        rel_dir = os.path.relpath(dir_path, dest_root).replace(os.sep, "/")
+        prefix = "" if rel_dir == os.curdir else rel_dir + "/"
+        paths.update(prefix + file_name for file_name in file_names)
+    return paths
+
+
+def check_target(target: str, page_url: str, basepath: str, outputs: set[str], anchors: dict[str, set[str]], asset_urls: dict[str, str] | None = None) -> str | None:
+    """
+    Why a link on the page at page_url is broken, or None if it resolves to
+    an output (and to an anchor id on it, when it has a fragment and the
+    ids of the target page are known). Links with a scheme are external
+    and not checked. Pages record links as written, so with fingerprinted
+    assets the path is looked up through asset_urls (AssetManifest.urls)
+    first.
+    """
+    if SCHEME_RE.match(target) or target.startswith("//"):
+        return None
+    parts = urllib.parse.urlsplit(urllib.parse.urljoin(page_url, target))
+    path = urllib.parse.unquote(parts.path)
+    if asset_urls:
+        path = asset_urls.get(path, path)
+    rel_path = path.lstrip("/")
+    output = rel_path + "index.html" if not rel_path or path.endswith("/") else rel_path
+    if output not in outputs:
+        if basepath != "/" and path.startswith(basepath):
+            return f"already starts with the basepath {basepath}, which the build adds"
+        if rel_path + "/index.html" in outputs:
+            return f"is a directory; link to {path}/"
+        return "no such output"
+    fragment = urllib.parse.unquote(parts.fragment)
+    if fragment and output in anchors and fragment not in anchors[output]:
+        return f"no anchor '#{fragment}' on {path}"
+    return None
+
+
+_worker_state: tuple[str, set[str], dict[str, set[str]], dict[str, str] | None] | None = None
+
+
+def _init_worker(basepath: str, outputs: set[str], anchors: dict[str, set[str]], asset_urls: dict[str, str] | None) -> None:
+    global _worker_state
+    _worker_state = (basepath, outputs, anchors, asset_urls)
+
+
+def _check_chunk(pages: list[tuple[str, dict]]) -> list[dict]:
+    return check_pages(pages, *_worker_state)
+
+
+def check_pages(pages: Iterable[tuple[str, dict]], basepath: str, outputs: set[str], anchors: dict[str, set[str]], asset_urls: dict[str, str] | None = None) -> list[dict]:
+    failures: list[dict] = []
+    for source, page in pages:
+        for attribute, target, line in page["links"]:
+            reason = check_target(target, page["url"], basepath, outputs, anchors, asset_urls)
+            if reason is not None:
+                served = basepath + target[1:] if target.startswith("/") else target
+                failures.append({"source": source, "line": line, "attribute": attribute, "target": target, "url": served, "reason": reason})
+    return failures
+
+
+def _chunks(pages: Iterable[tuple[str, dict]], size: int) -> Iterator[list[tuple[str, dict]]]:
+    chunk: list[tuple[str, dict]] = []
+    for page in pages:
+        chunk.append(page)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def check_links(index: LinkIndex, basepath: str, workers: int | None = None, asset_urls: dict[str, str] | None = None) -> dict:
+    """
+    Check every link of every page in the index against the output tree
+    and the anchor ids of the rendered pages; asset_urls maps asset URLs
+    to the fingerprinted ones they were published under. Outputs and ids
+    are indexed once; on large sites the pages are checked in chunks on a
+    pool of worker processes. Returns the report: counts and the failures,
+    ordered by source and line.
+    """
+    outputs = output_paths(index.dest_root)
+    anchors: dict[str, set[str]] = {}
+    page_count = 0
+    link_count = 0
+    for _, page in index.pages():
+        anchors[page["output"]] = set(page["ids"])
+        page_count += 1
+        link_count += len(page["links"])
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or page_count < PARALLEL_MIN_PAGES:
+        failures = check_pages(index.pages(), basepath, outputs, anchors, asset_urls)
+    else:
+        failures = []
+        with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(basepath, outputs, anchors, asset_urls)) as executor:
+            for chunk_failures in executor.map(_check_chunk, _chunks(index.pages(), CHUNK_PAGES)):
+                failures.extend(chunk_failures)
+    failures.sort(key=lambda failure: (failure["source"], failure["line"]))
+    return {"pages": page_count, "links": link_count, "broken": failures}
+
+
+def write_report(report: dict, path: str) -> None:
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "w") as file_object:
+        json.dump(report, file_object, indent=1)
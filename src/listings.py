@@ -0,0 +1,212 @@
+import os
+import shutil
+from collections.abc import Iterable, Iterator
+from xml.sax.saxutils import escape
+from htmlnode import HTMLNode, LeafNode, ParentNode, escape_html, escape_attribute
+from markdown_to_html import apply_template
+from templates import CompiledTemplate
+from fingerprint import AssetManifest
+from build_context import BuildContext
+from site_index import SiteIndex, PageEntry, FEED_SIZE
+
+PAGE_SIZE = 10
+
+
+def iter_pages(entries: Iterable[PageEntry], page_size: int = PAGE_SIZE) -> Iterator[list[PageEntry]]:
+    """
+    Entries split into pages of page_size, one page at a time.
+    """
+    if page_size < 1:
+        raise ValueError("page_size must be at least 1")
+    page: list[PageEntry] = []
+    for entry in entries:
+        page.append(entry)
+        if len(page) == page_size:
+            yield page
+            page = []
+    if page:
+        yield page
+
+
+def listing_page_url(base_url: str, page_number: int) -> str:
+    """
+    URL of one page of a listing: page 1 lives at the listing root,
+    later pages under 'page/N/'.
+    """
+    if page_number == 1:
+        return base_url
+    return f"{base_url}page/{page_number}/"
+
+
+def url_to_dest_path(url: str, dest_root: str) -> str:
+    rel_path = url.strip("/")
+    if url.endswith("/"):
+        rel_path = os.path.join(rel_path, "index.html") if rel_path else "index.html"
+    return os.path.join(dest_root, rel_path)
+
+
+def tag_url(tag: str) -> str:
+    return f"/tags/{tag.replace(' ', '-')}/"
+
+
+def listing_to_html_node(heading: str, entries: list[PageEntry], page_number: int, page_count: int, base_url: str) -> HTMLNode:
+    items: list[HTMLNode] = []
+    for entry in entries:
+        children: list[HTMLNode] = [
+            LeafNode("a", escape_html(entry.title), {"href": escape_attribute(entry.url)}),
+            LeafNode(None, " "),
+            LeafNode("time", entry.date, {"datetime": entry.date}),
+        ]
+        if entry.summary:
+            children.append(LeafNode("p", escape_html(entry.summary)))
+        items.append(ParentNode("li", children))
+    children = [LeafNode("h1", escape_html(heading))]
+    if items:
+        children.append(ParentNode("ul", items))
+    nav: list[HTMLNode] = []
+    if page_number > 1:
+        nav.append(LeafNode("a", "&lt; Newer", {"href": listing_page_url(base_url, page_number - 1), "rel": "prev"}))
+    if page_number < page_count:
+        if nav:
+            nav.append(LeafNode(None, " "))
+        nav.append(LeafNode("a", "Older &gt;", {"href": listing_page_url(base_url, page_number + 1), "rel": "next"}))
+    if nav:
+        children.append(ParentNode("nav", nav))
+    return ParentNode("div", children)
+
+
+def listing_heading(key: str) -> tuple[str, str]:
+    """
+    Heading and base URL of the listing with the given key.
+    """
+    kind, _, name = key.partition(":")
+    if kind == "section":
+        return name.capitalize(), f"/{name}/"
+    return f"Posts tagged '{name}'", tag_url(name)
+
+
+def iter_listing_pages(index: SiteIndex, page_size: int = PAGE_SIZE) -> Iterator[tuple[str, str, str, HTMLNode]]:
+    """
+    Every listing page the index produces, as (listing key, url, title,
+    content node) tuples. Pages are built as they are consumed, so only one
+    page of entries is in memory at a time.
+    """
+    # a content page at the listing root (e.g. content/blog/index.md) wins
+    claimed_urls = index.page_urls()
+    for key, entries in index.listings().items():
+        heading, base_url = listing_heading(key)
+        page_count = (len(entries) + page_size - 1) // page_size
+        for page_number, page_entries in enumerate(iter_pages(entries, page_size), start=1):
+            title = heading if page_number == 1 else f"{heading} (page {page_number})"
+            node = listing_to_html_node(heading, page_entries, page_number, page_count, base_url)
+            url = listing_page_url(base_url, page_number)
+            if url in claimed_urls:
+                url = f"{base_url}page/{page_number}/"
+            yield key, url, title, node
+
+
+def atom_feed(index: SiteIndex, site_url: str, basepath: str, feed_title: str, feed_size: int = FEED_SIZE) -> str:
+    """
+    Render the newest section entries of the index as an Atom 1.0 document.
+    """
+    root_url = site_url.rstrip("/") + basepath.rstrip("/")
+    entries = index.feed_entries(feed_size)
+    updated = entries[0].date if entries else "1970-01-01"
+    lines = [
+        '<?xml version="1.0" encoding="utf-8"?>',
+        '<feed xmlns="http://www.w3.org/2005/Atom">',
+        f"  <title>{escape(feed_title)}</title>",
+        f'  <link href="{escape(root_url)}/"/>',
+        f'  <link rel="self" href="{escape(root_url)}/feed.xml"/>',
+        f"  <id>{escape(root_url)}/</id>",
+        f"  <updated>{updated}T00:00:00Z</updated>",
+    ]
+    for entry in entries:
+        entry_url = escape(root_url + entry.url)
+        lines.append("  <entry>")
+        lines.append(f"    <title>{escape(entry.title)}</title>")
+        lines.append(f'    <link href="{entry_url}"/>')
+        lines.append(f"    <id>{entry_url}</id>")
+        lines.append(f"    <updated>{entry.date}T00:00:00Z</updated>")
+        for tag in entry.tags:
+            lines.append(f'    <category term="{escape(tag)}"/>')
+        if entry.summary:
+            lines.append(f"    <summary>{escape(entry.summary)}</summary>")
+        lines.append("  </entry>")
+    lines.append("</feed>")
+    return "\n".join(lines) + "\n"
+
+
+def write_listings(index: SiteIndex, previous: SiteIndex | None, template: str | CompiledTemplate, dest_dir_path: str, basepath: str, site_url: str, feed_title: str, page_size: int = PAGE_SIZE, manifest: AssetManifest | None = None, context: BuildContext | None = None) -> list[str]:
+    """
+    Write section listings, tag pages and the Atom feed for the index.
+
+    Only listings affected by pages that changed since the previous index are
+    rewritten, unless their output is missing. When the context carries a
+    dependency graph, listings are also rewritten when the template, a
+    setting or a referenced asset changed. Listings that no longer exist
+    are removed. Returns the paths that were written.
+    """
+    if context is None:
+        context = BuildContext(manifest=manifest)
+    if manifest is None:
+        manifest = context.manifest
+    affected = index.affected_listings(previous)
+    written: list[str] = []
+    for key, url, title, node in iter_listing_pages(index, page_size):
+        dest_path = url_to_dest_path(url, dest_dir_path)
+        reasons = ["listed pages changed"] if key in affected else []
+        if context.graph is not None:
+            reasons += context.rebuild_reasons(dest_path)
+        elif not reasons and not os.path.exists(dest_path):
+            reasons = ["output is missing"]
+        context.report(dest_path, reasons)
+        if not reasons:
+            if context.graph is not None:
+                context.graph.keep(dest_path)
+            continue
+        context.begin_output()
+        if isinstance(template, CompiledTemplate):
+            for template_file in sorted(template.inputs):
+                context.depends_on(f"file:{template_file}")
+        elif context.template_path is not None:
+            context.depends_on(f"file:{context.template_path}")
+        context.depends_on_config()
+        # one digest of everything listed, rather than an input per listed
+        # page, which would grow with the square of the listing's length
+        context.depends_on(f"listing:{key}")
+        used_urls: set[str] | None = set() if context.graph is not None else None
+        os.makedirs(os.path.dirname(dest_path), exist_ok=True)
+        with open(dest_path, "w") as file_object:
+            file_object.write(apply_template(template, title, node.to_html(), basepath, manifest, used_urls))
+        for asset_url in sorted(used_urls or ()):
+            context.depends_on(f"asset:{asset_url}")
+        context.finish_output(dest_path)
+        written.append(dest_path)
+
+    if previous is not None:
+        for key in previous.listing_keys() - index.listing_keys():
+            kind, _, name = key.partition(":")
+            if kind == "tag":
+                stale_dir = url_to_dest_path(tag_url(name), dest_dir_path)
+                shutil.rmtree(os.path.dirname(stale_dir), ignore_errors=True)
+
+    feed_path = os.path.join(dest_dir_path, "feed.xml")
+    reasons = ["feed entries changed"] if "feed" in affected else []
+    if context.graph is not None:
+        reasons += context.rebuild_reasons(feed_path)
+    elif not reasons and not os.path.exists(feed_path):
+        reasons = ["output is missing"]
+    context.report(feed_path, reasons)
+    if not reasons:
+        if context.graph is not None:
+            context.graph.keep(feed_path)
+        return written
+    context.begin_output()
+    context.depends_on_config()
+    context.depends_on("listing:feed")
+    with open(feed_path, "w") as file_object:
+        file_object.write(atom_feed(index, site_url, basepath, feed_title))
+    context.finish_output(feed_path)
+    written.append(feed_path)
+    return written
@@ -1,23 +1,464 @@
+import io
 import os
 import sys
 import shutil
-from copystatic import copy_files_recursive 
-from markdown_to_html import generate_pages_recursive
+import argparse
+from copystatic import copy_files_recursive
+from markdown_to_html import generate_page, generate_pages_recursive, PARSER_VERSION
+from site_index import SiteIndex, DiskSiteIndex, dest_path_to_url
+from listings import write_listings, iter_listing_pages
+from sitemap import write_sitemap, format_lastmod
+from fingerprint import AssetHashCache, AssetManifest, DiskAssetHashCache
+from minify import HtmlMinifier
+from cssbundle import CssBundleCache, publish_css_bundles
+from precompress import precompress_tree, DEFAULT_LEVEL, DEFAULT_MIN_SIZE
+from parse_cache import ParseCache, DEFAULT_MAX_BYTES
+from depgraph import DependencyGraph, DiskDependencyGraph
+from build_context import BuildContext
+from templates import load_template
+from highlight import highlight_cache, MAX_CACHE_ENTRIES
+from memory import describe_peak_rss, MEGABYTE
+from shards import ShardManifest, parse_shard, shard_of, find_shard_manifests, copy_shard_output, merged_index
+from daemon import DaemonServer, WarmCaches, send_request
+from preview import PreviewRenderer, make_server
+from linkcheck import LinkIndex, DiskLinkIndex, check_links, write_report
+from search_index import SearchIndex, SEARCH_DIR
+from interning import NodeInterner, DEFAULT_MAX_ENTRIES, LOW_MEMORY_MAX_ENTRIES
+from block_cache import BlockCache, DEFAULT_MAX_BLOCKS, LOW_MEMORY_MAX_BLOCKS
 
-def main():
-    static_dir = "./static"
-    public_dir = "./docs"
-    content_dir = "./content"
-    template_path = "./template.html"
+STATIC_DIR = "./static"
+PUBLIC_DIR = "./docs"
+CONTENT_DIR = "./content"
+TEMPLATE_PATH = "./template.html"
+CACHE_DIR = "./.ssg-cache"
+SITE_URL = "https://gizzmonauta.github.io"
+SITE_TITLE = "Tolkien Fan Club"
+SOCKET_PATH = os.path.join(CACHE_DIR, "daemon.sock")
+PREVIEW_PORT = 8888
+
+def parse_args(argv: list[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Build the static site into ./docs")
+    parser.add_argument("basepath", nargs="?", default="/", help="URL prefix the site is served under")
+    parser.add_argument("--fingerprint", action="store_true", help="publish static assets under content-hashed names")
+    parser.add_argument("--bundle-css", action="store_true", help="bundle @imports, minify and fingerprint stylesheets")
+    parser.add_argument("--minify", action="store_true", help="minify rendered pages while they are written")
+    parser.add_argument("--gzip", action="store_true", help="write .gz siblings for text outputs (for gzip_static)")
+    parser.add_argument("--gzip-level", type=int, default=DEFAULT_LEVEL, help="gzip compression level, 0-9")
+    parser.add_argument("--gzip-min-size", type=int, default=DEFAULT_MIN_SIZE, help="do not compress files smaller than this many bytes")
+    parser.add_argument("--no-parse-cache", action="store_true", help="always re-parse markdown sources")
+    parser.add_argument("--parse-cache-size", type=int, default=DEFAULT_MAX_BYTES // (1024 * 1024), help="parse cache size limit in MB")
+    parser.add_argument("--full", action="store_true", help="ignore the previous build and rebuild everything from scratch")
+    parser.add_argument("--explain", action="store_true", help="say why each output is rebuilt")
+    parser.add_argument("--shard", type=parse_shard, metavar="I/N", help="render only shard I of N of the pages; combine shard outputs with 'merge'")
+    parser.add_argument("--low-memory", action="store_true", help="keep the site index, dependency graph and hashes in SQLite and bound in-memory caches, for very large sites")
+    parser.add_argument("--memory-limit", type=int, metavar="MB", help="fail the build once its peak memory use exceeds this many MB")
+    parser.add_argument("--check-links", action="store_true", help="fail the build on broken internal links and anchors; writes a JSON report")
+    parser.add_argument("--link-workers", type=int, metavar="N", help="worker processes for --check-links (default: one per CPU)")
+    parser.add_argument("--search", action="store_true", help=f"publish a full-text search index under {SEARCH_DIR}/")
+    parser.add_argument("--intern", action="store_true", help="share repeated subtrees between pages and serialize each once")
+    parser.add_argument("--block-cache", action="store_true", help="cache rendered blocks, so an edited page only renders its changed blocks again")
+    args = parser.parse_args(argv)
+    if args.check_links and args.shard:
+        parser.error("--check-links needs the whole site; run it on a build that is not sharded")
+    if args.search and args.shard:
+        parser.error("--search needs the whole site; run it on a build that is not sharded")
+    return args
+
+def open_parse_cache(max_megabytes: int = DEFAULT_MAX_BYTES // (1024 * 1024), warm: WarmCaches | None = None) -> ParseCache:
+    cache_dir = os.path.join(CACHE_DIR, "parse")
+    if warm is not None:
+        return warm.parse_cache(cache_dir, PARSER_VERSION, max_megabytes * 1024 * 1024)
+    return ParseCache(cache_dir, PARSER_VERSION, max_megabytes * 1024 * 1024)
+
+def sitemap_entries(plan: list[tuple[str, str]], site_index: SiteIndex, public_dir: str):
+    for from_path, dest_path in plan:
+        yield dest_path_to_url(dest_path, public_dir), format_lastmod(os.path.getmtime(from_path))
+    for _, url, _, _ in iter_listing_pages(site_index):
+        yield url, None
+
+def cache_stats(argv: list[str]) -> None:
+    stats = open_parse_cache().stats()
+    print(f"Parse cache: {os.path.join(CACHE_DIR, 'parse')}")
+    print(f"  entries:  {stats['entries']}")
+    print(f"  size:     {stats['size'] / 1024:.1f} KB of {stats['max_size'] / (1024 * 1024):.0f} MB")
+    print(f"  hits:     {stats['hits']}")
+    print(f"  misses:   {stats['misses']}")
+    print(f"  hit rate: {stats['hit_rate']:.1%}")
+
+def build(args: argparse.Namespace, warm: WarmCaches | None = None) -> None:
+    """
+    Build the site. The daemon passes the caches it keeps warm between
+    builds; low-memory builds never use them.
+    """
+    static_dir = STATIC_DIR
+    public_dir = PUBLIC_DIR
+    content_dir = CONTENT_DIR
+    template_path = TEMPLATE_PATH
+    cache_dir = CACHE_DIR
+    site_url = SITE_URL
+    site_title = SITE_TITLE
+    basepath = args.basepath
+
+    # a shard keeps its own build state, so it never mistakes the pages of
+    # other shards for stale outputs
+    state_suffix = f"-shard-{args.shard[0]}-of-{args.shard[1]}" if args.shard else ""
+    # a low-memory build keeps the same state in SQLite files instead of JSON
+    # ones; each kind of build removes the other's, so neither can go stale
+    state_files = {name: os.path.join(cache_dir, name) for name in ("asset_hashes", f"depgraph{state_suffix}", f"site_index{state_suffix}")}
+    extension, other_extension = (".db", ".json") if args.low_memory else (".json", ".db")
+    other_state_files = [path + other_extension for path in state_files.values()]
+    hash_path, graph_path, index_path = [path + extension for path in state_files.values()]
+    # link records are only kept up to date by builds that check links, so
+    # any other build drops them
+    links_path = os.path.join(cache_dir, "links")
+    if args.check_links:
+        other_state_files.append(links_path + other_extension)
+    else:
+        other_state_files += [links_path + ".json", links_path + ".db"]
+    if args.low_memory:
+        hash_cache = DiskAssetHashCache(hash_path)
+        graph = DiskDependencyGraph(graph_path)
+    else:
+        hash_cache = warm.hash_cache(hash_path) if warm is not None else AssetHashCache(hash_path)
+        graph = DependencyGraph(graph_path)
+    if args.full:
+        graph.previous = {}
+    incremental = bool(graph.previous) and os.path.isdir(public_dir)
+
+    manifest = None
+    if args.fingerprint or args.bundle_css:
+        manifest = AssetManifest(static_dir, hash_cache)
 
     print(f"Copying files from {static_dir} to {public_dir}...")
-    copy_files_recursive(static_dir, public_dir)
+    exclude_extensions = (".css",) if args.bundle_css else ()
+    # static outputs are recorded in the dependency graph (with no inputs:
+    # they are copied on every build) so that incremental builds remove the
+    # ones that are no longer published
+    static_outputs: list[str] = []
+    copy_files_recursive(static_dir, public_dir, manifest=manifest if args.fingerprint else None, exclude_extensions=exclude_extensions, clean_dest=not incremental, copied=static_outputs)
+    if args.bundle_css:
+        bundle_cache = CssBundleCache(os.path.join(cache_dir, "css"), hash_cache)
+        bundles = publish_css_bundles(static_dir, public_dir, manifest, bundle_cache)
+        static_outputs += bundles
+        print(f"Published {len(bundles)} CSS bundles ({bundle_cache.hits} from cache)")
+    manifest_path = os.path.join(public_dir, "asset-manifest.json")
+    if manifest is not None:
+        manifest.save(manifest_path)
+        static_outputs.append(manifest_path)
+        print(f"Fingerprinted {len(manifest.urls)} assets ({hash_cache.hits} hashes reused)")
+    elif os.path.exists(manifest_path):
+        # render and merge would otherwise load a manifest that no longer
+        # matches the published assets
+        os.remove(manifest_path)
+    for output in static_outputs:
+        graph.record(output, {})
+
+    if args.low_memory:
+        site_index = DiskSiteIndex(os.path.join(public_dir, ""), index_path + ".new")
+        previous_index = DiskSiteIndex.load(index_path)
+        highlight_cache.max_entries = MAX_CACHE_ENTRIES
+    else:
+        site_index = SiteIndex(os.path.join(public_dir, ""))
+        previous_index = SiteIndex.load(index_path)
+        highlight_cache.max_entries = None
+    context = BuildContext(
+        site_index=site_index,
+        manifest=manifest,
+        static_dir=static_dir,
+        minifier=HtmlMinifier() if args.minify else None,
+        parse_cache=None if args.no_parse_cache else open_parse_cache(args.parse_cache_size, None if args.low_memory else warm),
+        graph=graph,
+        hash_cache=hash_cache,
+        previous_index=previous_index,
+        explain=args.explain,
+    )
+    if args.memory_limit is not None:
+        context.memory_limit = args.memory_limit * MEGABYTE
+    if args.intern:
+        max_entries = LOW_MEMORY_MAX_ENTRIES if args.low_memory else DEFAULT_MAX_ENTRIES
+        context.interner = warm.interner(max_entries) if warm is not None and not args.low_memory else NodeInterner(max_entries)
+    if args.block_cache:
+        block_cache_path = os.path.join(cache_dir, "blocks.marshal")
+        max_blocks = LOW_MEMORY_MAX_BLOCKS if args.low_memory else DEFAULT_MAX_BLOCKS
+        if warm is not None and not args.low_memory:
+            context.block_cache = warm.block_cache(block_cache_path, PARSER_VERSION, max_blocks)
+        else:
+            context.block_cache = BlockCache(block_cache_path, PARSER_VERSION, max_blocks)
+    search_path = os.path.join(cache_dir, "search.db")
+    if args.search:
+        context.search = SearchIndex(os.path.join(public_dir, ""), search_path, basepath)
+    elif os.path.exists(search_path):
+        # like link records, the index is only kept current by builds that
+        # maintain it; the published one would go stale
+        os.remove(search_path)
+        shutil.rmtree(os.path.join(public_dir, SEARCH_DIR), ignore_errors=True)
+    if args.check_links:
+        if args.low_memory:
+            context.links = DiskLinkIndex(os.path.join(public_dir, ""), links_path + extension)
+        else:
+            context.links = LinkIndex(os.path.join(public_dir, ""), links_path + extension)
+    context.template_path = template_path
+    context.config = {
+        "basepath": basepath,
+        "minify": str(args.minify),
+        "renderer": str(PARSER_VERSION),
+        "site_url": site_url,
+        "feed_title": site_title,
+    }
+    if args.shard:
+        shard_index, shard_count = args.shard
+        context.page_filter = lambda from_path: shard_of(from_path, content_dir, shard_count) == shard_index
+    highlight_path = os.path.join(cache_dir, "highlight.json")
+    highlight_cache.load(highlight_path)
+    plan = generate_pages_recursive(os.path.join(content_dir, ""), template_path, os.path.join(public_dir, ""), basepath, context)
+    highlight_cache.save(highlight_path)
+    if highlight_cache.hits or highlight_cache.misses:
+        print(f"Highlighted {highlight_cache.hits + highlight_cache.misses} code blocks ({highlight_cache.hits} from cache)")
+    parse_cache = context.parse_cache
+    if parse_cache is not None:
+        print(f"Parse cache: {parse_cache.hits} hits, {parse_cache.misses} misses, {parse_cache.evictions} evictions")
+        parse_cache.save_stats()
+    if context.interner is not None:
+        print(context.interner.describe())
+    if context.block_cache is not None:
+        context.block_cache.save()
+        print(context.block_cache.describe())
+    minifier = context.minifier
+    if minifier is not None:
+        print(f"Minified {minifier.pages} pages, saved {minifier.total_saved} bytes")
+
+    if args.shard:
+        save_index(context, index_path)
+        finish_incremental_build(context, other_state_files)
+        shard_manifest = ShardManifest(shard_index, shard_count, {**context.config, "fingerprint": str(args.fingerprint), "bundle_css": str(args.bundle_css)})
+        for from_path, dest_path in plan:
+            rel_output = os.path.relpath(dest_path, public_dir).replace(os.sep, "/")
+            shard_manifest.add_page(site_index.entries[from_path], rel_output, format_lastmod(os.path.getmtime(from_path)))
+        print(f"Wrote shard manifest {shard_manifest.save(public_dir)} ({len(plan)} pages); run 'merge' once every shard is built")
+        print(describe_peak_rss(context.memory_limit))
+        return
+
+    written = write_listings(site_index, context.previous_index, load_template(template_path), public_dir, basepath, site_url, site_title, context=context)
+    print(f"Wrote {len(written)} listing and feed files")
+    if context.search is not None:
+        shards_written, shards = context.search.write()
+        context.search.close()
+        print(f"Search index: {context.search.indexed} pages indexed, {shards_written} of {shards} shards written")
+    save_index(context, index_path)
+    finish_incremental_build(context, other_state_files)
+
+    sitemap_files = write_sitemap(sitemap_entries(plan, site_index, public_dir), public_dir, site_url, basepath)
+    print(f"Wrote sitemap: {', '.join(sitemap_files)}")
+
+    if args.gzip:
+        precompress(public_dir, args.gzip_level, args.gzip_min_size)
+    broken = 0
+    if context.links is not None:
+        asset_urls = context.manifest.urls if context.manifest is not None else None
+        broken = report_broken_links(context.links, basepath, args.link_workers, asset_urls)
+    print(describe_peak_rss(context.memory_limit))
+    if broken:
+        sys.exit(f"Build failed: {broken} broken internal links")
+
+def report_broken_links(links: LinkIndex, basepath: str, workers: int | None, asset_urls: dict[str, str] | None = None) -> int:
+    report = check_links(links, basepath, workers, asset_urls)
+    links.close()
+    report_path = os.path.join(CACHE_DIR, "link-report.json")
+    write_report(report, report_path)
+    for failure in report["broken"]:
+        print(f"{failure['source']}:{failure['line']}: broken {failure['attribute']} {failure['url']} ({failure['reason']})")
+    print(f"Checked {report['links']} links on {report['pages']} pages: {len(report['broken'])} broken (report: {report_path})")
+    return len(report["broken"])
+
+def save_index(context: BuildContext, index_path: str) -> None:
+    if isinstance(context.previous_index, DiskSiteIndex):
+        context.previous_index.close()
+    context.site_index.save(index_path)
 
-    basepath = "/"
-    if len(sys.argv) > 1:
-        basepath = sys.argv[1]
+def finish_incremental_build(context: BuildContext, other_state_files: list[str] | None = None) -> None:
+    for removed in context.graph.remove_stale_outputs():
+        print(f"Removed stale output: {removed}")
+    print(f"Rebuilt {context.rebuilt} outputs, {context.skipped} up to date")
+    context.graph.save()
+    context.hash_cache.save()
+    if context.links is not None:
+        context.links.save()
+    for path in other_state_files or ():
+        if os.path.exists(path):
+            os.remove(path)
 
-    generate_pages_recursive(os.path.join(content_dir, ""), template_path, os.path.join(public_dir, ""), basepath)
+def precompress(public_dir: str, level: int, min_size: int) -> None:
+    stats = precompress_tree(public_dir, level, min_size, os.path.join(CACHE_DIR, "gzip_state.json"))
+    print(f"Precompressed {stats.compressed} files ({stats.bytes_in} -> {stats.bytes_out} bytes), {stats.unchanged} unchanged, {stats.too_small} below size threshold")
+
+def merge(argv: list[str]) -> None:
+    """
+    Combine the output directories of a sharded build into PUBLIC_DIR and
+    write the outputs that need every page: listings, feed and sitemap.
+    """
+    parser = argparse.ArgumentParser(prog="main.py merge", description=f"Merge sharded build outputs into {PUBLIC_DIR}")
+    parser.add_argument("shard_dirs", nargs="+", help="output directory of each shard")
+    parser.add_argument("--gzip", action="store_true", help="write .gz siblings for text outputs (for gzip_static)")
+    parser.add_argument("--gzip-level", type=int, default=DEFAULT_LEVEL, help="gzip compression level, 0-9")
+    parser.add_argument("--gzip-min-size", type=int, default=DEFAULT_MIN_SIZE, help="do not compress files smaller than this many bytes")
+    args = parser.parse_args(argv)
+    public_dir = PUBLIC_DIR
+
+    try:
+        shards = find_shard_manifests(args.shard_dirs)
+    except (OSError, ValueError) as error:
+        parser.error(str(error))
+    manifests = [manifest for _, manifest in shards]
+    basepath = manifests[0].config.get("basepath", "/")
+    if os.path.abspath(public_dir) not in [os.path.abspath(shard_dir) for shard_dir in args.shard_dirs]:
+        shutil.rmtree(public_dir, ignore_errors=True)
+    for shard_dir, manifest in shards:
+        copy_shard_output(shard_dir, public_dir)
+        print(f"Merged shard {manifest.index}/{manifest.count} from {shard_dir} ({len(manifest.pages)} pages)")
+    for name in os.listdir(public_dir):
+        if name.startswith(".shard-"):
+            os.remove(os.path.join(public_dir, name))
+
+    site_index = merged_index(manifests, os.path.join(public_dir, ""))
+    context = BuildContext(manifest=AssetManifest.load(os.path.join(public_dir, "asset-manifest.json"), STATIC_DIR))
+    written = write_listings(site_index, None, load_template(TEMPLATE_PATH), public_dir, basepath, SITE_URL, SITE_TITLE, context=context)
+    print(f"Wrote {len(written)} listing and feed files")
+
+    def merged_sitemap_entries():
+        pages = [page for manifest in manifests for page in manifest.pages]
+        # the order a single build's plan would have listed them in
+        pages.sort(key=lambda page: page["entry"]["source"].split(os.sep))
+        for page in pages:
+            yield page["entry"]["url"], page["lastmod"]
+        for _, url, _, _ in iter_listing_pages(site_index):
+            yield url, None
+
+    sitemap_files = write_sitemap(merged_sitemap_entries(), public_dir, SITE_URL, basepath)
+    print(f"Wrote sitemap: {', '.join(sitemap_files)}")
+    if args.gzip:
+        precompress(public_dir, args.gzip_level, args.gzip_min_size)
+
+def render(request: dict, warm: WarmCaches) -> dict:
+    """
+    Render one content page to a string, the way the last build would have
+    (same asset manifest), without touching the output tree.
+    """
+    from_path = request.get("path", "")
+    rel_path = os.path.relpath(from_path, CONTENT_DIR)
+    if not from_path.endswith(".md") or rel_path.startswith(os.pardir) or not os.path.isfile(from_path):
+        raise ValueError(f"Not a markdown source under {CONTENT_DIR}: '{from_path}'")
+    dest_path = os.path.join(PUBLIC_DIR, rel_path[:-3] + ".html")
+    context = BuildContext(
+        manifest=AssetManifest.load(os.path.join(PUBLIC_DIR, "asset-manifest.json"), STATIC_DIR),
+        static_dir=STATIC_DIR,
+        minifier=HtmlMinifier() if request.get("minify") else None,
+        parse_cache=open_parse_cache(warm=warm),
+        hash_cache=warm.hash_cache(os.path.join(CACHE_DIR, "asset_hashes.json")),
+    )
+    context.content_dir = os.path.join(CONTENT_DIR, "")
+    page = io.StringIO()
+    generate_page(from_path, TEMPLATE_PATH, dest_path, request.get("basepath", "/"), context, out=page)
+    return {"html": page.getvalue()}
+
+def daemon(argv: list[str]) -> None:
+    """
+    Serve build and render requests on a Unix socket from one long-lived
+    process, so repeated builds skip interpreter startup and start with
+    warm caches. Send requests with 'client'.
+    """
+    parser = argparse.ArgumentParser(prog="main.py daemon", description="Keep a warm build process listening on a Unix socket")
+    parser.add_argument("--socket", default=SOCKET_PATH, help="path of the socket to listen on")
+    args = parser.parse_args(argv)
+    warm = WarmCaches()
+
+    def build_request(request: dict) -> dict:
+        build(parse_args(request.get("args", [])), warm)
+        return {}
+
+    handlers = {
+        "build": build_request,
+        "render": lambda request: render(request, warm),
+    }
+    try:
+        server = DaemonServer(args.socket, handlers)
+    except (OSError, ValueError) as error:
+        sys.exit(f"Cannot start daemon: {error}")
+    print(f"Daemon listening on {args.socket} (pid {os.getpid()})")
+    try:
+        server.serve_until_stopped()
+    except KeyboardInterrupt:
+        pass
+    print("Daemon stopped")
+
+def client(argv: list[str]) -> None:
+    """
+    Send one request to a running daemon and print what it answers:
+    'build [build options]', 'render content/page.md' or 'stop'.
+    """
+    parser = argparse.ArgumentParser(prog="main.py client", description="Send a request to a running build daemon")
+    parser.add_argument("--socket", default=SOCKET_PATH, help="path of the daemon's socket")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    subparsers.add_parser("build", help="run a build; any further arguments are build options", add_help=False)
+    render_parser = subparsers.add_parser("render", help="print the HTML of one page")
+    render_parser.add_argument("path", help="markdown source under ./content")
+    render_parser.add_argument("--basepath", default="/")
+    render_parser.add_argument("--minify", action="store_true")
+    subparsers.add_parser("stop", help="stop the daemon")
+    args, build_args = parser.parse_known_args(argv)
+    request = vars(args)
+    if request["command"] == "build":
+        request["args"] = build_args
+    elif build_args:
+        parser.error(f"unrecognized arguments: {' '.join(build_args)}")
+    socket_path = request.pop("socket")
+    try:
+        response = send_request(socket_path, request)
+    except (OSError, ValueError) as error:
+        sys.exit(f"No daemon answering on {socket_path} ({error}); start one with 'main.py daemon'")
+    if request["command"] == "render":
+        # progress lines would corrupt the page on stdout
+        sys.stderr.write(response.get("output", ""))
+        sys.stdout.write(response.get("html", ""))
+    else:
+        sys.stdout.write(response.get("output", ""))
+    if not response.get("ok"):
+        sys.exit(response.get("error") or "Request failed")
+
+def serve(argv: list[str]) -> None:
+    """
+    Preview the site without building it: pages are rendered from
+    CONTENT_DIR when they are requested, static files are served from
+    STATIC_DIR as they are.
+    """
+    parser = argparse.ArgumentParser(prog="main.py serve", description="Serve a live preview of the site, rendering pages on request")
+    parser.add_argument("--bind", default="127.0.0.1", help="address to listen on")
+    parser.add_argument("--port", type=int, default=PREVIEW_PORT, help="port to listen on")
+    args = parser.parse_args(argv)
+    renderer = PreviewRenderer(os.path.join(CONTENT_DIR, ""), TEMPLATE_PATH, STATIC_DIR)
+    with make_server(renderer, (args.bind, args.port)) as server:
+        host, port = server.server_address[:2]
+        print(f"Previewing {CONTENT_DIR} at http://{host}:{port}/ (Ctrl-C to stop)")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+
+COMMANDS = {
+    "cache-stats": cache_stats,
+    "client": client,
+    "daemon": daemon,
+    "merge": merge,
+    "serve": serve,
+}
+
+def main():
+    if len(sys.argv) > 1 and sys.argv[1] in COMMANDS:
+        COMMANDS[sys.argv[1]](sys.argv[2:])
+        return
+    try:
+        build(parse_args(sys.argv[1:]))
+    except MemoryError as error:
+        sys.exit(f"Build failed: {error}")
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,107 @@
+import mmap
+from collections.abc import Iterator
+from site_index import FRONT_MATTER_DELIMITER, parse_front_matter
+
+# sources larger than this are memory-mapped and rendered block by block
+# instead of being read into a string
+MMAP_THRESHOLD = 1 << 20
+ENCODING = "utf-8"
+
+
+class MappedSource():
+    """
+    A markdown source file read through mmap. Lines are found by offset in
+    the mapped buffer and decoded one at a time as they are consumed, so
+    the document never exists as one string, a list of lines, or a list of
+    blocks; only the block being rendered is ever decoded.
+
+    Line ends are "\\n" or "\\r\\n", as text-mode reading would give.
+    """
+    def __init__(self, path: str) -> None:
+        self.path = path
+        with open(path, "rb") as file_object:
+            # the mapping stays valid after the file is closed
+            self.buffer = mmap.mmap(file_object.fileno(), 0, access=mmap.ACCESS_READ)
+        self.metadata, self.body_start = self._front_matter()
+        # number of the source line the body starts on, counted from 1
+        self.body_line = self.buffer[:self.body_start].count(b"\n") + 1
+
+    def __enter__(self) -> "MappedSource":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self.buffer.close()
+
+    def line_spans(self, start: int = 0) -> Iterator[tuple[int, int]]:
+        """
+        (start, end) offsets of every line from start on, without the line
+        terminator.
+        """
+        buffer = self.buffer
+        size = len(buffer)
+        while start < size:
+            newline = buffer.find(b"\n", start)
+            end = size if newline == -1 else newline
+            if end > start and buffer[end - 1] == 13:  # "\r"
+                yield start, end - 1
+            else:
+                yield start, end
+            start = end + 1
+        if size and buffer[size - 1] == 10:  # a final "\n" ends an empty last line
+            yield size, size
+
+    def decode(self, start: int, end: int) -> str:
+        return self.buffer[start:end].decode(ENCODING)
+
+    def _front_matter(self) -> tuple[dict[str, str], int]:
+        """
+        Metadata of the front matter block and the offset the body starts
+        at. Only the front matter itself is decoded, to be parsed by
+        parse_front_matter.
+        """
+        buffer = self.buffer
+        start = 0
+        while start < len(buffer) and buffer[start:start + 1].isspace():
+            start += 1
+        spans = self.line_spans(start)
+        first = next(spans, None)
+        if first is None or self.decode(*first) != FRONT_MATTER_DELIMITER:
+            return {}, 0
+        for line_start, line_end in spans:
+            if self.decode(line_start, line_end).strip() == FRONT_MATTER_DELIMITER:
+                front_matter = self.decode(start, line_end).replace("\r\n", "\n")
+                metadata, _ = parse_front_matter(front_matter + "\n")
+                newline = buffer.find(b"\n", line_end)
+                return metadata, len(buffer) if newline == -1 else newline + 1
+        raise ValueError("Unterminated front matter block")
+
+    def lines(self) -> Iterator[str]:
+        """
+        Decoded lines of the body with their common indentation removed,
+        like markdown_blocks.dedent_lines. The indentation is measured in a
+        first pass over the raw bytes.
+        """
+        indent: int | None = None
+        for start, end in self.line_spans(self.body_start):
+            line = self.buffer[start:end]
+            stripped = line.lstrip(b" ")
+            if stripped.strip() and (indent is None or len(line) - len(stripped) < indent):
+                indent = len(line) - len(stripped)
+                if indent == 0:
+                    break
+        indent = indent or 0
+        for start, end in self.line_spans(self.body_start):
+            yield self.decode(min(start + indent, end), end)
+
+    def title(self) -> str:
+        """
+        The first level 1 heading of the body, like extract_title.
+        """
+        for start, end in self.line_spans(self.body_start):
+            line = self.decode(start, end).strip()
+            if line.startswith("# "):
+                return line[2:].strip()
+        raise ValueError("No level 1 heading found in the markdown.")
@@ -1,24 +1,214 @@
 import re
-from blocknode import BlockType
+from collections.abc import Iterable, Iterator
+from blocknode import Block, BlockType
 
-def markdown_to_blocks(markdown: str) -> list[BlockType]:
+HEADING_RE = re.compile(r"#{1,6}[ \t]+\S")
+LIST_MARKER_RE = re.compile(r"(?:([-*])|(\d{1,9})\.)([ \t]+)")
+LIST_TYPES = (BlockType.UNORDERED_LIST, BlockType.ORDERED_LIST)
+# first characters of lines that can open a block other than a paragraph;
+# any other line is paragraph text without trying the block patterns
+BLOCK_START_CHARS = frozenset(">`#-*0123456789")
+
+
+def dedent_lines(lines: list[str]) -> list[str]:
+    """
+    Remove the indentation common to every non-blank line, so a document
+    written inside an indented string reads the same as one that is not.
+    """
+    indent: int | None = None
+    for line in lines:
+        stripped = line.lstrip(" ")
+        if stripped.strip() and (indent is None or len(line) - len(stripped) < indent):
+            indent = len(line) - len(stripped)
+    if not indent:
+        return lines
+    return [line[indent:] for line in lines]
+
+
+def _count_spaces(line: str, pos: int, limit: int) -> int:
+    count = 0
+    while count < limit and pos + count < len(line) and line[pos + count] == " ":
+        count += 1
+    return count
+
+
+def _closes_fence(line: str, pos: int, end: int, fence_length: int) -> bool:
+    pos += _count_spaces(line, pos, 3)
+    count = 0
+    while pos + count < end and line[pos + count] == "`":
+        count += 1
+    return count >= fence_length and pos + count == end
+
+
+def _text_start(line: str, pos: int, end: int) -> int:
+    if line[pos] != " ":
+        return pos
+    return end - len(line[pos:end].lstrip(" "))
+
+
+def _starts_block(line: str, pos: int) -> bool:
+    """
+    Whether the text at pos opens a block other than a paragraph, which
+    means it cannot be a lazy paragraph continuation.
+    """
+    if line[pos] not in BLOCK_START_CHARS:
+        return False
+    return (
+        line.startswith((">", "```"), pos)
+        or HEADING_RE.match(line, pos) is not None
+        or LIST_MARKER_RE.match(line, pos) is not None
+    )
+
+
+def parse_blocks(markdown: str) -> list[Block]:
     """
-    Convert a markdown string into a list of blocks.
-    Currently, only inline markdown is supported, so the entire markdown string
-    is converted into a single paragraph block containing TextNodes.
+    Build the block tree of a markdown document in a single pass over its
+    lines (see iter_blocks).
     """
     if not isinstance(markdown, str):
         raise TypeError("Input must be a string")
-    
-    new_blocks: list[BlockType] = []
-    lines = markdown.split("\n\n")
-    for line in lines:
-        line = line.strip()
-        if not line:
+    return list(iter_blocks(dedent_lines(markdown.split("\n"))))
+
+
+def iter_blocks(lines: Iterable[str]) -> Iterator[Block]:
+    """
+    Yield the top-level blocks of a document given as (already dedented)
+    lines, each one as soon as the next top-level block starts. Lines are
+    consumed one at a time, so a document streamed in from a large file is
+    never held in full.
+
+    The scanner keeps a stack of open containers (block quotes, lists and
+    list items) and at most one open leaf (a paragraph or fenced code
+    block). Each line first continues as many open containers as it can:
+    a quote needs its ">" marker, a list item needs the indentation of its
+    content (blank lines are kept inside the item). Whatever is left of the
+    line then either continues the open leaf or opens new blocks. A
+    paragraph line that matches none of the containers, like the second
+    line of "> a\nb", is a lazy continuation of that paragraph.
+
+    Every line is examined once, from left to right, so parsing is linear
+    in the size of the document.
+    """
+    root = Block(None)
+    stack: list[Block] = [root]
+    leaf: Block | None = None
+
+    def add(block: Block, number: int) -> None:
+        # a list only holds items; anything else placed after one ends it
+        if stack[-1].block_type in LIST_TYPES and block.block_type != BlockType.LIST_ITEM:
+            stack.pop()
+        block.start = number
+        stack[-1].children.append(block)
+
+    for number, line in enumerate(lines):
+        # a line only ever extends the last top-level block, so the ones
+        # before it are complete
+        if len(root.children) > 1:
+            yield from root.children[:-1]
+            del root.children[:-1]
+        end = len(line.rstrip())
+        pos = 0
+        matched = 1
+        while matched < len(stack):
+            container = stack[matched]
+            if container.block_type == BlockType.QUOTE:
+                indent = _count_spaces(line, pos, 4)
+                if indent > 3 or not line.startswith(">", pos + indent):
+                    break
+                pos += indent + 1
+                if line.startswith(" ", pos):
+                    pos += 1
+            elif container.block_type == BlockType.LIST_ITEM and pos < end:
+                if _count_spaces(line, pos, container.indent) < container.indent:
+                    break
+                pos += container.indent
+            matched += 1
+
+        if leaf is not None and leaf.block_type == BlockType.CODE:
+            if matched == len(stack):
+                if _closes_fence(line, pos, end, leaf.fence_length):
+                    leaf = None
+                else:
+                    leaf.lines.append(line[pos:])
+                continue
+        elif leaf is not None and matched < len(stack) and pos < end and not _starts_block(line, _text_start(line, pos, end)):
+            leaf.lines.append(line[pos:end].strip())
             continue
-        new_blocks.append(line)
 
-    return new_blocks
+        if matched < len(stack):
+            leaf = None
+            del stack[matched:]
+
+        while True:
+            if pos >= end:
+                if leaf is not None:  # a blank line ends a paragraph
+                    leaf = None
+                break
+            text_pos = _text_start(line, pos, end)
+            if line[text_pos] in BLOCK_START_CHARS:
+                if line.startswith(">", text_pos):
+                    leaf = None
+                    quote = Block(BlockType.QUOTE)
+                    add(quote, number)
+                    stack.append(quote)
+                    pos = text_pos + 1
+                    if line.startswith(" ", pos):
+                        pos += 1
+                    continue
+                marker = LIST_MARKER_RE.match(line, text_pos)
+                # inside a paragraph only "1." starts an ordered list, so a line
+                # like "2024. was a year" stays part of the text
+                if marker is not None and (leaf is None or marker.group(2) in (None, "1")):
+                    leaf = None
+                    list_type = BlockType.UNORDERED_LIST if marker.group(1) else BlockType.ORDERED_LIST
+                    if stack[-1].block_type in LIST_TYPES and stack[-1].block_type != list_type:
+                        stack.pop()
+                    if stack[-1].block_type != list_type:
+                        list_block = Block(list_type)
+                        add(list_block, number)
+                        stack.append(list_block)
+                    spaces = len(marker.group(3))
+                    if spaces > 4:  # content indented like code: the marker takes one space
+                        spaces = 1
+                    # continuation lines must be indented to the item's content
+                    item = Block(BlockType.LIST_ITEM)
+                    item.indent = marker.start(3) - pos + spaces
+                    add(item, number)
+                    stack.append(item)
+                    pos += item.indent
+                    continue
+                if HEADING_RE.match(line, text_pos):
+                    leaf = None
+                    add(Block(BlockType.HEADING, [line[text_pos:end]]), number)
+                    break
+                if line.startswith("```", text_pos):
+                    fence_end = text_pos
+                    while fence_end < end and line[fence_end] == "`":
+                        fence_end += 1
+                    leaf = Block(BlockType.CODE, info=line[fence_end:end].strip())
+                    leaf.fence_length = fence_end - text_pos
+                    add(leaf, number)
+                    break
+            if leaf is None:
+                leaf = Block(BlockType.PARAGRAPH)
+                add(leaf, number)
+            leaf.lines.append(line[text_pos:end])
+            break
+
+    yield from root.children
+
+
+def markdown_to_blocks(markdown: str) -> list[str]:
+    """
+    Split a markdown string into the source text of its top-level blocks.
+    """
+    blocks = parse_blocks(markdown)
+    lines = dedent_lines(markdown.split("\n"))
+    texts: list[str] = []
+    for index, block in enumerate(blocks):
+        end = blocks[index + 1].start if index + 1 < len(blocks) else len(lines)
+        texts.append("\n".join(lines[block.start:end]).strip())
+    return texts
 
 def block_to_block_type(block: str) -> BlockType:
     """
@@ -1,42 +1,104 @@
 import os
-from markdown_blocks import markdown_to_blocks, block_to_block_type
-from blocknode import BlockType
-from textnode import TextNode
+import functools
+from typing import TextIO
+from collections import Counter
+from collections.abc import Callable, Iterable, Iterator
+from markdown_blocks import parse_blocks, iter_blocks, dedent_lines
+from blocknode import Block, BlockType
+from textnode import TextNode, TextType
 from inline_markdown import text_to_textnodes
-from htmlnode import HTMLNode, LeafNode, ParentNode, text_node_to_html_node
+from htmlnode import HTMLNode, LeafNode, ParentNode, text_node_to_html_node, escape_html
+from site_index import parse_front_matter
+from fingerprint import AssetManifest, LOCAL_REFERENCE_RE
+from image_dimensions import annotate_images, annotate_image_props
+from build_context import BuildContext
+from templates import CompiledTemplate, compile_template, load_template, select_layout
+from highlight import code_block_html
+from mapped_source import MappedSource
+from linkcheck import PageLinks, block_lines
+from search_index import node_terms
+from headings import HeadingIds, heading_entries, toc_html
+from html_emitter import HTMLEmitter, CONTAINER_TAGS
+
+SUMMARY_LENGTH = 200
+# bump whenever markdown_to_html_node output changes, to invalidate parse caches
+PARSER_VERSION = 6
 
 
 def markdown_to_html_node(markdown: str) -> HTMLNode:
     """
-    Convert a markdown string to an HTML node representation.
+    Convert a markdown string to an HTML node representation. Top-level
+    headings get ids unique within the document.
     """
-    blocks: list[str] = markdown_to_blocks(markdown)
+    heading_ids = HeadingIds()
     children: list[HTMLNode] = []
-    for block in blocks:
-        block_type: BlockType = block_to_block_type(block)
-        node: HTMLNode = block_to_html_node(block, block_type)
+    for block in parse_blocks(markdown):
+        node = block_node_to_html_node(block)
+        if block.block_type == BlockType.HEADING:
+            heading_ids.assign(node)
         children.append(node)
     return ParentNode("div", children)
 
-def block_to_html_node(block: str, block_type: BlockType) -> HTMLNode:
-    """
-    Convert a markdown block to an HTML node based on its BlockType.
-    """
-    if block_type == BlockType.PARAGRAPH:
-        return paragraph_to_html_node(block)
-    elif block_type == BlockType.CODE:
-        return code_to_html_node(block)
-    elif block_type == BlockType.HEADING:
-        return heading_to_html_node(block)
-    elif block_type == BlockType.QUOTE:
-        return quote_to_html_node(block)
-    elif block_type == BlockType.UNORDERED_LIST:
-        return unordered_list_to_html_node(block)
-    elif block_type == BlockType.ORDERED_LIST:
-        return ordered_list_to_html_node(block)
-    else:
-        raise ValueError(f"Unsupported BlockType: {block_type}")
+def iter_blocks_html(blocks: Iterable[Block], visit: Callable[[Block, HTMLNode], None] | None = None) -> Iterator[str]:
+    """
+    Streaming counterpart of markdown_to_html_node(...).iter_html() for a
+    stream of top-level blocks: each block is converted and serialized as
+    it arrives, so only one block's text and tree are alive at a time.
+    visit, when given, sees each block and its node before serialization.
+    """
+    heading_ids = HeadingIds()
+    yield "<div>"
+    for block in blocks:
+        node = block_node_to_html_node(block)
+        if block.block_type == BlockType.HEADING:
+            heading_ids.assign(node)
+        if visit is not None:
+            visit(block, node)
+        yield from node.iter_html()
+    yield "</div>"
+
+def block_node_to_html_node(block: Block) -> HTMLNode:
+    """
+    Convert a node of the block tree, and everything inside it, to HTML.
+    Parents are converted before their children, and each block appends
+    its node to its parent's children.
+    """
+    root: list[HTMLNode] = []
+    # (block, list its node is appended to)
+    stack: list[tuple[Block, list[HTMLNode]]] = [(block, root)]
+    while stack:
+        block, siblings = stack.pop()
+        if block.block_type == BlockType.PARAGRAPH:
+            siblings.append(paragraph_to_html_node("\n".join(block.lines)))
+        elif block.block_type == BlockType.HEADING:
+            siblings.append(heading_to_html_node(block.lines[0]))
+        elif block.block_type == BlockType.CODE:
+            siblings.append(code_to_html_node("\n".join([f"```{block.info}"] + block.lines + ["```"])))
+        elif block.block_type in CONTAINER_TAGS:
+            children, child_blocks = container_children(block)
+            siblings.append(ParentNode(CONTAINER_TAGS[block.block_type], children))
+            stack.extend((child, children) for child in reversed(child_blocks))
+        else:
+            raise ValueError(f"Unsupported BlockType: {block.block_type}")
+    return root[0]
 
+def container_children(block: Block) -> tuple[list[HTMLNode], list[Block]]:
+    """
+    Children of a quote, list or list item: the nodes that can be made
+    right away, and the blocks still to convert after them. A single
+    leading paragraph is rendered inline ("<li>text<ul>...</ul></li>"), as
+    in a tight list; when there are several paragraphs each gets its own
+    <p>.
+    """
+    children = block.children
+    if block.block_type in (BlockType.UNORDERED_LIST, BlockType.ORDERED_LIST):
+        return [], children
+    paragraphs = sum(1 for child in children if child.block_type == BlockType.PARAGRAPH)
+    html_children: list[HTMLNode] = []
+    if children and children[0].block_type == BlockType.PARAGRAPH and paragraphs == 1:
+        html_children.extend(text_to_children(" ".join(" ".join(children[0].lines).split())))
+        children = children[1:]
+    return html_children, children
 
 def paragraph_to_html_node(block) -> HTMLNode:
     new_text: str = " ".join(block.split())
@@ -52,74 +114,13 @@ def heading_to_html_node(block) -> HTMLNode:
 
 def code_to_html_node(block) -> HTMLNode:
     code_content: list[str] = block.split("\n")
-    inner_lines: list[str] = code_content[1:-1]  # remove fence lines
-
-    # --- dedent by min indent across non-empty lines ---
-    min_indent: int | None = None
-    for line in inner_lines:
-        if line.strip() == "":
-            continue
-        count = 0
-        for ch in line:
-            if ch == " ":
-                count += 1
-            else:
-                break
-        if min_indent is None or count < min_indent:
-            min_indent = count
-    if min_indent is None:
-        min_indent = 0
-
-    dedented_lines: list[str] = []
-    for line in inner_lines:
-        if line.strip() == "":
-            dedented_lines.append("")
-        else:
-            dedented_lines.append(line[min_indent:])
-
-    inner_content = "\n".join(dedented_lines)
-    if not inner_content.endswith("\n"):
-        inner_content += "\n"
-    # --- end dedent ---
-
-    leaf_node: LeafNode = LeafNode(None, inner_content)
-    code_node: ParentNode = ParentNode("code", [leaf_node])
+    # the fence lines carry the info string, not code
+    language, markup = code_block_html(code_content[1:-1], code_content[0].strip().lstrip("`"))
+    if not language:
+        return ParentNode("pre", [ParentNode("code", [LeafNode(None, markup)])])
+    code_node: ParentNode = ParentNode("code", [LeafNode(None, markup)], {"class": f"language-{language}"})
     return ParentNode("pre", [code_node])
 
-def quote_to_html_node(block) -> HTMLNode:
-    lines = block.split("\n")
-    for i in range(len(lines)):
-        lines[i] = lines[i].lstrip()[1:].lstrip()  # remove leading '> '
-    quote_text = " ".join(lines)
-    normalized_text = " ".join(quote_text.split())
-    html_children: list[HTMLNode] = text_to_children(normalized_text)
-    return ParentNode("blockquote", html_children)
-
-def unordered_list_to_html_node(block) -> HTMLNode:
-    lines = block.split("\n")
-    li_nodes: list[HTMLNode] = []
-    for line in lines:
-        if line.strip() == "":
-            continue
-        item_text: str = line.lstrip()[1:].lstrip()  # remove leading '- ' or '* '
-        item_text = " ".join(item_text.split())  # normalize spaces
-        html_children = text_to_children(item_text)
-        li_nodes.append(ParentNode("li", html_children))
-    return ParentNode("ul", li_nodes)
-
-def ordered_list_to_html_node(block) -> HTMLNode:
-    lines = block.split("\n")
-    li_nodes: list[HTMLNode] = []
-    for line in lines:
-        if line.strip() == "":
-            continue
-        line = line.lstrip()
-        _, item_text = line.split(". ", 1)  # remove "1. " / "2. " etc.
-        item_text = " ".join(item_text.split())
-        html_children = text_to_children(item_text)
-        li_nodes.append(ParentNode("li", html_children))
-    return ParentNode("ol", li_nodes)
-
 def text_to_children(text: str) -> list[HTMLNode]:
     text_nodes: list[TextNode] = text_to_textnodes(text)
     html_children: list[HTMLNode] = []
@@ -135,34 +136,266 @@ def extract_title(markdown: str) -> str:
             return new_line[2:].strip()
     raise ValueError("No level 1 heading found in the markdown.")
 
-def generate_page(from_path: str, template_path: str, dest_path: str, basepath: str) -> None:
-    print(f"Generating page from {from_path} to {dest_path} using {template_path}")
-    with open(from_path, 'r') as file_object:
-        md_content: str = file_object.read()
-    with open(template_path, 'r') as template_file:
-        template_content: str = template_file.read()
-    md_htmlnode: HTMLNode = markdown_to_html_node(md_content)
-    md_html: str = md_htmlnode.to_html()
-    title: str = extract_title(md_content)
-    final_html: str = template_content.replace("{{ Title }}", title)
-    final_html = final_html.replace("{{ Content }}", md_html)
-    final_html = final_html.replace('href="/', f'href="{basepath}')
-    final_html = final_html.replace('src="/', f'src="{basepath}')
-    dest_abs: str = os.path.dirname(dest_path)
-    os.makedirs(dest_abs, exist_ok=True)
-    with open(dest_path, 'w') as file_object:
-        file_object.write(final_html)
-
-def generate_pages_recursive(dir_path_content: str, template_path: str, dest_dir_path: str, basepath: str) -> None:
-    for entry in os.listdir(dir_path_content):
+def extract_summary(markdown: str) -> str:
+    """
+    Plain text of the first paragraph that contains prose, shortened to
+    SUMMARY_LENGTH characters. Paragraphs made only of links or images
+    (like a "Back Home" link) are skipped.
+    """
+    for block in iter_blocks(dedent_lines(markdown.split("\n"))):
+        summary = block_summary(block)
+        if summary is not None:
+            return summary
+    return ""
+
+def block_summary(block: Block) -> str | None:
+    """
+    The summary text of a top-level block, or None if it cannot provide one
+    (see extract_summary).
+    """
+    if block.block_type != BlockType.PARAGRAPH:
+        return None
+    text_nodes: list[TextNode] = text_to_textnodes(" ".join(" ".join(block.lines).split()))
+    if not any(node.text_type == TextType.TEXT and node.text.strip() for node in text_nodes):
+        return None
+    summary = "".join(node.text for node in text_nodes if node.text_type != TextType.IMAGE).strip()
+    if len(summary) > SUMMARY_LENGTH:
+        summary = summary[:SUMMARY_LENGTH].rsplit(" ", 1)[0] + "..."
+    return summary
+
+def rewrite_references(html: str, basepath: str, manifest: AssetManifest | None = None, used_urls: set[str] | None = None) -> str:
+    """
+    Point root-relative href/src attributes at fingerprinted assets and
+    prefix them with the basepath. When used_urls is given, every local
+    URL referenced is added to it.
+    """
+    if '="/' not in html:
+        return html
+    if used_urls is not None:
+        used_urls.update(match.group(2) for match in LOCAL_REFERENCE_RE.finditer(html))
+    if manifest is not None:
+        html = manifest.rewrite_html(html)
+    html = html.replace('href="/', f'href="{basepath}')
+    html = html.replace('src="/', f'src="{basepath}')
+    return html
+
+def apply_template(template: str | CompiledTemplate, title: str, content_html: str, basepath: str, manifest: AssetManifest | None = None, used_urls: set[str] | None = None, toc: str = "") -> str:
+    if isinstance(template, str):
+        template = compile_template(template)
+    final_html: str = template.render_string({"Title": escape_html(title), "Content": content_html, "TOC": toc})
+    return rewrite_references(final_html, basepath, manifest, used_urls)
+
+def page_chunks(template: str | CompiledTemplate, title: str, content_chunks: Iterable[str], basepath: str, manifest: AssetManifest | None = None, used_urls: set[str] | None = None, toc: str = "") -> Iterator[str]:
+    """
+    Streaming counterpart of apply_template: yields the page as chunks,
+    splicing the content stream into the template without joining it first.
+    References are rewritten chunk by chunk; the serializer never splits an
+    attribute across chunks.
+    """
+    if isinstance(template, str):
+        template = compile_template(template)
+    for chunk in template.render({"Title": escape_html(title), "Content": content_chunks, "TOC": toc}):
+        yield rewrite_references(chunk, basepath, manifest, used_urls)
+
+def generate_page(from_path: str, template_path: str, dest_path: str, basepath: str, context: BuildContext | None = None, out: TextIO | None = None) -> None:
+    """
+    Render from_path to dest_path, or to out when it is given (dest_path is
+    then only the page's name in the index and dependency graph).
+    """
+    if context is None:
+        context = BuildContext()
+    context.begin_output()
+    context.depends_on(f"file:{from_path}")
+    context.depends_on_config()
+    # a large source is mapped and rendered block by block as it is written,
+    # instead of being read, parsed and rendered whole (it bypasses the parse
+    # cache, which stores whole trees)
+    mapped: MappedSource | None = None
+    if os.path.getsize(from_path) > context.mmap_threshold:
+        mapped = MappedSource(from_path)
+        metadata = mapped.metadata
+    else:
+        with open(from_path, 'r') as file_object:
+            md_content: str = file_object.read()
+        line_count = md_content.count("\n")
+        metadata, md_content = parse_front_matter(md_content)
+    try:
+        layout_path, missing_layouts = select_layout(from_path, context.content_dir, metadata, template_path)
+        print(f"Generating page from {from_path} to {dest_path} using {layout_path}")
+        template: CompiledTemplate = load_template(layout_path)
+        for template_file in sorted(template.inputs):
+            context.depends_on(f"file:{template_file}")
+        for missing_layout in missing_layouts:
+            context.depends_on(f"file:{os.path.abspath(missing_layout)}")
+        image_files: set[str] = set()
+        summary: str | None = None
+        page_links = PageLinks() if context.links is not None else None
+        page_terms: Counter | None = Counter() if context.search is not None else None
+        wants_toc = template.has_slot("TOC")
+        toc = ""
+        # the link checker and search index read the rendered tree, the
+        # parse cache stores it and the interner shares its subtrees; without
+        # them the page is emitted directly. A block cache takes the place of
+        # the parse cache there: an edited page still reuses its unchanged
+        # blocks, where the whole page would miss the parse cache
+        needs_tree = page_links is not None or page_terms is not None
+        block_cache = context.block_cache
+        if block_cache is not None:
+            block_cache.start_page()
+        image_props: Callable[[dict], None] | None = None
+        if context.static_dir is not None:
+            image_props = functools.partial(annotate_image_props, static_dir=context.static_dir, image_files=image_files)
+        if mapped is not None:
+            title: str = mapped.title()
+            if wants_toc:
+                # the contents come before the body they list, so a streamed
+                # source is scanned for its headings first (they are the
+                # only blocks rendered, and get the same ids as below)
+                heading_scan = HTMLEmitter()
+                for block in iter_blocks(mapped.lines()):
+                    if block.block_type == BlockType.HEADING:
+                        heading_scan.emit_top_block(block, [])
+                toc = toc_html(heading_scan.headings)
+
+            def visit_block(block: Block) -> None:
+                nonlocal summary
+                if summary is None:
+                    summary = block_summary(block)
+
+            def visit(block: Block, node: HTMLNode) -> None:
+                if context.static_dir is not None:
+                    annotate_images(node, context.static_dir, image_files)
+                visit_block(block)
+                if page_links is not None:
+                    page_links.add(node, block_lines(block, mapped.body_line))
+                if page_terms is not None:
+                    node_terms(node, page_terms)
+
+            if needs_tree:
+                content_chunks: Iterable[str] = iter_blocks_html(iter_blocks(mapped.lines()), visit)
+            else:
+                content_chunks = HTMLEmitter(image_props, block_cache).iter_html(iter_blocks(mapped.lines()), visit_block)
+        elif needs_tree or context.interner is not None or (context.parse_cache is not None and block_cache is None):
+            if context.parse_cache is not None:
+                md_htmlnode: HTMLNode = context.parse_cache.get_or_parse(md_content, markdown_to_html_node)
+            else:
+                md_htmlnode = markdown_to_html_node(md_content)
+            if context.static_dir is not None:
+                annotate_images(md_htmlnode, context.static_dir, image_files)
+            if context.interner is not None:
+                # after the images are annotated, as frozen nodes cannot be
+                md_htmlnode = context.interner.intern(md_htmlnode)
+            if page_links is not None:
+                body_line = line_count - md_content.count("\n") + 1
+                page_links.add(md_htmlnode, enumerate(md_content.split("\n"), body_line))
+            if page_terms is not None:
+                node_terms(md_htmlnode, page_terms)
+            title = extract_title(md_content)
+            if context.site_index is not None:
+                summary = extract_summary(md_content)
+            if wants_toc:
+                toc = toc_html(heading_entries(md_htmlnode.children))
+            content_chunks = md_htmlnode.iter_html()
+        else:
+            emitter = HTMLEmitter(image_props, block_cache)
+            content_chunks = emitter.render(md_content)
+            title = extract_title(md_content)
+            if context.site_index is not None:
+                summary = extract_summary(md_content)
+            if wants_toc:
+                toc = toc_html(emitter.headings)
+        minifier = context.minifier
+        if minifier is not None:
+            minifier.start_page()
+            template = minifier.minify_compiled(template)
+            content_chunks = minifier.minify_chunks(content_chunks)
+        used_urls: set[str] | None = set() if context.graph is not None else None
+        chunks = page_chunks(template, title, content_chunks, basepath, context.manifest, used_urls, toc)
+        if out is not None:
+            out.writelines(chunks)
+        else:
+            dest_abs: str = os.path.dirname(dest_path)
+            os.makedirs(dest_abs, exist_ok=True)
+            with open(dest_path, 'w') as file_object:
+                file_object.writelines(chunks)
+    finally:
+        if mapped is not None:
+            mapped.close()
+    if minifier is not None:
+        print(f"Minified {dest_path}: saved {minifier.last_saved} bytes")
+    if block_cache is not None:
+        ratio = block_cache.finish_page(dest_path)
+        if ratio is not None:
+            print(f"Block cache for {dest_path}: {block_cache.last_hits} of {block_cache.last_hits + block_cache.last_misses} blocks reused ({ratio:.0%})")
+    if context.site_index is not None:
+        context.site_index.add_page(from_path, dest_path, metadata, title, summary or "")
+    if page_links is not None:
+        context.links.record(from_path, dest_path, page_links)
+    if page_terms is not None:
+        context.search.record(from_path, dest_path, title, page_terms)
+    for image_file in sorted(image_files):
+        context.depends_on(f"file:{image_file}")
+    for url in sorted(used_urls or ()):
+        context.depends_on(f"asset:{url}")
+    context.finish_output(dest_path)
+
+def plan_pages(dir_path_content: str, dest_dir_path: str) -> Iterator[tuple[str, str]]:
+    """
+    Walk the content directory and yield (markdown source, html destination)
+    pairs in a stable, sorted order. This is the build plan every later stage
+    (rendering, sitemap, listings) consumes.
+    """
+    for entry in sorted(os.listdir(dir_path_content)):
         from_path = os.path.join(dir_path_content, entry)
         dest_path = os.path.join(dest_dir_path, entry)
         if os.path.isfile(from_path):
             if entry.endswith(".md"):
-                dest_path = dest_path[:-3] + ".html"  # change .md to .html
-                generate_page(from_path, template_path, dest_path, basepath)
+                yield from_path, dest_path[:-3] + ".html"  # change .md to .html
         elif os.path.isdir(from_path):
-            generate_pages_recursive(from_path, template_path, dest_path, basepath) 
+            yield from plan_pages(from_path, dest_path)
+
+def generate_pages_recursive(dir_path_content: str, template_path: str, dest_dir_path: str, basepath: str, context: BuildContext | None = None) -> list[tuple[str, str]]:
+    """
+    Generate every page under dir_path_content and return the build plan
+    that was executed.
+
+    When the context carries a dependency graph, pages whose recorded inputs
+    are all unchanged are skipped; their metadata is taken from the previous
+    build's index. Sources rejected by the context's page filter are not
+    part of the plan at all.
+    """
+    if context is None:
+        context = BuildContext()
+    if context.content_dir is None:
+        context.content_dir = dir_path_content
+    plan: list[tuple[str, str]] = []
+    for from_path, dest_path in plan_pages(dir_path_content, dest_dir_path):
+        if context.page_filter is not None and not context.page_filter(from_path):
+            continue
+        plan.append((from_path, dest_path))
+        if context.graph is not None:
+            reasons = context.rebuild_reasons(dest_path)
+            previous_entry = None
+            if context.previous_index is not None:
+                previous_entry = context.previous_index.entries.get(from_path)
+            if not reasons and context.site_index is not None and previous_entry is None:
+                reasons = ["page metadata is not indexed"]
+            if not reasons and context.links is not None and from_path not in context.links.previous:
+                reasons = ["page links are not indexed"]
+            if not reasons and context.search is not None and from_path not in context.search:
+                reasons = ["page text is not in the search index"]
+            context.report(dest_path, reasons)
+            if not reasons:
+                context.graph.keep(dest_path)
+                if context.site_index is not None:
+                    context.site_index.entries[from_path] = previous_entry
+                if context.links is not None:
+                    context.links.keep(from_path)
+                if context.search is not None:
+                    context.search.keep(from_path)
+                continue
+        generate_page(from_path, template_path, dest_path, basepath, context)
+    return plan
 
 def main():
     print(f"{extract_title("# Hello")}\n\n")
@@ -0,0 +1,39 @@
+import sys
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+MEGABYTE = 1024 * 1024
+
+
+def peak_rss() -> int | None:
+    """
+    Peak resident set size of this process so far, in bytes, or None where
+    the platform does not report it.
+    """
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def check_memory_limit(limit: int, stage: str) -> None:
+    """
+    Raise MemoryError if the peak RSS has gone over limit bytes; stage
+    names what the build was doing, for the error message.
+    """
+    peak = peak_rss()
+    if peak is not None and peak > limit:
+        raise MemoryError(f"Peak memory {peak / MEGABYTE:.0f} MB exceeded the limit of {limit / MEGABYTE:.0f} MB at {stage}")
+
+
+def describe_peak_rss(limit: int | None = None) -> str:
+    peak = peak_rss()
+    if peak is None:
+        return "Peak memory: not reported on this platform"
+    if limit is None:
+        return f"Peak memory: {peak / MEGABYTE:.0f} MB"
+    return f"Peak memory: {peak / MEGABYTE:.0f} MB (limit {limit / MEGABYTE:.0f} MB)"
@@ -0,0 +1,89 @@
+import re
+from collections.abc import Iterable, Iterator
+from functools import lru_cache
+from templates import CompiledTemplate
+
+# elements whose text content is whitespace-sensitive and left untouched
+PRESERVE_TAGS = ("pre", "code", "textarea", "script", "style")
+
+# the serializer emits "<pre>" or "<pre attr=...>" as a chunk of its own
+PRESERVE_OPEN_CHUNKS = frozenset(f"<{tag}>" for tag in PRESERVE_TAGS)
+PRESERVE_OPEN_PREFIXES = tuple(f"<{tag} " for tag in PRESERVE_TAGS)
+PRESERVE_CLOSE_CHUNKS = frozenset(f"</{tag}>" for tag in PRESERVE_TAGS)
+WHITESPACE_RUN_RE = re.compile(r"\s+")
+
+TEMPLATE_PRESERVE_RE = re.compile(r"(<(pre|textarea|script|style)\b.*?</\2>)", re.DOTALL | re.IGNORECASE)
+COMMENT_RE = re.compile(r"<!--(?!\[if).*?-->", re.DOTALL)
+INDENT_BETWEEN_TAGS_RE = re.compile(r">\s*\n\s*<")
+# indentation next to a preserved element, which always starts and ends with a tag
+LEADING_INDENT_RE = re.compile(r"^\s*\n\s*(?=<)")
+TRAILING_INDENT_RE = re.compile(r"(?<=>)\s*\n\s*$")
+
+
+@lru_cache(maxsize=32)
+def minify_template(template_content: str) -> str:
+    """
+    Minify a page template: drop comments and the indentation between tags,
+    collapse remaining whitespace runs. Whitespace-sensitive elements are
+    kept verbatim. Templates are few and reused for every page, so the
+    result is memoized.
+    """
+    pieces = TEMPLATE_PRESERVE_RE.split(template_content)
+    result: list[str] = []
+    # split() with two groups yields [text, whole match, tag name, text, ...]
+    for index in range(0, len(pieces), 3):
+        text = COMMENT_RE.sub("", pieces[index])
+        text = INDENT_BETWEEN_TAGS_RE.sub("><", text)
+        if index > 0:
+            text = LEADING_INDENT_RE.sub("", text)
+        if index + 1 < len(pieces):
+            text = TRAILING_INDENT_RE.sub("", text)
+        result.append(WHITESPACE_RUN_RE.sub(" ", text))
+        if index + 1 < len(pieces):
+            result.append(pieces[index + 1])
+    return "".join(result).strip()
+
+
+class HtmlMinifier():
+    """
+    Minifies the chunk stream produced by HTMLNode.iter_html.
+
+    Tag chunks pass through unchanged and only track whether we are inside a
+    whitespace-sensitive element. Text chunks outside those elements have
+    whitespace runs collapsed to a single space; text that has nothing to
+    collapse (the common case, since inline markdown is already normalized)
+    costs a few substring tests and is yielded as-is.
+    """
+    def __init__(self) -> None:
+        self.pages = 0
+        self.total_saved = 0
+        self.last_saved = 0
+
+    def minify_chunks(self, chunks: Iterable[str]) -> Iterator[str]:
+        preserve_depth = 0
+        saved = 0
+        for chunk in chunks:
+            if chunk in PRESERVE_OPEN_CHUNKS or chunk.startswith(PRESERVE_OPEN_PREFIXES):
+                preserve_depth += 1
+            elif chunk in PRESERVE_CLOSE_CHUNKS:
+                if preserve_depth:
+                    preserve_depth -= 1
+            # plain substring tests are much cheaper than a regex search here
+            elif not preserve_depth and ("\n" in chunk or "  " in chunk or "\t" in chunk or "\r" in chunk):
+                collapsed = WHITESPACE_RUN_RE.sub(" ", chunk)
+                saved += len(chunk) - len(collapsed)
+                chunk = collapsed
+            yield chunk
+        self.last_saved += saved
+        self.total_saved += saved
+
+    def minify_compiled(self, template: CompiledTemplate) -> CompiledTemplate:
+        minified = template.transformed(minify_template)
+        saved = len(template.source.encode()) - len(minified.source.encode())
+        self.last_saved += saved
+        self.total_saved += saved
+        return minified
+
+    def start_page(self) -> None:
+        self.pages += 1
+        self.last_saved = 0
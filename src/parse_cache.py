@@ -0,0 +1,231 @@
+import os
+import json
+import zlib
+import marshal
+import hashlib
+from collections.abc import Callable
+from htmlnode import HTMLNode, LeafNode, ParentNode, walk
+from highlight import HIGHLIGHTER_VERSION
+
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+# trees a MemoryParseCache keeps in memory on top of the directory
+DEFAULT_MEMORY_ENTRIES = 4096
+# after an eviction pass the cache is trimmed to this fraction of the limit,
+# so a full cache does not evict on every single write
+EVICTION_TARGET = 0.9
+STATS_FILE = "stats.json"
+# bump when the layout of node_to_data changes
+DATA_FORMAT = 2
+
+
+def node_to_data(node: HTMLNode) -> list[tuple]:
+    """
+    Compact form of a node tree: its nodes in document order, (tag, value,
+    props) for leaves and (tag, number of children, props) for parents.
+    Flat, so trees of any depth can be marshalled (marshal refuses deeply
+    nested data), and only builtins.
+    """
+    return [
+        (descendant.tag, len(descendant.children), descendant.props) if isinstance(descendant, ParentNode) else (descendant.tag, descendant.value, descendant.props)
+        for descendant in walk(node)
+    ]
+
+
+def data_to_node(data: list[tuple]) -> HTMLNode:
+    root: list[HTMLNode] = []
+    # the list of children being filled and how many are still to come,
+    # and the same for each parent list whose filling is suspended
+    siblings, remaining = root, 1
+    stack: list[tuple[list[HTMLNode], int]] = []
+    for tag, body, props in data:
+        while not remaining:
+            siblings, remaining = stack.pop()
+        remaining -= 1
+        if body.__class__ is int:
+            children: list[HTMLNode] = []
+            siblings.append(ParentNode(tag, children, props))
+            stack.append((siblings, remaining))
+            siblings, remaining = children, body
+        else:
+            siblings.append(LeafNode(tag, body, props))
+    return root[0]
+
+
+class ParseCache():
+    """
+    On-disk cache of parsed markdown trees, keyed by the hash of the source
+    text and the parser version. Entries are marshalled and zlib-compressed.
+
+    The directory is kept under max_bytes by evicting the least recently
+    used entries; a hit refreshes the entry's mtime, which serves as its
+    last-used time. Hit and miss counts accumulate across builds.
+    """
+    def __init__(self, cache_dir: str, parser_version: int, max_bytes: int = DEFAULT_MAX_BYTES) -> None:
+        self.cache_dir = cache_dir
+        self.parser_version = parser_version
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._size: int | None = None
+
+    def key(self, markdown: str) -> str:
+        digest = hashlib.sha256(f"{self.parser_version}\0{HIGHLIGHTER_VERSION}\0{DATA_FORMAT}\0{marshal.version}\0".encode())
+        digest.update(markdown.encode())
+        return digest.hexdigest()
+
+    def _entry_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key[:2], key + ".bin")
+
+    def _entries(self) -> list[tuple[float, int, str]]:
+        entries: list[tuple[float, int, str]] = []
+        if not os.path.isdir(self.cache_dir):
+            return entries
+        for dir_path, _, file_names in os.walk(self.cache_dir):
+            for file_name in file_names:
+                if not file_name.endswith(".bin"):
+                    continue
+                path = os.path.join(dir_path, file_name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+        return entries
+
+    def size(self) -> int:
+        if self._size is None:
+            self._size = sum(size for _, size, _ in self._entries())
+        return self._size
+
+    def get(self, key: str) -> HTMLNode | None:
+        path = self._entry_path(key)
+        try:
+            with open(path, "rb") as file_object:
+                data = marshal.loads(zlib.decompress(file_object.read()))
+        except (OSError, ValueError, EOFError, TypeError, zlib.error):
+            self.misses += 1
+            return None
+        os.utime(path)
+        self.hits += 1
+        return data_to_node(data)
+
+    def put(self, key: str, node: HTMLNode) -> None:
+        payload = zlib.compress(marshal.dumps(node_to_data(node)))
+        if len(payload) > self.max_bytes:
+            return
+        path = self._entry_path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        current_size = self.size()
+        try:
+            # an entry written again replaces the old file, not adds to it
+            current_size -= os.path.getsize(path)
+        except OSError:
+            pass
+        temp_path = path + ".tmp"
+        with open(temp_path, "wb") as file_object:
+            file_object.write(payload)
+        os.replace(temp_path, path)
+        self._size = current_size + len(payload)
+        if self._size > self.max_bytes:
+            self.evict()
+
+    def evict(self) -> None:
+        """
+        Remove least recently used entries until the cache is back under
+        EVICTION_TARGET of its limit.
+        """
+        entries = sorted(self._entries())
+        total = sum(size for _, size, _ in entries)
+        target = int(self.max_bytes * EVICTION_TARGET)
+        for _, size, path in entries:
+            if total <= target:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+            self.evictions += 1
+        self._size = total
+
+    def get_or_parse(self, markdown: str, parse: Callable[[str], HTMLNode]) -> HTMLNode:
+        key = self.key(markdown)
+        node = self.get(key)
+        if node is None:
+            node = parse(markdown)
+            self.put(key, node)
+        return node
+
+    def load_stats(self) -> dict[str, int]:
+        try:
+            with open(os.path.join(self.cache_dir, STATS_FILE), "r") as file_object:
+                return json.load(file_object)
+        except (OSError, ValueError):
+            return {"hits": 0, "misses": 0}
+
+    def save_stats(self) -> None:
+        """
+        Add this run's hits and misses to the running totals on disk.
+        """
+        totals = self.load_stats()
+        totals["hits"] = totals.get("hits", 0) + self.hits
+        totals["misses"] = totals.get("misses", 0) + self.misses
+        os.makedirs(self.cache_dir, exist_ok=True)
+        with open(os.path.join(self.cache_dir, STATS_FILE), "w") as file_object:
+            json.dump(totals, file_object)
+        self.hits = 0
+        self.misses = 0
+
+    def stats(self) -> dict:
+        totals = self.load_stats()
+        hits = totals.get("hits", 0) + self.hits
+        misses = totals.get("misses", 0) + self.misses
+        entries = self._entries()
+        lookups = hits + misses
+        return {
+            "entries": len(entries),
+            "size": sum(size for _, size, _ in entries),
+            "max_size": self.max_bytes,
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": hits / lookups if lookups else 0.0,
+        }
+
+
+class MemoryParseCache(ParseCache):
+    """
+    A ParseCache that also keeps the most recently used trees in memory, for
+    a process that builds the same site again and again (the build daemon).
+    Trees are held marshalled, so the nodes handed out are always fresh
+    copies that pages can annotate. Every entry is still written to the
+    directory, which other builds share.
+    """
+    def __init__(self, cache_dir: str, parser_version: int, max_bytes: int = DEFAULT_MAX_BYTES, max_entries: int = DEFAULT_MEMORY_ENTRIES) -> None:
+        super().__init__(cache_dir, parser_version, max_bytes)
+        self.max_entries = max_entries
+        # insertion order is recency order: a hit moves the entry to the end
+        self.memory: dict[str, bytes] = {}
+        self.memory_hits = 0
+
+    def _remember(self, key: str, node: HTMLNode) -> None:
+        self.memory.pop(key, None)
+        self.memory[key] = marshal.dumps(node_to_data(node))
+        while len(self.memory) > self.max_entries:
+            del self.memory[next(iter(self.memory))]
+
+    def get(self, key: str) -> HTMLNode | None:
+        data = self.memory.pop(key, None)
+        if data is not None:
+            self.memory[key] = data
+            self.hits += 1
+            self.memory_hits += 1
+            return data_to_node(marshal.loads(data))
+        node = super().get(key)
+        if node is not None:
+            self._remember(key, node)
+        return node
+
+    def put(self, key: str, node: HTMLNode) -> None:
+        super().put(key, node)
+        self._remember(key, node)
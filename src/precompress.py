@@ -0,0 +1,102 @@
+import os
+import gzip
+import json
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
+
+COMPRESSIBLE_EXTENSIONS = {".html", ".css", ".js", ".xml", ".svg"}
+DEFAULT_LEVEL = 9
+DEFAULT_MIN_SIZE = 1024
+
+
+def compress_file(path: str, level: int) -> tuple[str, int, int]:
+    """
+    Write path + '.gz' next to path. The gzip header carries no file name or
+    timestamp, so identical input always produces identical output.
+    Returns (path, original size, compressed size).
+    """
+    with open(path, "rb") as file_object:
+        data = file_object.read()
+    compressed = gzip.compress(data, compresslevel=level, mtime=0)
+    temp_path = path + ".gz.tmp"
+    with open(temp_path, "wb") as file_object:
+        file_object.write(compressed)
+    os.replace(temp_path, path + ".gz")
+    return path, len(data), len(compressed)
+
+
+def content_hash(path: str) -> str:
+    with open(path, "rb") as file_object:
+        return hashlib.sha256(file_object.read()).hexdigest()
+
+
+def find_compressible(dest_dir_path: str) -> list[str]:
+    paths: list[str] = []
+    for dir_path, _, file_names in os.walk(dest_dir_path):
+        for file_name in sorted(file_names):
+            if os.path.splitext(file_name)[1].lower() in COMPRESSIBLE_EXTENSIONS:
+                paths.append(os.path.join(dir_path, file_name))
+    return sorted(paths)
+
+
+class PrecompressStats():
+    def __init__(self) -> None:
+        self.compressed = 0
+        self.unchanged = 0
+        self.too_small = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+
+    def __repr__(self) -> str:
+        return f"PrecompressStats(compressed={self.compressed}, unchanged={self.unchanged}, too_small={self.too_small}, bytes_in={self.bytes_in}, bytes_out={self.bytes_out})"
+
+
+def precompress_tree(dest_dir_path: str, level: int = DEFAULT_LEVEL, min_size: int = DEFAULT_MIN_SIZE, state_path: str | None = None, workers: int | None = None) -> PrecompressStats:
+    """
+    Write .gz siblings for every HTML/CSS/JS/XML/SVG file under dest_dir_path,
+    for servers using nginx's gzip_static.
+
+    Files smaller than min_size are left alone (and lose any stale .gz).
+    When state_path is given, the content hash and level used for each file
+    are remembered, and files whose hash is unchanged and whose .gz still
+    exists are skipped. Compression runs on a thread pool; zlib releases the
+    GIL while compressing.
+    """
+    if not 0 <= level <= 9:
+        raise ValueError("gzip level must be between 0 and 9")
+    state: dict[str, list] = {}
+    if state_path is not None:
+        try:
+            with open(state_path, "r") as file_object:
+                state = json.load(file_object)
+        except (OSError, ValueError):
+            state = {}
+
+    stats = PrecompressStats()
+    new_state: dict[str, list] = {}
+    pending: list[str] = []
+    for path in find_compressible(dest_dir_path):
+        rel_path = os.path.relpath(path, dest_dir_path)
+        if os.path.getsize(path) < min_size:
+            stats.too_small += 1
+            if os.path.exists(path + ".gz"):
+                os.remove(path + ".gz")
+            continue
+        digest = content_hash(path)
+        new_state[rel_path] = [digest, level]
+        if state.get(rel_path) == [digest, level] and os.path.exists(path + ".gz"):
+            stats.unchanged += 1
+            continue
+        pending.append(path)
+
+    with ThreadPoolExecutor(max_workers=workers or os.cpu_count()) as executor:
+        for _, size_in, size_out in executor.map(lambda path: compress_file(path, level), pending):
+            stats.compressed += 1
+            stats.bytes_in += size_in
+            stats.bytes_out += size_out
+
+    if state_path is not None:
+        os.makedirs(os.path.dirname(os.path.abspath(state_path)), exist_ok=True)
+        with open(state_path, "w") as file_object:
+            json.dump(new_state, file_object, indent=1, sort_keys=True)
+    return stats
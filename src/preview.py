@@ -0,0 +1,176 @@
+import io
+import os
+import hashlib
+import threading
+import functools
+import urllib.parse
+from http import HTTPStatus
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from markdown_to_html import generate_page
+from build_context import BuildContext
+from depgraph import DependencyGraph
+from fingerprint import AssetHashCache
+
+ETAG_LENGTH = 32
+
+
+class PreviewPage():
+    """
+    A rendered page and the mtime_ns of every file it was rendered from
+    (None for a file that did not exist, such as a more specific layout).
+    """
+    def __init__(self, body: bytes, inputs: dict[str, int | None]) -> None:
+        self.body = body
+        self.inputs = inputs
+        self.etag = f'"{hashlib.sha256(body).hexdigest()[:ETAG_LENGTH]}"'
+
+    def is_current(self) -> bool:
+        return all(file_mtime(path) == mtime_ns for path, mtime_ns in self.inputs.items())
+
+
+def file_mtime(path: str) -> int | None:
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+
+class PreviewRenderer():
+    """
+    Renders content pages on request instead of building the site first.
+    Rendered pages are kept in memory until their source, template (or
+    anything it includes) or an annotated image changes.
+    """
+    def __init__(self, content_dir: str, template_path: str, static_dir: str, basepath: str = "/") -> None:
+        self.content_dir = content_dir
+        self.template_path = template_path
+        self.static_dir = static_dir
+        self.basepath = basepath
+        self.hash_cache = AssetHashCache()
+        self.pages: dict[str, PreviewPage] = {}
+        self.lock = threading.Lock()
+        self.renders = 0
+
+    def resolve(self, url: str) -> tuple[str, str] | None:
+        """
+        What a request path maps to: ("page", source) for a content page,
+        ("redirect", location) for a page directory requested without its
+        trailing slash, or None when it is not a page (a static file, say).
+        """
+        path = urllib.parse.unquote(urllib.parse.urlsplit(url).path)
+        parts = [part for part in path.split("/") if part]
+        if any(part in (os.curdir, os.pardir) or os.sep in part for part in parts):
+            return None
+        rel_path = os.path.join(*parts) if parts else ""
+        if not parts or path.endswith("/"):
+            source = os.path.join(self.content_dir, rel_path, "index.md")
+        elif rel_path.endswith(".html"):
+            source = os.path.join(self.content_dir, rel_path[:-len(".html")] + ".md")
+        elif os.path.isfile(os.path.join(self.content_dir, rel_path, "index.md")):
+            return "redirect", urllib.parse.quote(path) + "/"
+        else:
+            return None
+        if not os.path.isfile(source):
+            return None
+        return "page", source
+
+    def page(self, from_path: str) -> PreviewPage:
+        with self.lock:
+            cached = self.pages.get(from_path)
+        if cached is not None and cached.is_current():
+            return cached
+        page = self.render(from_path)
+        with self.lock:
+            self.pages[from_path] = page
+        return page
+
+    def render(self, from_path: str) -> PreviewPage:
+        # the source's mtime is taken first, so an edit made while the page
+        # renders leaves it stale rather than cached as current
+        source_mtime = file_mtime(from_path)
+        graph = DependencyGraph()
+        context = BuildContext(static_dir=self.static_dir, graph=graph, hash_cache=self.hash_cache)
+        context.content_dir = self.content_dir
+        rel_path = os.path.relpath(from_path, self.content_dir)
+        dest_path = rel_path[:-len(".md")] + ".html"
+        out = io.StringIO()
+        generate_page(from_path, self.template_path, dest_path, self.basepath, context, out=out)
+        inputs = {key.partition(":")[2]: None for key in graph.current[dest_path] if key.startswith("file:")}
+        for path in inputs:
+            inputs[path] = file_mtime(path)
+        inputs[from_path] = source_mtime
+        with self.lock:
+            self.renders += 1
+        return PreviewPage(out.getvalue().encode("utf-8"), inputs)
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """
+    Whether an If-None-Match header matches etag; the comparison is weak,
+    as RFC 9110 requires for If-None-Match.
+    """
+    if if_none_match is None:
+        return False
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*" or candidate.removeprefix("W/") == etag:
+            return True
+    return False
+
+
+class PreviewHandler(SimpleHTTPRequestHandler):
+    """
+    Serves rendered content pages, and everything else straight from the
+    static directory.
+    """
+    def __init__(self, *args, renderer: PreviewRenderer, **kwargs) -> None:
+        self.renderer = renderer
+        super().__init__(*args, directory=renderer.static_dir, **kwargs)
+
+    def do_GET(self) -> None:
+        if not self.send_page():
+            super().do_GET()
+
+    def do_HEAD(self) -> None:
+        if not self.send_page(head=True):
+            super().do_HEAD()
+
+    def send_page(self, head: bool = False) -> bool:
+        """
+        Answer the request if it is for a page; False if it is not.
+        """
+        target = self.renderer.resolve(self.path)
+        if target is None:
+            return False
+        kind, value = target
+        if kind == "redirect":
+            self.send_response(HTTPStatus.MOVED_PERMANENTLY)
+            self.send_header("Location", value)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return True
+        try:
+            page = self.renderer.page(value)
+        except (OSError, ValueError) as error:
+            self.send_error(HTTPStatus.INTERNAL_SERVER_ERROR, f"Cannot render {value}: {error}")
+            return True
+        if etag_matches(self.headers.get("If-None-Match"), page.etag):
+            self.send_response(HTTPStatus.NOT_MODIFIED)
+            self.send_header("ETag", page.etag)
+            self.send_header("Cache-Control", "no-cache")
+            self.end_headers()
+            return True
+        self.send_response(HTTPStatus.OK)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(page.body)))
+        self.send_header("ETag", page.etag)
+        # revalidate on every view, so edits show up on reload
+        self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+        if not head:
+            self.wfile.write(page.body)
+        return True
+
+
+def make_server(renderer: PreviewRenderer, address: tuple[str, int]) -> ThreadingHTTPServer:
+    return ThreadingHTTPServer(address, functools.partial(PreviewHandler, renderer=renderer))
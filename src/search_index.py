@@ -0,0 +1,185 @@
+import os
+import re
+import html
+import json
+from collections import Counter
+from htmlnode import HTMLNode, walk
+from site_index import dest_path_to_url
+from spill import open_database
+
+# the index is published under <output>/search-index/:
+#   index.json       {"prefix_length": 2, "docs": "docs.json", "shards": [prefix, ...]}
+#   docs.json        {doc id: [url, title]}
+#   <hex>.json       {term: [[doc id, count], ...]} for the terms starting
+#                    with one prefix; the file name is the hex of the
+#                    prefix's UTF-8 bytes
+# so a search page fetches index.json and docs.json once, then only the
+# shard for the prefix of the word being typed
+SEARCH_DIR = "search-index"
+PREFIX_LENGTH = 2
+TOKEN_RE = re.compile(r"\w+")
+MIN_TERM_LENGTH = 2
+MAX_TERM_LENGTH = 40
+COMPACT = (",", ":")
+# code blocks are not prose; their markup may hold highlighter spans
+SKIPPED_TAGS = frozenset({"pre"})
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS docs (id INTEGER PRIMARY KEY, source TEXT UNIQUE, url TEXT, title TEXT);
+CREATE TABLE IF NOT EXISTS postings (prefix TEXT, term TEXT, doc INTEGER, count INTEGER, PRIMARY KEY (term, doc)) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS postings_prefix ON postings (prefix, term);
+CREATE INDEX IF NOT EXISTS postings_doc ON postings (doc);
+CREATE TABLE IF NOT EXISTS settings (name TEXT PRIMARY KEY, value TEXT);
+CREATE TEMP TABLE seen (source TEXT PRIMARY KEY);
+"""
+
+
+def is_prose(node: HTMLNode) -> bool:
+    return node.tag not in SKIPPED_TAGS
+
+
+def node_terms(node: HTMLNode, counts: Counter) -> None:
+    """
+    Count the terms of every text node in the tree into counts.
+    """
+    for descendant in walk(node, is_prose):
+        if descendant.value:
+            text = descendant.value
+            if "&" in text:
+                text = html.unescape(text)
+            for term in TOKEN_RE.findall(text.lower()):
+                if MIN_TERM_LENGTH <= len(term) <= MAX_TERM_LENGTH:
+                    counts[term] += 1
+
+
+def shard_name(prefix: str) -> str:
+    return prefix.encode("utf-8").hex() + ".json"
+
+
+class SearchIndex():
+    """
+    A full-text inverted index of the site, kept in an SQLite file between
+    builds and published as prefix shards (see SEARCH_DIR above).
+
+    Only pages that are rebuilt are re-indexed, and only the shards whose
+    terms changed are rewritten. Postings live in the database, not in
+    memory: a build holds the terms of one page and one shard at a time.
+    """
+    def __init__(self, dest_root: str, path: str, basepath: str = "/") -> None:
+        self.dest_root = dest_root
+        self.path = path
+        self.basepath = basepath
+        self.connection = open_database(path)
+        self.connection.executescript(SCHEMA)
+        self.dirty_prefixes: set[str] = set()
+        self.docs_changed = False
+        self.indexed = 0
+
+    def __contains__(self, source: object) -> bool:
+        return self.connection.execute("SELECT 1 FROM docs WHERE source = ?", (source,)).fetchone() is not None
+
+    def setting(self, name: str) -> str | None:
+        row = self.connection.execute("SELECT value FROM settings WHERE name = ?", (name,)).fetchone()
+        return None if row is None else row[0]
+
+    def record(self, source: str, dest_path: str, title: str, counts: Counter) -> None:
+        """
+        Index a rendered page, replacing what was indexed for its source.
+        """
+        connection = self.connection
+        url = dest_path_to_url(dest_path, self.dest_root)
+        row = connection.execute("SELECT id, url, title FROM docs WHERE source = ?", (source,)).fetchone()
+        if row is None:
+            doc = connection.execute("INSERT INTO docs (source, url, title) VALUES (?, ?, ?)", (source, url, title)).lastrowid
+            old_counts: dict[str, int] = {}
+            self.docs_changed = True
+        else:
+            doc = row[0]
+            if (row[1], row[2]) != (url, title):
+                connection.execute("UPDATE docs SET url = ?, title = ? WHERE id = ?", (url, title, doc))
+                self.docs_changed = True
+            old_counts = dict(connection.execute("SELECT term, count FROM postings WHERE doc = ?", (doc,)))
+        connection.execute("INSERT OR IGNORE INTO seen (source) VALUES (?)", (source,))
+        self.indexed += 1
+        if old_counts == counts:
+            return
+        changed = {term for term in old_counts.keys() | counts.keys() if old_counts.get(term) != counts.get(term)}
+        self.dirty_prefixes.update(term[:PREFIX_LENGTH] for term in changed)
+        connection.execute("DELETE FROM postings WHERE doc = ?", (doc,))
+        connection.executemany(
+            "INSERT INTO postings (prefix, term, doc, count) VALUES (?, ?, ?, ?)",
+            ((term[:PREFIX_LENGTH], term, doc, count) for term, count in counts.items()),
+        )
+
+    def keep(self, source: str) -> None:
+        """
+        Mark a page that was not rebuilt as still part of the site.
+        """
+        self.connection.execute("INSERT OR IGNORE INTO seen (source) VALUES (?)", (source,))
+
+    def _remove_unseen(self) -> None:
+        connection = self.connection
+        removed = [doc for (doc,) in connection.execute("SELECT id FROM docs WHERE source NOT IN (SELECT source FROM seen)")]
+        for doc in removed:
+            self.dirty_prefixes.update(prefix for (prefix,) in connection.execute("SELECT DISTINCT prefix FROM postings WHERE doc = ?", (doc,)))
+            connection.execute("DELETE FROM postings WHERE doc = ?", (doc,))
+            connection.execute("DELETE FROM docs WHERE id = ?", (doc,))
+        if removed:
+            self.docs_changed = True
+
+    def write(self) -> tuple[int, int]:
+        """
+        Drop pages that were not seen in this build, rewrite the changed
+        shards and the document table, and commit. Returns the number of
+        shards written and the number of shards in the index.
+        """
+        connection = self.connection
+        self._remove_unseen()
+        search_dir = os.path.join(self.dest_root, SEARCH_DIR)
+        manifest_path = os.path.join(search_dir, "index.json")
+        if not os.path.exists(manifest_path) or self.setting("basepath") != self.basepath:
+            # a first build, or one after the output was removed, writes all of it
+            self.dirty_prefixes.update(prefix for (prefix,) in connection.execute("SELECT DISTINCT prefix FROM postings"))
+            self.docs_changed = True
+        os.makedirs(search_dir, exist_ok=True)
+        for prefix in sorted(self.dirty_prefixes):
+            self._write_shard(os.path.join(search_dir, shard_name(prefix)), prefix)
+        if self.docs_changed:
+            with open(os.path.join(search_dir, "docs.json"), "w") as file_object:
+                file_object.write("{")
+                for number, (doc, url, title) in enumerate(connection.execute("SELECT id, url, title FROM docs ORDER BY id")):
+                    entry = [self.basepath + url[1:], title]
+                    file_object.write(f'{"," if number else ""}"{doc}":{json.dumps(entry, separators=COMPACT)}')
+                file_object.write("}")
+        prefixes = [prefix for (prefix,) in connection.execute("SELECT DISTINCT prefix FROM postings ORDER BY prefix")]
+        with open(manifest_path, "w") as file_object:
+            json.dump({"prefix_length": PREFIX_LENGTH, "docs": "docs.json", "shards": prefixes}, file_object, separators=COMPACT)
+        connection.execute("INSERT OR REPLACE INTO settings (name, value) VALUES ('basepath', ?)", (self.basepath,))
+        connection.commit()
+        return len(self.dirty_prefixes), len(prefixes)
+
+    def _write_shard(self, path: str, prefix: str) -> None:
+        rows = self.connection.execute("SELECT term, doc, count FROM postings WHERE prefix = ? ORDER BY term, doc", (prefix,))
+        term: str | None = None
+        postings: list[list[int]] = []
+        written = False
+        with open(path + ".tmp", "w") as file_object:
+            file_object.write("{")
+            for row_term, doc, count in rows:
+                if row_term != term:
+                    if term is not None:
+                        file_object.write(f'{"," if written else ""}{json.dumps(term)}:{json.dumps(postings, separators=COMPACT)}')
+                        written = True
+                    term, postings = row_term, []
+                postings.append([doc, count])
+            if term is not None:
+                file_object.write(f'{"," if written else ""}{json.dumps(term)}:{json.dumps(postings, separators=COMPACT)}')
+            file_object.write("}")
+        if term is None:
+            os.remove(path + ".tmp")
+            if os.path.exists(path):
+                os.remove(path)
+        else:
+            os.replace(path + ".tmp", path)
+
+    def close(self) -> None:
+        self.connection.close()
@@ -0,0 +1,115 @@
+import os
+import json
+import shutil
+import hashlib
+import argparse
+from site_index import SiteIndex, PageEntry
+
+MANIFEST_PREFIX = ".shard-"
+
+
+def parse_shard(value: str) -> tuple[int, int]:
+    """
+    Parse a --shard argument "I/N" (1 <= I <= N) into (I, N).
+    """
+    index, _, count = value.partition("/")
+    try:
+        shard = (int(index), int(count))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected I/N, got '{value}'")
+    if not 1 <= shard[0] <= shard[1]:
+        raise argparse.ArgumentTypeError(f"shard {value} is out of range; I must be between 1 and N")
+    return shard
+
+
+def shard_of(from_path: str, content_dir: str, count: int) -> int:
+    """
+    The shard (1 to count) a source belongs to. The hash is of the path
+    relative to the content directory, so every machine assigns every page
+    to the same shard regardless of checkout location or PYTHONHASHSEED.
+    """
+    rel_path = os.path.relpath(from_path, content_dir).replace(os.sep, "/")
+    digest = hashlib.sha256(rel_path.encode()).digest()
+    return int.from_bytes(digest[:8], "big") % count + 1
+
+
+def manifest_name(index: int, count: int) -> str:
+    return f"{MANIFEST_PREFIX}{index}-of-{count}.json"
+
+
+class ShardManifest():
+    """
+    What one shard of a build produced: the pages it rendered (with their
+    index metadata and sitemap lastmod) and the settings it ran with, so
+    merge can check that all shards belong to the same build.
+    """
+    def __init__(self, index: int, count: int, config: dict[str, str] | None = None) -> None:
+        self.index = index
+        self.count = count
+        self.config = config or {}
+        self.pages: list[dict] = []
+
+    def add_page(self, entry: PageEntry, output: str, lastmod: str | None) -> None:
+        self.pages.append({"output": output, "lastmod": lastmod, "entry": entry.to_dict()})
+
+    def save(self, dest_dir: str) -> str:
+        path = os.path.join(dest_dir, manifest_name(self.index, self.count))
+        data = {"shard": self.index, "count": self.count, "config": self.config, "pages": self.pages}
+        with open(path, "w") as file_object:
+            json.dump(data, file_object, indent=1, sort_keys=True)
+        return path
+
+    @classmethod
+    def load(cls, path: str) -> "ShardManifest":
+        with open(path, "r") as file_object:
+            data = json.load(file_object)
+        manifest = cls(data["shard"], data["count"], data.get("config", {}))
+        manifest.pages = data.get("pages", [])
+        return manifest
+
+
+def find_shard_manifests(shard_dirs: list[str]) -> list[tuple[str, ShardManifest]]:
+    """
+    The manifest of every shard output directory, in shard order. Raises
+    ValueError unless they form one complete build: each of shards 1..N
+    exactly once, all run with the same settings.
+    """
+    found: list[tuple[str, ShardManifest]] = []
+    for shard_dir in shard_dirs:
+        names = sorted(name for name in os.listdir(shard_dir) if name.startswith(MANIFEST_PREFIX) and name.endswith(".json"))
+        if len(names) != 1:
+            raise ValueError(f"Expected one shard manifest in {shard_dir}, found {len(names)}")
+        found.append((shard_dir, ShardManifest.load(os.path.join(shard_dir, names[0]))))
+    if not found:
+        raise ValueError("No shard directories given")
+    count = found[0][1].count
+    config = found[0][1].config
+    for shard_dir, manifest in found:
+        if manifest.count != count:
+            raise ValueError(f"{shard_dir} is shard {manifest.index}/{manifest.count}, expected a shard of {count}")
+        if manifest.config != config:
+            raise ValueError(f"{shard_dir} was built with different settings: {manifest.config} != {config}")
+    indexes = sorted(manifest.index for _, manifest in found)
+    if indexes != list(range(1, count + 1)):
+        raise ValueError(f"Shards {indexes} do not cover 1..{count} exactly once")
+    return sorted(found, key=lambda item: item[1].index)
+
+
+def copy_shard_output(shard_dir: str, dest_dir: str) -> None:
+    """
+    Copy a shard's output tree into dest_dir, leaving out its manifest.
+    Files every shard writes (static assets) are identical and simply
+    overwritten.
+    """
+    if os.path.abspath(shard_dir) == os.path.abspath(dest_dir):
+        return
+    shutil.copytree(shard_dir, dest_dir, dirs_exist_ok=True, ignore=shutil.ignore_patterns(f"{MANIFEST_PREFIX}*.json"))
+
+
+def merged_index(manifests: list[ShardManifest], dest_root: str) -> SiteIndex:
+    index = SiteIndex(dest_root)
+    for manifest in manifests:
+        for page in manifest.pages:
+            entry = PageEntry.from_dict(page["entry"])
+            index.entries[entry.source] = entry
+    return index
@@ -0,0 +1,443 @@
+import os
+import json
+import time
+import sqlite3
+from collections.abc import Container, Iterable, Iterator, MutableMapping
+from spill import open_database
+
+FRONT_MATTER_DELIMITER = "---"
+# entries syndicated in the Atom feed
+FEED_SIZE = 20
+
+
+def parse_front_matter(markdown: str) -> tuple[dict[str, str], str]:
+    """
+    Split an optional front matter block off the top of a markdown document.
+
+    The block is delimited by '---' lines and holds simple 'key: value' pairs:
+
+        ---
+        date: 2024-05-01
+        tags: tolkien, elves
+        ---
+
+    Returns the metadata dict and the remaining markdown. Documents without a
+    front matter block are returned unchanged with an empty dict.
+    """
+    if not isinstance(markdown, str):
+        raise TypeError("markdown must be a string")
+    stripped = markdown.lstrip()
+    if not stripped.startswith(FRONT_MATTER_DELIMITER + "\n"):
+        return {}, markdown
+    lines = stripped.split("\n")
+    metadata: dict[str, str] = {}
+    for index in range(1, len(lines)):
+        line = lines[index].strip()
+        if line == FRONT_MATTER_DELIMITER:
+            return metadata, "\n".join(lines[index + 1:])
+        if not line or line.startswith("#"):
+            continue
+        if ":" not in line:
+            raise ValueError(f"Invalid front matter line: '{line}'")
+        key, value = line.split(":", 1)
+        metadata[key.strip().lower()] = value.strip()
+    raise ValueError("Unterminated front matter block")
+
+
+def split_tags(value: str) -> list[str]:
+    tags: list[str] = []
+    for tag in value.split(","):
+        tag = tag.strip().lower()
+        if tag and tag not in tags:
+            tags.append(tag)
+    return tags
+
+
+def dest_path_to_url(dest_path: str, dest_root: str) -> str:
+    """
+    Map an output file path to the site-relative URL it is served from.
+    'blog/tom/index.html' becomes '/blog/tom/', 'about.html' stays '/about.html'.
+    """
+    rel_path = os.path.relpath(dest_path, dest_root).replace(os.sep, "/")
+    if rel_path == "index.html":
+        return "/"
+    if rel_path.endswith("/index.html"):
+        return "/" + rel_path[:-len("index.html")]
+    return "/" + rel_path
+
+
+class PageEntry():
+    def __init__(self, source: str, url: str, title: str, date: str, tags: list[str] = None, summary: str = "") -> None:
+        self.source = source
+        self.url = url
+        self.title = title
+        self.date = date
+        self.tags = tags if tags is not None else []
+        self.summary = summary
+
+    @property
+    def section(self) -> str:
+        """
+        The top-level directory a page lives in ('blog' for '/blog/tom/').
+        Section roots and top-level pages have no section.
+        """
+        parts = [part for part in self.url.split("/") if part]
+        if len(parts) < 2:
+            return ""
+        return parts[0]
+
+    def listing_keys(self) -> set[str]:
+        """
+        Keys of every generated listing this page appears in. Only pages
+        inside a section are syndicated in the feed.
+        """
+        keys: set[str] = set()
+        if self.section:
+            keys.add("feed")
+            keys.add(f"section:{self.section}")
+        for tag in self.tags:
+            keys.add(f"tag:{tag}")
+        return keys
+
+    def to_dict(self) -> dict:
+        return {
+            "source": self.source,
+            "url": self.url,
+            "title": self.title,
+            "date": self.date,
+            "tags": self.tags,
+            "summary": self.summary,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "PageEntry":
+        return cls(data["source"], data["url"], data["title"], data["date"], list(data.get("tags", [])), data.get("summary", ""))
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, PageEntry):
+            return False
+        return self.to_dict() == other.to_dict()
+
+    def __repr__(self) -> str:
+        return f"PageEntry('{self.source}', '{self.url}', '{self.title}', '{self.date}', {self.tags})"
+
+
+class SiteIndex():
+    """
+    In-memory metadata index of every page in a build, keyed by source path.
+    Listings, tag pages and the feed are all generated from this one index.
+    """
+    def __init__(self, dest_root: str) -> None:
+        self.dest_root = dest_root
+        self.entries: dict[str, PageEntry] = {}
+
+    def add_page(self, from_path: str, dest_path: str, metadata: dict[str, str], title: str, summary: str = "") -> PageEntry:
+        date = metadata.get("date")
+        if not date:
+            date = time.strftime("%Y-%m-%d", time.gmtime(os.path.getmtime(from_path)))
+        entry = PageEntry(
+            from_path,
+            dest_path_to_url(dest_path, self.dest_root),
+            metadata.get("title", title),
+            date,
+            split_tags(metadata.get("tags", "")),
+            metadata.get("summary", summary),
+        )
+        self.entries[from_path] = entry
+        return entry
+
+    def sorted_entries(self) -> list[PageEntry]:
+        """
+        Entries newest first; ties are broken by title so output is stable.
+        """
+        by_title = sorted(self.entries.values(), key=lambda entry: entry.title)
+        return sorted(by_title, key=lambda entry: entry.date, reverse=True)
+
+    def sections(self) -> dict[str, list[PageEntry]]:
+        sections: dict[str, list[PageEntry]] = {}
+        for entry in self.sorted_entries():
+            if entry.section:
+                sections.setdefault(entry.section, []).append(entry)
+        return sections
+
+    def tags(self) -> dict[str, list[PageEntry]]:
+        tags: dict[str, list[PageEntry]] = {}
+        for entry in self.sorted_entries():
+            for tag in entry.tags:
+                tags.setdefault(tag, []).append(entry)
+        return dict(sorted(tags.items()))
+
+    def listings(self) -> dict[str, Iterable[PageEntry]]:
+        """
+        The entries of every section and tag listing, newest first, by
+        listing key: sections by name, then tags by name. Each value can be
+        iterated more than once and supports len().
+        """
+        listings: dict[str, Iterable[PageEntry]] = {}
+        for section, entries in sorted(self.sections().items()):
+            listings[f"section:{section}"] = entries
+        for tag, entries in self.tags().items():
+            listings[f"tag:{tag}"] = entries
+        return listings
+
+    def feed_entries(self, count: int) -> list[PageEntry]:
+        """
+        The newest count entries that belong to a section.
+        """
+        return [entry for entry in self.sorted_entries() if entry.section][:count]
+
+    def page_urls(self) -> Container[str]:
+        return {entry.url for entry in self.entries.values()}
+
+    def listing_keys(self) -> set[str]:
+        keys: set[str] = set()
+        for entry in self.entries.values():
+            keys |= entry.listing_keys()
+        return keys
+
+    def affected_listings(self, previous: "SiteIndex | None") -> set[str]:
+        """
+        Listing keys that must be regenerated given the index of the previous
+        build. A listing is affected when any page it contained before or
+        contains now was added, removed or had its metadata changed.
+        """
+        if previous is None:
+            return self.listing_keys()
+        affected: set[str] = set()
+        for source, new_entry in self.entries.items():
+            old_entry = previous.entries.get(source)
+            if old_entry == new_entry:
+                continue
+            if old_entry is not None:
+                affected |= old_entry.listing_keys()
+            affected |= new_entry.listing_keys()
+        for source, old_entry in previous.entries.items():
+            if source not in self.entries:
+                affected |= old_entry.listing_keys()
+        return affected
+
+    def save(self, path: str) -> None:
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        data = [self.entries[source].to_dict() for source in sorted(self.entries)]
+        with open(path, "w") as file_object:
+            file_object.write(json.dumps({"dest_root": self.dest_root, "entries": data}))
+
+    @classmethod
+    def load(cls, path: str) -> "SiteIndex | None":
+        """
+        Load a previously saved index, or None if there is no usable one.
+        """
+        try:
+            with open(path, "r") as file_object:
+                data = json.load(file_object)
+        except (OSError, ValueError):
+            return None
+        index = cls(data.get("dest_root", ""))
+        for item in data.get("entries", []):
+            entry = PageEntry.from_dict(item)
+            index.entries[entry.source] = entry
+        return index
+
+
+ENTRY_COLUMNS = "source, url, title, date, tags, summary"
+ENTRY_ORDER = "ORDER BY date DESC, title, rowid"
+STORE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS settings (name TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE IF NOT EXISTS entries (source TEXT PRIMARY KEY, url TEXT, title TEXT, date TEXT, tags TEXT, summary TEXT, section TEXT);
+CREATE INDEX IF NOT EXISTS entries_url ON entries (url);
+CREATE INDEX IF NOT EXISTS entries_section ON entries (section, date);
+CREATE TABLE IF NOT EXISTS tags (tag TEXT, source TEXT, PRIMARY KEY (tag, source));
+CREATE INDEX IF NOT EXISTS tags_source ON tags (source);
+"""
+
+
+def _row_to_entry(row: tuple) -> PageEntry:
+    source, url, title, date, tags, summary = row
+    return PageEntry(source, url, title, date, json.loads(tags), summary)
+
+
+class EntryStore(MutableMapping):
+    """
+    PageEntry records kept in an SQLite file instead of in memory, usable
+    wherever SiteIndex.entries is: a mapping from source path to entry, in
+    insertion order. Entries are copies, so changing one means storing it
+    again. Sections and tags are stored as columns so listings can be read
+    back one at a time, already sorted, without loading the whole index.
+    """
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.connection = self._connect()
+
+    def _connect(self) -> sqlite3.Connection:
+        connection = open_database(self.path)
+        try:
+            connection.executescript(STORE_SCHEMA)
+        except sqlite3.DatabaseError:
+            connection.close()
+            raise
+        return connection
+
+    def __getitem__(self, source: str) -> PageEntry:
+        row = self.connection.execute(f"SELECT {ENTRY_COLUMNS} FROM entries WHERE source = ?", (source,)).fetchone()
+        if row is None:
+            raise KeyError(source)
+        return _row_to_entry(row)
+
+    def __setitem__(self, source: str, entry: PageEntry) -> None:
+        # an upsert keeps the rowid, and with it the insertion order, of a
+        # replaced entry
+        self.connection.execute(
+            f"INSERT INTO entries ({ENTRY_COLUMNS}, section) VALUES (?, ?, ?, ?, ?, ?, ?) "
+            "ON CONFLICT (source) DO UPDATE SET url = excluded.url, title = excluded.title, date = excluded.date, "
+            "tags = excluded.tags, summary = excluded.summary, section = excluded.section",
+            (source, entry.url, entry.title, entry.date, json.dumps(entry.tags), entry.summary, entry.section),
+        )
+        self.connection.execute("DELETE FROM tags WHERE source = ?", (source,))
+        self.connection.executemany("INSERT INTO tags (tag, source) VALUES (?, ?)", [(tag, source) for tag in entry.tags])
+
+    def __delitem__(self, source: str) -> None:
+        if source not in self:
+            raise KeyError(source)
+        self.connection.execute("DELETE FROM entries WHERE source = ?", (source,))
+        self.connection.execute("DELETE FROM tags WHERE source = ?", (source,))
+
+    def __contains__(self, source: object) -> bool:
+        return self.connection.execute("SELECT 1 FROM entries WHERE source = ?", (source,)).fetchone() is not None
+
+    def __iter__(self) -> Iterator[str]:
+        for (source,) in self.connection.execute("SELECT source FROM entries ORDER BY rowid"):
+            yield source
+
+    def __len__(self) -> int:
+        return self.connection.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+
+    def values(self) -> Iterator[PageEntry]:
+        return self.query("", ())
+
+    def items(self) -> Iterator[tuple[str, PageEntry]]:
+        for entry in self.values():
+            yield entry.source, entry
+
+    def query(self, where: str, parameters: tuple, order: str = "ORDER BY rowid", limit: int = -1) -> Iterator[PageEntry]:
+        sql = f"SELECT {ENTRY_COLUMNS} FROM entries {where} {order} LIMIT ?"
+        for row in self.connection.execute(sql, parameters + (limit,)):
+            yield _row_to_entry(row)
+
+    def setting(self, name: str) -> str | None:
+        row = self.connection.execute("SELECT value FROM settings WHERE name = ?", (name,)).fetchone()
+        return None if row is None else row[0]
+
+    def set_setting(self, name: str, value: str) -> None:
+        self.connection.execute("INSERT OR REPLACE INTO settings (name, value) VALUES (?, ?)", (name, value))
+
+    def save_as(self, path: str) -> None:
+        """
+        Commit and move the store to path, replacing what was there.
+        """
+        self.connection.commit()
+        if os.path.abspath(path) != os.path.abspath(self.path):
+            self.connection.close()
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            os.replace(self.path, path)
+            self.path = path
+            self.connection = self._connect()
+
+    def close(self) -> None:
+        self.connection.close()
+
+
+class StoredListing():
+    """
+    The entries of one listing in an EntryStore, newest first. Iterating
+    runs the query again, streaming rows instead of building a list.
+    """
+    def __init__(self, store: EntryStore, key: str) -> None:
+        self.store = store
+        kind, _, name = key.partition(":")
+        if kind == "section":
+            self.where = "WHERE section = ?"
+        else:
+            self.where = "WHERE source IN (SELECT source FROM tags WHERE tag = ?)"
+        self.parameters = (name,)
+
+    def __iter__(self) -> Iterator[PageEntry]:
+        return self.store.query(self.where, self.parameters, ENTRY_ORDER)
+
+    def __len__(self) -> int:
+        return self.store.connection.execute(f"SELECT COUNT(*) FROM entries {self.where}", self.parameters).fetchone()[0]
+
+
+class StoredUrls():
+    def __init__(self, store: EntryStore) -> None:
+        self.store = store
+
+    def __contains__(self, url: object) -> bool:
+        return self.store.connection.execute("SELECT 1 FROM entries WHERE url = ?", (url,)).fetchone() is not None
+
+
+class DiskSiteIndex(SiteIndex):
+    """
+    A SiteIndex whose entries live in an EntryStore, for sites too large to
+    keep every page's metadata in memory (see --low-memory). Listings and
+    the feed are read back with ordered queries.
+
+    A new index starts from an empty store at store_path; save() moves it to
+    its final path, so an interrupted build never leaves a partial index
+    where the next build would take it for the previous one.
+    """
+    def __init__(self, dest_root: str, store_path: str) -> None:
+        super().__init__(dest_root)
+        if os.path.exists(store_path):
+            os.remove(store_path)
+        self.entries: EntryStore = EntryStore(store_path)
+
+    def listings(self) -> dict[str, Iterable[PageEntry]]:
+        listings: dict[str, Iterable[PageEntry]] = {}
+        connection = self.entries.connection
+        for (section,) in connection.execute("SELECT DISTINCT section FROM entries WHERE section != '' ORDER BY section").fetchall():
+            listings[f"section:{section}"] = StoredListing(self.entries, f"section:{section}")
+        for (tag,) in connection.execute("SELECT DISTINCT tag FROM tags ORDER BY tag").fetchall():
+            listings[f"tag:{tag}"] = StoredListing(self.entries, f"tag:{tag}")
+        return listings
+
+    def feed_entries(self, count: int) -> list[PageEntry]:
+        return list(self.entries.query("WHERE section != ''", (), ENTRY_ORDER, count))
+
+    def page_urls(self) -> Container[str]:
+        return StoredUrls(self.entries)
+
+    def listing_keys(self) -> set[str]:
+        keys = set(self.listings())
+        if any(key.startswith("section:") for key in keys):
+            keys.add("feed")
+        return keys
+
+    def save(self, path: str) -> None:
+        self.entries.set_setting("dest_root", self.dest_root)
+        self.entries.save_as(path)
+
+    def close(self) -> None:
+        self.entries.close()
+
+    @classmethod
+    def load(cls, path: str) -> "DiskSiteIndex | None":
+        """
+        Open an index saved by a previous build, or None if there is none.
+        """
+        if not os.path.isfile(path):
+            return None
+        try:
+            store = EntryStore(path)
+        except sqlite3.DatabaseError:
+            return None
+        try:
+            dest_root = store.setting("dest_root")
+        except sqlite3.DatabaseError:
+            dest_root = None
+        if dest_root is None:
+            store.close()
+            return None
+        index = cls.__new__(cls)
+        SiteIndex.__init__(index, dest_root)
+        index.entries = store
+        return index
@@ -0,0 +1,110 @@
+import os
+import time
+from collections.abc import Iterable
+from xml.sax.saxutils import escape
+
+MAX_URLS_PER_SITEMAP = 50000
+SITEMAP_NAMESPACE = "http://www.sitemaps.org/schemas/sitemap/0.9"
+
+
+def format_lastmod(timestamp: float) -> str:
+    return time.strftime("%Y-%m-%d", time.gmtime(timestamp))
+
+
+class SitemapWriter():
+    """
+    Streams <url> entries straight to disk, rolling over to a new sitemap
+    file every max_urls entries. Only the open file handle and a counter are
+    kept in memory, so the cost is flat in the number of pages.
+
+    A site that fits in one file gets a plain sitemap.xml. Bigger sites get
+    sitemap-1.xml, sitemap-2.xml, ... plus a sitemap.xml index pointing at them.
+    """
+    def __init__(self, dest_dir_path: str, site_url: str, basepath: str, max_urls: int = MAX_URLS_PER_SITEMAP) -> None:
+        if max_urls < 1:
+            raise ValueError("max_urls must be at least 1")
+        self.dest_dir_path = dest_dir_path
+        self.root_url = site_url.rstrip("/") + basepath.rstrip("/")
+        self.max_urls = max_urls
+        self.part_count = 0
+        self.url_count = 0
+        self._file = None
+        self._urls_in_part = 0
+        self._written: list[str] | None = None
+
+    def __enter__(self) -> "SitemapWriter":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+
+    def _part_path(self, part_number: int) -> str:
+        return os.path.join(self.dest_dir_path, f"sitemap-{part_number}.xml")
+
+    def _open_part(self) -> None:
+        self.part_count += 1
+        self._urls_in_part = 0
+        self._file = open(self._part_path(self.part_count), "w")
+        self._file.write('<?xml version="1.0" encoding="UTF-8"?>\n')
+        self._file.write(f'<urlset xmlns="{SITEMAP_NAMESPACE}">\n')
+
+    def _close_part(self) -> None:
+        self._file.write("</urlset>\n")
+        self._file.close()
+        self._file = None
+
+    def add(self, url: str, lastmod: str | None = None) -> None:
+        """
+        Add a site-relative URL such as '/blog/tom/'. The basepath and site
+        URL are prepended here.
+        """
+        if self._file is None or self._urls_in_part >= self.max_urls:
+            if self._file is not None:
+                self._close_part()
+            self._open_part()
+        self._file.write(f"  <url><loc>{escape(self.root_url + url)}</loc>")
+        if lastmod:
+            self._file.write(f"<lastmod>{lastmod}</lastmod>")
+        self._file.write("</url>\n")
+        self._urls_in_part += 1
+        self.url_count += 1
+
+    def close(self) -> list[str]:
+        """
+        Finish the last part and write the index if there is more than one.
+        Returns the files written.
+        """
+        if self._written is not None:
+            return self._written
+        sitemap_path = os.path.join(self.dest_dir_path, "sitemap.xml")
+        if self._file is None and self.part_count == 0:
+            self._open_part()
+        if self._file is not None:
+            self._close_part()
+        if self.part_count == 1:
+            os.replace(self._part_path(1), sitemap_path)
+            self._written = [sitemap_path]
+            return self._written
+
+        paths = [self._part_path(part_number) for part_number in range(1, self.part_count + 1)]
+        with open(sitemap_path, "w") as file_object:
+            file_object.write('<?xml version="1.0" encoding="UTF-8"?>\n')
+            file_object.write(f'<sitemapindex xmlns="{SITEMAP_NAMESPACE}">\n')
+            for path in paths:
+                loc = escape(f"{self.root_url}/{os.path.basename(path)}")
+                file_object.write(f"  <sitemap><loc>{loc}</loc></sitemap>\n")
+            file_object.write("</sitemapindex>\n")
+        self._written = paths + [sitemap_path]
+        return self._written
+
+
+def write_sitemap(entries: Iterable[tuple[str, str | None]], dest_dir_path: str, site_url: str, basepath: str, max_urls: int = MAX_URLS_PER_SITEMAP) -> list[str]:
+    """
+    Write sitemap.xml (and parts, if needed) for an iterable of
+    (site-relative url, lastmod) pairs. The iterable is consumed lazily.
+    """
+    os.makedirs(dest_dir_path, exist_ok=True)
+    writer = SitemapWriter(dest_dir_path, site_url, basepath, max_urls)
+    for url, lastmod in entries:
+        writer.add(url, lastmod)
+    return writer.close()
@@ -0,0 +1,82 @@
+import os
+import json
+import sqlite3
+from collections.abc import Iterator, MutableMapping
+
+
+def open_database(path: str) -> sqlite3.Connection:
+    """
+    Open (or create) an SQLite file of build state. Writes are not synced:
+    the state can always be rebuilt, and commits stay atomic as far as a
+    crashing build is concerned.
+    """
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    connection = sqlite3.connect(path)
+    try:
+        connection.execute("PRAGMA synchronous = OFF")
+    except sqlite3.DatabaseError:
+        connection.close()
+        raise
+    return connection
+
+
+class DiskMapping(MutableMapping):
+    """
+    A dict of JSON-serializable values kept in one table of an SQLite file,
+    so build state that grows with the size of the site stays out of memory
+    (see --low-memory). Values come back as they would from JSON: tuples
+    become lists. Changes are part of the connection's open transaction.
+    """
+    def __init__(self, connection: sqlite3.Connection, table: str) -> None:
+        self.connection = connection
+        self.table = table
+        connection.execute(f"CREATE TABLE IF NOT EXISTS {table} (key TEXT PRIMARY KEY, value TEXT)")
+
+    def __getitem__(self, key: str):
+        row = self.connection.execute(f"SELECT value FROM {self.table} WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            raise KeyError(key)
+        return json.loads(row[0])
+
+    def __setitem__(self, key: str, value) -> None:
+        self.connection.execute(f"INSERT OR REPLACE INTO {self.table} (key, value) VALUES (?, ?)", (key, json.dumps(value)))
+
+    def __delitem__(self, key: str) -> None:
+        if key not in self:
+            raise KeyError(key)
+        self.connection.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+
+    def __contains__(self, key: object) -> bool:
+        return self.connection.execute(f"SELECT 1 FROM {self.table} WHERE key = ?", (key,)).fetchone() is not None
+
+    def __iter__(self) -> Iterator[str]:
+        for (key,) in self.connection.execute(f"SELECT key FROM {self.table} ORDER BY key"):
+            yield key
+
+    def __len__(self) -> int:
+        return self.connection.execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()[0]
+
+
+def open_generations(connection: sqlite3.Connection) -> tuple["DiskMapping", "DiskMapping"]:
+    """
+    The previous and current tables of state that is kept for two builds
+    at a time. If the build that last opened the file saved (see
+    mark_complete), its current table becomes the previous one; if it never
+    saved, the last complete records stay in place.
+    """
+    connection.execute("CREATE TABLE IF NOT EXISTS settings (name TEXT PRIMARY KEY, value TEXT)")
+    complete = connection.execute("SELECT value FROM settings WHERE name = 'complete'").fetchone()
+    if complete is not None and complete[0] == "1":
+        connection.execute("DROP TABLE IF EXISTS previous")
+        connection.execute("ALTER TABLE current RENAME TO previous")
+    else:
+        connection.execute("DROP TABLE IF EXISTS current")
+    connection.execute("INSERT OR REPLACE INTO settings (name, value) VALUES ('complete', '0')")
+    generations = DiskMapping(connection, "previous"), DiskMapping(connection, "current")
+    connection.commit()
+    return generations
+
+
+def mark_complete(connection: sqlite3.Connection) -> None:
+    connection.execute("INSERT OR REPLACE INTO settings (name, value) VALUES ('complete', '1')")
+    connection.commit()
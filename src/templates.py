@@ -0,0 +1,177 @@
+import os
+import re
+from collections.abc import Callable, Iterable, Iterator
+
+# {% include "header.html" %} and {% extends "base.html" %} take a path
+# relative to the directory of the template that contains them; blocks
+# ({% block name %}...{% endblock %}) cannot be nested
+INCLUDE_RE = re.compile(r"""\{%\s*include\s+["']([^"']+)["']\s*%\}""")
+EXTENDS_RE = re.compile(r"""^\s*\{%\s*extends\s+["']([^"']+)["']\s*%\}""")
+BLOCK_RE = re.compile(r"\{%\s*block\s+(\w+)\s*%\}(.*?)\{%\s*endblock(?:\s+\1)?\s*%\}", re.DOTALL)
+VARIABLE_RE = re.compile(r"\{\{\s*(\w+)\s*\}\}")
+LAYOUTS_DIR = "layouts"
+
+_compiled_cache: dict[str, "CompiledTemplate"] = {}
+
+
+class CompiledTemplate():
+    """
+    A template with its includes and parent layouts resolved, split once
+    into literal text and {{ Variable }} slots. render() only walks that
+    list, so rendering a page never touches the template files.
+
+    inputs maps every file the template was built from to its mtime_ns,
+    which is how the cache tells whether it is still current.
+    """
+    def __init__(self, path: str | None, source: str, inputs: dict[str, int] | None = None) -> None:
+        self.path = path
+        self.source = source
+        self.inputs = inputs or {}
+        # even indexes are literal text, odd indexes variable names
+        self.segments: list[str] = VARIABLE_RE.split(source)
+        self._variants: dict[Callable[[str], str], CompiledTemplate] = {}
+
+    def render(self, variables: dict[str, str | Iterable[str]]) -> Iterator[str]:
+        """
+        Yield the page as chunks. A variable may be a string or an iterable
+        of chunks, which is streamed through without being joined; unknown
+        variables are left in place.
+        """
+        segments = self.segments
+        for index in range(0, len(segments), 2):
+            if segments[index]:
+                yield segments[index]
+            if index + 1 < len(segments):
+                name = segments[index + 1]
+                value = variables.get(name)
+                if value is None:
+                    yield f"{{{{ {name} }}}}"
+                elif isinstance(value, str):
+                    yield value
+                else:
+                    yield from value
+
+    def render_string(self, variables: dict[str, str | Iterable[str]]) -> str:
+        return "".join(self.render(variables))
+
+    def has_slot(self, name: str) -> bool:
+        return name in self.segments[1::2]
+
+    def transformed(self, transform: Callable[[str], str]) -> "CompiledTemplate":
+        """
+        This template with transform applied to its source (minification,
+        say), compiled once and kept alongside the original.
+        """
+        variant = self._variants.get(transform)
+        if variant is None:
+            variant = CompiledTemplate(self.path, transform(self.source), self.inputs)
+            self._variants[transform] = variant
+        return variant
+
+    def is_current(self) -> bool:
+        for path, mtime_ns in self.inputs.items():
+            try:
+                if os.stat(path).st_mtime_ns != mtime_ns:
+                    return False
+            except OSError:
+                return False
+        return True
+
+
+def _read_template(path: str, inputs: dict[str, int], stack: tuple[str, ...]) -> str:
+    """
+    Source of the template at path with includes expanded and, if it
+    extends a parent, its blocks substituted into the parent's. Block tags
+    are kept so a further child can still override them.
+    """
+    path = os.path.abspath(path)
+    if path in stack:
+        chain = " -> ".join(stack + (path,))
+        raise ValueError(f"Template includes itself: {chain}")
+    stack = stack + (path,)
+    inputs[path] = os.stat(path).st_mtime_ns
+    with open(path, "r") as file_object:
+        text = file_object.read()
+    base_dir = os.path.dirname(path)
+
+    def include(match: re.Match) -> str:
+        return _read_template(os.path.join(base_dir, match.group(1)), inputs, stack)
+
+    text = INCLUDE_RE.sub(include, text)
+    extends = EXTENDS_RE.match(text)
+    if extends is None:
+        return text
+    overrides = {match.group(1): match.group(2) for match in BLOCK_RE.finditer(text)}
+    parent = _read_template(os.path.join(base_dir, extends.group(1)), inputs, stack)
+
+    def override(match: re.Match) -> str:
+        name = match.group(1)
+        body = overrides.get(name, match.group(2))
+        return f"{{% block {name} %}}{body}{{% endblock %}}"
+
+    return BLOCK_RE.sub(override, parent)
+
+
+def compile_template(source: str, path: str | None = None, inputs: dict[str, int] | None = None) -> CompiledTemplate:
+    """
+    Compile already-resolved template source; remaining block tags are
+    dropped and their content kept.
+    """
+    return CompiledTemplate(path, BLOCK_RE.sub(lambda match: match.group(2), source), inputs)
+
+
+def load_template(path: str) -> CompiledTemplate:
+    """
+    Compiled template for path. Results are cached for the life of the
+    process and reused as long as neither the file nor anything it
+    includes or extends has a new mtime.
+    """
+    key = os.path.abspath(path)
+    cached = _compiled_cache.get(key)
+    if cached is not None and cached.is_current():
+        return cached
+    inputs: dict[str, int] = {}
+    source = _read_template(key, inputs, ())
+    compiled = compile_template(source, key, inputs)
+    _compiled_cache[key] = compiled
+    return compiled
+
+
+def layout_candidates(source_path: str, content_root: str | None, metadata: dict[str, str], default_template: str) -> list[str]:
+    """
+    Templates that could apply to a page, most specific first, ending with
+    the default. A "layout" front matter key names a file in the layouts
+    directory next to the default template; otherwise layouts/<dir>.html
+    applies to every page under content/<dir>, with deeper directories
+    taking precedence (layouts/blog/tom.html over layouts/blog.html).
+    """
+    layouts_dir = os.path.join(os.path.dirname(default_template), LAYOUTS_DIR)
+    candidates: list[str] = []
+    layout = metadata.get("layout", "").strip()
+    if layout:
+        if not os.path.splitext(layout)[1]:
+            layout += ".html"
+        candidates.append(os.path.join(layouts_dir, layout))
+    if content_root is not None:
+        rel_dir = os.path.relpath(os.path.dirname(source_path), content_root)
+        parts = [] if rel_dir == os.curdir else rel_dir.split(os.sep)
+        while parts:
+            candidates.append(os.path.join(layouts_dir, *parts) + ".html")
+            parts.pop()
+    candidates.append(default_template)
+    return candidates
+
+
+def select_layout(source_path: str, content_root: str | None, metadata: dict[str, str], default_template: str) -> tuple[str, list[str]]:
+    """
+    The template to render a page with, and the more specific candidates
+    that were looked for and do not exist (creating one of them changes
+    which layout the page gets).
+    """
+    candidates = layout_candidates(source_path, content_root, metadata, default_template)
+    if metadata.get("layout", "").strip() and not os.path.isfile(candidates[0]):
+        raise ValueError(f"Layout '{metadata['layout']}' of {source_path} not found: {candidates[0]}")
+    for index, candidate in enumerate(candidates[:-1]):
+        if os.path.isfile(candidate):
+            return candidate, candidates[:index]
+    return default_template, candidates[:-1]
@@ -0,0 +1,118 @@
+import os
+import tempfile
+import unittest
+
+from block_cache import BlockCache
+from blocknode import Block, BlockType
+from html_emitter import HTMLEmitter
+from markdown_to_html import PARSER_VERSION
+from markdown_blocks import parse_blocks
+from test_html_emitter import corpus, tree_chunks
+
+
+def cached_chunks(markdown: str, cache: BlockCache) -> list[str] | type:
+    try:
+        return HTMLEmitter(block_cache=cache).render(markdown)
+    except ValueError:
+        return ValueError
+
+
+class TestBlockCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.path = os.path.join(self.tmp.name, "cache", "blocks.marshal")
+
+    def test_matches_tree_on_corpus(self):
+        cache = BlockCache(self.path, PARSER_VERSION)
+        for markdown in corpus():
+            with self.subTest(markdown=markdown[:60]):
+                expected = tree_chunks(markdown)
+                self.assertEqual(cached_chunks(markdown, cache), expected)
+                self.assertEqual(cached_chunks(markdown, cache), expected)
+        self.assertGreater(cache.hits, 100)
+
+    def test_edit_renders_only_changed_block(self):
+        cache = BlockCache(self.path, PARSER_VERSION)
+        page = "# Runbook\n\nFirst *step*.\n\n- a\n- b\n\n```python\nx = 1\n```\n\nLast step."
+        cache.start_page()
+        cached_chunks(page, cache)
+        self.assertEqual((cache.last_hits, cache.last_misses), (0, 4))
+        edited = page.replace("Last step.", "Last step, edited.")
+        cache.start_page()
+        self.assertEqual(cached_chunks(edited, cache), tree_chunks(edited))
+        self.assertEqual((cache.last_hits, cache.last_misses), (3, 1))
+        self.assertEqual(cache.finish_page("runbook.html"), 0.75)
+        self.assertEqual(cache.page_ratios, {"runbook.html": 0.75})
+
+    def test_headings_are_not_cached(self):
+        cache = BlockCache(self.path, PARSER_VERSION)
+        cache.start_page()
+        self.assertEqual(cached_chunks("# A\n\n# A", cache), tree_chunks("# A\n\n# A"))
+        self.assertEqual(len(cache.entries), 0)
+        self.assertIsNone(cache.finish_page("page.html"))
+
+    def test_key_covers_type_text_and_structure(self):
+        cache = BlockCache(self.path, PARSER_VERSION)
+        keys = [
+            cache.key(Block(BlockType.PARAGRAPH, ["a", "b"])),
+            cache.key(Block(BlockType.PARAGRAPH, ["a b"])),
+            cache.key(Block(BlockType.CODE, ["a", "b"])),
+            cache.key(Block(BlockType.CODE, ["a", "b"], info="```python")),
+            cache.key(Block(BlockType.QUOTE, children=[Block(BlockType.PARAGRAPH, ["a"]), Block(BlockType.PARAGRAPH, ["b"])])),
+            cache.key(Block(BlockType.QUOTE, children=[Block(BlockType.QUOTE, children=[Block(BlockType.PARAGRAPH, ["a"]), Block(BlockType.PARAGRAPH, ["b"])])])),
+            BlockCache(self.path, PARSER_VERSION + 1).key(Block(BlockType.PARAGRAPH, ["a", "b"])),
+        ]
+        self.assertEqual(len(set(keys)), len(keys))
+        self.assertEqual(keys[0], cache.key(Block(BlockType.PARAGRAPH, ["a", "b"])))
+        self.assertEqual(keys[2][0], "code")
+
+    def test_images_skipped_with_image_props(self):
+        cache = BlockCache(self.path, PARSER_VERSION)
+        markdown = "![a](/a.png)\n\n- ![b](/b.png)\n\ntext"
+        HTMLEmitter(lambda props: None, cache).render(markdown)
+        self.assertEqual(len(cache.entries), 1)
+        self.assertIsNone(cache.key(parse_blocks(markdown)[1], skip_images=True))
+        HTMLEmitter(block_cache=cache).render(markdown)
+        self.assertEqual(len(cache.entries), 3)
+
+    def test_least_recently_used_are_evicted(self):
+        cache = BlockCache(self.path, PARSER_VERSION, max_entries=2)
+        cached_chunks("a\n\nb", cache)
+        cached_chunks("a", cache)
+        cached_chunks("c", cache)
+        self.assertEqual(cache.evictions, 1)
+        self.assertEqual(cache.hits, 1)
+        cached_chunks("a", cache)
+        self.assertEqual(cache.hits, 2)
+        cached_chunks("b", cache)
+        self.assertEqual(cache.hits, 2)
+
+    def test_save_and_load(self):
+        cache = BlockCache(self.path, PARSER_VERSION)
+        cached_chunks("a\n\nb\n\nc", cache)
+        cached_chunks("a", cache)
+        cache.save()
+        loaded = BlockCache(self.path, PARSER_VERSION)
+        self.assertEqual(loaded.entries, cache.entries)
+        self.assertEqual(list(loaded.entries), list(cache.entries))
+        self.assertEqual(list(BlockCache(self.path, PARSER_VERSION, max_entries=2).entries), list(cache.entries)[1:])
+        with open(self.path, "wb") as file_object:
+            file_object.write(b"not marshal")
+        self.assertEqual(len(BlockCache(self.path, PARSER_VERSION).entries), 0)
+
+    def test_describe(self):
+        cache = BlockCache(self.path, PARSER_VERSION)
+        self.assertEqual(cache.describe(), "Block cache: 0 hits, 0 misses (0.0% hit rate), 0 evictions")
+        for page, markdown in (("a.html", "x\n\ny"), ("b.html", "x\n\nz"), ("c.html", "x\n\ny")):
+            cache.start_page()
+            cached_chunks(markdown, cache)
+            cache.finish_page(page)
+        self.assertIn("3 hits, 3 misses (50.0% hit rate)", cache.describe())
+        self.assertIn("per-page hit ratio min 0%, median 50%", cache.describe())
+        cache.reset_stats()
+        self.assertEqual((cache.hits, cache.misses, cache.page_ratios), (0, 0, {}))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,91 @@
+import os
+import tempfile
+import unittest
+
+from cssbundle import CssBundleCache, bundle_css, find_entry_stylesheets, minify_css, publish_css_bundles
+from fingerprint import AssetHashCache, AssetManifest
+from fixtures import write_file
+
+
+class TestCssBundle(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.static = os.path.join(self.tmp.name, "static")
+        self.write("index.css", '@import "base.css";\n@import url("print.css") print;\n@import url(https://fonts.example.com/a.css);\nbody { color : red; }\n')
+        self.write("base.css", "/* base */\n@import 'index.css';\nh1 {\n  margin: 0 auto;\n}\n")
+        self.write("print.css", "a::after { content: ' ( see ; this ) '; }\n")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, rel_path: str, text: str) -> None:
+        write_file(os.path.join(self.static, rel_path), text)
+
+    def test_minify_css(self):
+        css = "/* drop */\n/*! keep */\na > b ,  c:hover {\n  color: red;\n  margin : 0 auto;\n  width: calc(1px + 2px);\n}\n"
+        self.assertEqual(minify_css(css), "/*! keep */ a>b,c:hover{color:red;margin :0 auto;width:calc(1px + 2px)}")
+
+    def test_minify_css_keeps_strings(self):
+        self.assertEqual(minify_css("a { content: '  a ;  b  '; }"), "a{content:'  a ;  b  '}")
+
+    def test_comments_inside_strings_are_kept(self):
+        css = 'a::before { content: "/* keep */"; } /* drop */ b::after { content: \'it\\\'s /* too */\'; }'
+        self.assertEqual(minify_css(css), 'a::before{content:"/* keep */"}b::after{content:\'it\\\'s /* too */\'}')
+        self.write("strings.css", css)
+        text, _ = bundle_css(os.path.join(self.static, "strings.css"))
+        self.assertIn('"/* keep */"', text)
+        self.assertIn("/* too */", text)
+        self.assertNotIn("drop", text)
+
+    def test_bundle_rebases_urls_of_imports_from_other_directories(self):
+        self.write("css/main.css", '@import "../parts/a.css";\nbody { background: url(main.png); }\n')
+        self.write("parts/a.css", '@import "nested/b.css";\nh1 { background: url(bg.png); }\n.x { background: url("img/x.svg#icon") url(/abs.png) url(data:image/png;base64,AA==) url(https://cdn.example.com/c.png); }\n')
+        self.write("parts/nested/b.css", "h2 { background: url('../../images/b.png?v=2'); }\n")
+        text, _ = bundle_css(os.path.join(self.static, "css", "main.css"))
+        self.assertIn("url(../parts/bg.png)", text)
+        self.assertIn('url("../parts/img/x.svg#icon")', text)
+        self.assertIn("url('../images/b.png?v=2')", text)
+        self.assertIn("url(main.png)", text)
+        self.assertIn("url(/abs.png) url(data:image/png;base64,AA==) url(https://cdn.example.com/c.png)", text)
+
+    def test_bundle_follows_imports_once(self):
+        text, inputs = bundle_css(os.path.join(self.static, "index.css"))
+        self.assertEqual([os.path.basename(path) for path in inputs], ["index.css", "base.css", "print.css"])
+        self.assertTrue(text.startswith("@import url(https://fonts.example.com/a.css);"))
+        self.assertLess(text.index("h1"), text.index("body"))
+        self.assertIn("@media print{", text)
+        self.assertNotIn("base.css", text)
+
+    def test_find_entry_stylesheets(self):
+        self.write("other.css", "p { color: blue; }")
+        entries = [os.path.basename(path) for path in find_entry_stylesheets(self.static)]
+        self.assertEqual(entries, ["other.css"])
+
+    def test_publish_uses_cache(self):
+        os.remove(os.path.join(self.static, "base.css"))
+        self.write("base.css", "h1 { margin: 0; }")
+        cache_dir = os.path.join(self.tmp.name, "cache")
+        dest = os.path.join(self.tmp.name, "docs")
+        hash_cache = AssetHashCache(os.path.join(cache_dir, "hashes.json"))
+
+        manifest = AssetManifest(self.static, hash_cache)
+        bundle_cache = CssBundleCache(cache_dir, hash_cache)
+        published = publish_css_bundles(self.static, dest, manifest, bundle_cache)
+        self.assertEqual(len(published), 1)
+        self.assertRegex(manifest.urls["/index.css"], r"^/index\.[0-9a-f]{8}\.css$")
+        self.assertEqual(bundle_cache.misses, 1)
+
+        second_cache = CssBundleCache(cache_dir, hash_cache)
+        publish_css_bundles(self.static, dest, AssetManifest(self.static, hash_cache), second_cache)
+        self.assertEqual((second_cache.hits, second_cache.misses), (1, 0))
+
+        self.write("base.css", "h1 { margin: 1px; }")
+        third_cache = CssBundleCache(cache_dir, hash_cache)
+        third_manifest = AssetManifest(self.static, hash_cache)
+        publish_css_bundles(self.static, dest, third_manifest, third_cache)
+        self.assertEqual(third_cache.misses, 1)
+        self.assertNotEqual(third_manifest.urls["/index.css"], manifest.urls["/index.css"])
+
+
+if __name__ == "__main__":
+    unittest.main()
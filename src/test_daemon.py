@@ -0,0 +1,105 @@
+import os
+import sys
+import tempfile
+import threading
+import unittest
+
+from daemon import DaemonServer, WarmCaches, is_running, send_request
+from htmlnode import LeafNode
+from markdown_to_html import PARSER_VERSION
+
+
+class TestDaemonServer(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.socket_path = os.path.join(self.tmp.name, "state", "daemon.sock")
+        self.calls = []
+
+        def echo(request):
+            self.calls.append(request)
+            print("working")
+            print("warning", file=sys.stderr)
+            return {"value": request.get("value")}
+
+        def fail(request):
+            raise ValueError("broken page")
+
+        def bad_arguments(request):
+            sys.exit(2)
+
+        self.server = DaemonServer(self.socket_path, {"echo": echo, "fail": fail, "exit": bad_arguments})
+        self.thread = threading.Thread(target=self.server.serve_until_stopped)
+        self.thread.start()
+        self.addCleanup(self.stop)
+
+    def stop(self):
+        if self.thread.is_alive():
+            send_request(self.socket_path, {"command": "stop"})
+        self.thread.join(5)
+
+    def test_handler_result_and_output(self):
+        response = send_request(self.socket_path, {"command": "echo", "value": [1, "two"]})
+        self.assertEqual(response, {"ok": True, "value": [1, "two"], "output": "working\nwarning\n"})
+        self.assertEqual(self.calls, [{"command": "echo", "value": [1, "two"]}])
+
+    def test_errors_fail_the_request_not_the_daemon(self):
+        self.assertEqual(send_request(self.socket_path, {"command": "fail"})["error"], "ValueError: broken page")
+        self.assertEqual(send_request(self.socket_path, {"command": "exit"})["error"], "exit status 2")
+        response = send_request(self.socket_path, {"command": "unknown"})
+        self.assertFalse(response["ok"])
+        self.assertIn("available: ping, stop, echo, fail, exit", response["error"])
+        self.assertTrue(send_request(self.socket_path, {"command": "echo"})["ok"])
+
+    def test_stop_removes_socket(self):
+        self.assertTrue(is_running(self.socket_path))
+        self.assertEqual(send_request(self.socket_path, {"command": "stop"})["output"], "Daemon stopping\n")
+        self.thread.join(5)
+        self.assertFalse(self.thread.is_alive())
+        self.assertFalse(os.path.exists(self.socket_path))
+        self.assertFalse(is_running(self.socket_path))
+
+    def test_second_daemon_on_same_socket_is_refused(self):
+        with self.assertRaises(ValueError):
+            DaemonServer(self.socket_path, {})
+
+
+class TestWarmCaches(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+
+    def test_caches_are_reused_with_fresh_counters(self):
+        warm = WarmCaches()
+        path = os.path.join(self.tmp.name, "asset_hashes.json")
+        source = os.path.join(self.tmp.name, "a.css")
+        with open(source, "w") as file_object:
+            file_object.write("body {}")
+        hash_cache = warm.hash_cache(path)
+        hash_cache.get_hash(source)
+        self.assertIs(warm.hash_cache(path), hash_cache)
+        self.assertEqual((hash_cache.hits, hash_cache.misses), (0, 0))
+        hash_cache.get_hash(source)
+        self.assertEqual(hash_cache.hits, 1)
+
+        cache_dir = os.path.join(self.tmp.name, "parse")
+        parse_cache = warm.parse_cache(cache_dir, PARSER_VERSION)
+        self.assertIs(warm.parse_cache(cache_dir, PARSER_VERSION), parse_cache)
+        self.assertIsNot(warm.parse_cache(cache_dir, PARSER_VERSION + 1), parse_cache)
+
+        interner = warm.interner(10)
+        interner.intern(LeafNode(None, "x"))
+        interner.intern(LeafNode(None, "x"))
+        self.assertIs(warm.interner(20), interner)
+        self.assertEqual((interner.max_entries, interner.lookups, interner.hits, len(interner.nodes)), (20, 0, 0, 1))
+
+        block_path = os.path.join(self.tmp.name, "blocks.marshal")
+        block_cache = warm.block_cache(block_path, PARSER_VERSION, 10)
+        block_cache.hits = 1
+        self.assertIs(warm.block_cache(block_path, PARSER_VERSION, 20), block_cache)
+        self.assertEqual((block_cache.max_entries, block_cache.hits), (20, 0))
+        self.assertIsNot(warm.block_cache(block_path, PARSER_VERSION + 1, 20), block_cache)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,146 @@
+import os
+import tempfile
+import unittest
+
+from build_context import BuildContext
+from depgraph import DependencyGraph, DiskDependencyGraph, describe_input
+from markdown_to_html import generate_pages_recursive
+from site_index import SiteIndex, DiskSiteIndex
+from fixtures import write_file
+
+
+class TestDependencyGraph(unittest.TestCase):
+    graph_class = DependencyGraph
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.content = os.path.join(self.tmp.name, "content")
+        self.public = os.path.join(self.tmp.name, "public")
+        self.template = os.path.join(self.tmp.name, "template.html")
+        self.graph_path = os.path.join(self.tmp.name, "cache", "depgraph.json")
+        self.index_path = os.path.join(self.tmp.name, "cache", "index.json")
+        write_file(self.template, "<title>{{ Title }}</title>{{ Content }}")
+        write_file(os.path.join(self.content, "index.md"), "# Home")
+        write_file(os.path.join(self.content, "blog", "a", "index.md"), "# A")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def open_indexes(self) -> tuple[SiteIndex, SiteIndex | None]:
+        return SiteIndex(self.public), SiteIndex.load(self.index_path)
+
+    def build(self, basepath: str = "/") -> BuildContext:
+        site_index, previous_index = self.open_indexes()
+        context = BuildContext(
+            site_index=site_index,
+            graph=self.graph_class(self.graph_path),
+            previous_index=previous_index,
+        )
+        context.config = {"basepath": basepath}
+        generate_pages_recursive(self.content, self.template, self.public, basepath, context)
+        context.graph.remove_stale_outputs()
+        context.graph.save()
+        context.site_index.save(self.index_path)
+        self.addCleanup(self.close, context)
+        return context
+
+    def close(self, context: BuildContext) -> None:
+        pass
+
+    def test_describe_input(self):
+        self.assertEqual(describe_input("file:template.html"), "file 'template.html'")
+        self.assertEqual(describe_input("config:basepath"), "setting 'basepath'")
+
+    def test_first_build_builds_everything(self):
+        context = self.build()
+        self.assertEqual((context.rebuilt, context.skipped), (2, 0))
+
+    def test_unchanged_build_skips_everything(self):
+        self.build()
+        context = self.build()
+        self.assertEqual((context.rebuilt, context.skipped), (0, 2))
+        self.assertEqual(len(context.site_index.entries), 2)
+
+    def test_source_change_rebuilds_only_that_page(self):
+        self.build()
+        write_file(os.path.join(self.content, "blog", "a", "index.md"), "# A (edited)")
+        context = self.build()
+        self.assertEqual((context.rebuilt, context.skipped), (1, 1))
+        self.assertEqual(context.site_index.entries[os.path.join(self.content, "blog", "a", "index.md")].title, "A (edited)")
+
+    def test_template_change_rebuilds_every_page(self):
+        self.build()
+        write_file(self.template, "<h1>{{ Title }}</h1>{{ Content }}")
+        self.assertEqual(self.build().rebuilt, 2)
+
+    def test_config_change_rebuilds_every_page(self):
+        self.build()
+        self.assertEqual(self.build("/site/").rebuilt, 2)
+
+    def test_missing_output_is_rebuilt(self):
+        self.build()
+        os.remove(os.path.join(self.public, "index.html"))
+        graph = self.graph_class(self.graph_path)
+        self.assertEqual(graph.rebuild_reasons(os.path.join(self.public, "index.html"), lambda key: ""), ["output is missing"])
+        if isinstance(graph, DiskDependencyGraph):
+            graph.close()
+        self.assertEqual(self.build().rebuilt, 1)
+
+    def test_deleted_source_output_is_removed(self):
+        self.build()
+        os.remove(os.path.join(self.content, "blog", "a", "index.md"))
+        self.build()
+        self.assertFalse(os.path.exists(os.path.join(self.public, "blog", "a", "index.html")))
+        self.assertFalse(os.path.exists(os.path.join(self.public, "blog", "a")))
+
+    def test_rebuild_reasons_name_changed_inputs(self):
+        graph = DependencyGraph()
+        output = os.path.join(self.tmp.name, "out.html")
+        write_file(output, "")
+        graph.previous[output] = {"file:a.md": "1", "config:basepath": "/"}
+        reasons = graph.rebuild_reasons(output, {"file:a.md": "2", "config:basepath": "/"}.get)
+        self.assertEqual(reasons, ["file 'a.md' changed"])
+
+    def test_inputs_of_unknown_kinds_rebuild(self):
+        graph = DependencyGraph()
+        output = os.path.join(self.tmp.name, "out.html")
+        write_file(output, "")
+        graph.previous[output] = {"file:a.md": "1", "meta:a.md": "1"}
+        self.assertEqual(graph.rebuild_reasons(output, {"file:a.md": "1"}.__getitem__), ["meta 'a.md' is no longer tracked"])
+
+
+class TestDiskDependencyGraph(TestDependencyGraph):
+    """
+    The same builds with the graph and index kept in SQLite (--low-memory).
+    """
+    graph_class = DiskDependencyGraph
+
+    def setUp(self):
+        super().setUp()
+        self.graph_path = os.path.join(self.tmp.name, "cache", "depgraph.db")
+        self.index_path = os.path.join(self.tmp.name, "cache", "index.db")
+
+    def open_indexes(self) -> tuple[SiteIndex, SiteIndex | None]:
+        return DiskSiteIndex(self.public, self.index_path + ".new"), DiskSiteIndex.load(self.index_path)
+
+    def close(self, context: BuildContext) -> None:
+        context.graph.close()
+        context.site_index.close()
+        if context.previous_index is not None:
+            context.previous_index.close()
+
+    def test_unsaved_build_keeps_previous_records(self):
+        self.build()
+        graph = DiskDependencyGraph(self.graph_path)
+        graph.record("unsaved.html", {})
+        graph.connection.commit()
+        graph.close()
+        graph = DiskDependencyGraph(self.graph_path)
+        self.assertEqual(len(graph.previous), 2)
+        self.assertNotIn("unsaved.html", graph.previous)
+        self.assertEqual(len(graph.current), 0)
+        graph.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
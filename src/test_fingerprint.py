@@ -0,0 +1,64 @@
+import os
+import tempfile
+import unittest
+
+from copystatic import copy_files_recursive
+from fingerprint import AssetHashCache, AssetManifest, fingerprinted_name
+
+
+class TestFingerprint(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.static = os.path.join(self.tmp.name, "static")
+        os.makedirs(os.path.join(self.static, "images"))
+        with open(os.path.join(self.static, "index.css"), "w") as file_object:
+            file_object.write("body { color: red; }")
+        with open(os.path.join(self.static, "images", "tom.png"), "wb") as file_object:
+            file_object.write(b"not really a png")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_fingerprinted_name(self):
+        self.assertEqual(fingerprinted_name("index.css", "3f2a9c1d0000"), "index.3f2a9c1d.css")
+        self.assertEqual(fingerprinted_name("LICENSE", "3f2a9c1d0000"), "LICENSE.3f2a9c1d")
+
+    def test_copy_publishes_hashed_names(self):
+        manifest = AssetManifest(self.static)
+        dest = os.path.join(self.tmp.name, "public")
+        copy_files_recursive(self.static, dest, manifest=manifest)
+        css_url = manifest.urls["/index.css"]
+        png_url = manifest.urls["/images/tom.png"]
+        self.assertRegex(css_url, r"^/index\.[0-9a-f]{8}\.css$")
+        self.assertRegex(png_url, r"^/images/tom\.[0-9a-f]{8}\.png$")
+        self.assertTrue(os.path.exists(os.path.join(dest, css_url.lstrip("/"))))
+        self.assertFalse(os.path.exists(os.path.join(dest, "index.css")))
+
+    def test_rewrite_html(self):
+        manifest = AssetManifest(self.static)
+        manifest.urls = {"/index.css": "/index.abc.css", "/images/tom.png": "/images/tom.def.png"}
+        html = '<link href="/index.css" rel="stylesheet" /><img src="/images/tom.png?v=1" alt="x"><a href="/blog/">b</a><a href="https://x.com/index.css">'
+        self.assertEqual(
+            manifest.rewrite_html(html),
+            '<link href="/index.abc.css" rel="stylesheet" /><img src="/images/tom.def.png?v=1" alt="x"><a href="/blog/">b</a><a href="https://x.com/index.css">',
+        )
+
+    def test_hash_cache_reuses_by_size_and_mtime(self):
+        cache_path = os.path.join(self.tmp.name, "cache", "hashes.json")
+        css_path = os.path.join(self.static, "index.css")
+        cache = AssetHashCache(cache_path)
+        digest = cache.get_hash(css_path)
+        cache.save()
+
+        reloaded = AssetHashCache(cache_path)
+        self.assertEqual(reloaded.get_hash(css_path), digest)
+        self.assertEqual((reloaded.hits, reloaded.misses), (1, 0))
+
+        with open(css_path, "w") as file_object:
+            file_object.write("body { color: blue; }")
+        self.assertNotEqual(reloaded.get_hash(css_path), digest)
+        self.assertEqual(reloaded.misses, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
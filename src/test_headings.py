@@ -0,0 +1,43 @@
+import unittest
+
+from headings import HeadingIds, slugify, toc_html, toc_to_html_node
+from htmlnode import LeafNode, ParentNode
+
+
+class TestHeadings(unittest.TestCase):
+    def test_slugify(self):
+        self.assertEqual(slugify("Why Tom's Hat?"), "why-toms-hat")
+        self.assertEqual(slugify("  Élan _and_ vigour -- 2 "), "élan-and-vigour-2")
+        self.assertEqual(slugify("?!"), "section")
+
+    def test_slugify_is_memoized(self):
+        slugify.cache_clear()
+        slugify("Introduction")
+        slugify("Introduction")
+        self.assertEqual(slugify.cache_info().hits, 1)
+
+    def test_heading_ids_keep_existing_props(self):
+        heading_ids = HeadingIds()
+        node = ParentNode("h2", [LeafNode(None, "A &amp; B")], {"class": "x"})
+        heading_ids.assign(node)
+        self.assertEqual(node.props, {"class": "x", "id": "a-b"})
+
+    def test_heading_ids_take_the_first_free_suffix(self):
+        heading_ids = HeadingIds()
+        claimed = [heading_ids.claim(text) for text in ("Intro", "Intro-2", "Intro", "Intro", "Intro", "Intro-1")]
+        self.assertEqual(claimed, ["intro", "intro-2", "intro-1", "intro-3", "intro-4", "intro-1-1"])
+
+    def test_toc_nesting(self):
+        entries = [(1, "title", "Title"), (3, "deep", "Deep"), (2, "two", "Two"), (4, "four", "Four"), (2, "next", "Next")]
+        self.assertEqual(
+            toc_html(entries),
+            '<nav class="toc"><ul><li><a href="#deep">Deep</a></li>'
+            '<li><a href="#two">Two</a><ul><li><a href="#four">Four</a></li></ul></li>'
+            '<li><a href="#next">Next</a></li></ul></nav>',
+        )
+        self.assertIsNone(toc_to_html_node([(1, "title", "Title")]))
+        self.assertEqual(toc_html([]), "")
+
+
+if __name__ == "__main__":
+    unittest.main()
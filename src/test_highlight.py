@@ -0,0 +1,71 @@
+import os
+import tempfile
+import unittest
+
+from highlight import HighlightCache, highlight, highlight_generic, highlight_python, normalize_language
+from markdown_to_html import markdown_to_html_node
+
+
+class TestHighlight(unittest.TestCase):
+    def test_normalize_language(self):
+        self.assertEqual(normalize_language("Python title=x"), "python")
+        self.assertEqual(normalize_language("py"), "python")
+        self.assertEqual(normalize_language("  "), "")
+        self.assertEqual(normalize_language("C++"), "c++")
+        self.assertEqual(normalize_language('x"><script>alert(1)</script>'), "")
+
+    def test_python_tokens(self):
+        self.assertEqual(
+            highlight_python("def f(x):\n    return len(x) + 1  # one\n"),
+            '<span class="k">def</span> <span class="nf">f</span><span class="o">(</span>x<span class="o">)</span><span class="o">:</span>\n'
+            '    <span class="k">return</span> <span class="nb">len</span><span class="o">(</span>x<span class="o">)</span> '
+            '<span class="o">+</span> <span class="m">1</span>  <span class="c"># one</span>\n',
+        )
+
+    def test_python_escapes_markup(self):
+        self.assertEqual(highlight_python('s = "<b>"\n'), 's <span class="o">=</span> <span class="s">"&lt;b&gt;"</span>\n')
+
+    def test_invalid_python_falls_back_to_generic(self):
+        code = 'print("unterminated\n'
+        self.assertEqual(highlight(code, "python"), highlight_generic(code))
+
+    def test_generic_tokens(self):
+        self.assertEqual(
+            highlight_generic('const x = "a"; // note\n'),
+            '<span class="k">const</span> x = <span class="s">"a"</span>; <span class="c">// note</span>\n',
+        )
+
+    def test_highlight_preserves_text(self):
+        code = "class A:\n    @staticmethod\n    def f(): pass\n\n\nx = f'{1}' if True else 0x1F\n"
+        for language in ("python", "text"):
+            markup = highlight(code, language)
+            text = markup.replace('</span>', '')
+            while '<span class="' in text:
+                start = text.index('<span class="')
+                text = text[:start] + text[text.index('">', start) + 2:]
+            self.assertEqual(text, code)
+
+    def test_cache_hits_and_save(self):
+        cache = HighlightCache()
+        first = cache.highlight("x = 1\n", "python")
+        self.assertEqual(cache.highlight("x = 1\n", "python"), first)
+        cache.highlight("x = 1\n", "ruby")
+        self.assertEqual((cache.hits, cache.misses), (1, 2))
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "highlight.json")
+            cache.save(path)
+            reloaded = HighlightCache()
+            reloaded.load(path)
+            self.assertEqual(reloaded.highlight("x = 1\n", "python"), first)
+            self.assertEqual((reloaded.hits, reloaded.misses), (1, 0))
+
+    def test_fenced_block_with_language(self):
+        node = markdown_to_html_node("```python\nx = None\n```")
+        self.assertEqual(
+            node.to_html(),
+            '<div><pre><code class="language-python">x <span class="o">=</span> <span class="k">None</span>\n</code></pre></div>',
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
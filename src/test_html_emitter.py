@@ -0,0 +1,125 @@
+import os
+import ast
+import struct
+import tempfile
+import unittest
+from html_emitter import HTMLEmitter, markdown_to_html
+from markdown_to_html import iter_blocks_html, markdown_to_html_node
+from markdown_blocks import iter_blocks
+from headings import heading_entries
+from image_dimensions import annotate_images, annotate_image_props
+from site_index import parse_front_matter
+
+SOURCE_DIR = os.path.dirname(os.path.abspath(__file__))
+CONTENT_DIR = os.path.join(os.path.dirname(SOURCE_DIR), "content")
+# test modules whose string literals are markdown documents
+MARKDOWN_TEST_MODULES = ("test_markdown_to_html.py", "test_markdown_blocks.py", "test_headings.py")
+
+EDGE_CASES = [
+    "",
+    "   \n\n   ",
+    "plain & <text> with \"quotes\"",
+    "**bold** _italic_ `code <tag>` [a & b](/x?a=1&b=\"2\") ![alt \"q\"](/img.png)",
+    "# Title\n\n## Title\n\n## Title-1\n\n### *Deep* & `code`\n\n> ## Quoted heading",
+    "## ![only an image](/a.png) and text",
+    "- one\n- two\n  - nested *item*\n\n    second paragraph\n- three",
+    "1. first\n2. second\n\n   > quote in item",
+    "> First\n> line\n>\n> Second\n>\n> > Inner\n> > - list",
+    "```python\ndef f(x):\n    return x < 1 and \"s\"\n```\n\n```\n  raw <b>\n\n    more\n```",
+    "```Py3 title=x\nprint(1)\n```",
+    "####### seven hashes",
+    "[a](b) ![c](d) [a](b) ![a](b) [x](y",
+    "text [link *with* emphasis](/u_r_l) after",
+    "**bold with `code` inside**",
+]
+# both paths must reject these the same way
+ERROR_CASES = [
+    "a_b_c and __init__ or ___x___ or ***y***",
+    "**bold with a lone ` inside**",
+    "an un*matched delimiter",
+]
+
+
+def corpus() -> list[str]:
+    """
+    Every page of the site's content and every markdown string in the
+    markdown test modules, plus the cases above.
+    """
+    documents = EDGE_CASES + ERROR_CASES
+    for dir_path, _, file_names in os.walk(CONTENT_DIR):
+        for file_name in sorted(file_names):
+            if file_name.endswith(".md"):
+                with open(os.path.join(dir_path, file_name), "r") as file_object:
+                    documents.append(parse_front_matter(file_object.read())[1])
+    for module in MARKDOWN_TEST_MODULES:
+        with open(os.path.join(SOURCE_DIR, module), "r") as file_object:
+            tree = ast.parse(file_object.read())
+        documents.extend(node.value for node in ast.walk(tree) if isinstance(node, ast.Constant) and isinstance(node.value, str))
+    return documents
+
+
+def tree_chunks(markdown: str) -> list[str] | type:
+    try:
+        return list(markdown_to_html_node(markdown).iter_html())
+    except ValueError:
+        return ValueError
+
+
+def emitter_chunks(markdown: str) -> list[str] | type:
+    try:
+        return HTMLEmitter().render(markdown)
+    except ValueError:
+        return ValueError
+
+
+class TestHTMLEmitter(unittest.TestCase):
+    def test_matches_tree_on_corpus(self):
+        documents = corpus()
+        self.assertGreater(len(documents), 100)
+        for markdown in documents:
+            with self.subTest(markdown=markdown[:60]):
+                self.assertEqual(emitter_chunks(markdown), tree_chunks(markdown))
+
+    def test_deeply_nested_blocks(self):
+        markdown = "> " * 5000 + "- *deep*\n\n" + "".join("  " * depth + "1. item\n" for depth in range(300))
+        self.assertEqual(emitter_chunks(markdown), tree_chunks(markdown))
+
+    def test_info_string_is_not_markup(self):
+        markdown = '```x"><script>alert(1)</script>\nx = 1\n```'
+        self.assertNotIn("<script>", markdown_to_html(markdown))
+        self.assertEqual(emitter_chunks(markdown), tree_chunks(markdown))
+
+    def test_markdown_to_html(self):
+        for markdown in EDGE_CASES:
+            self.assertEqual(markdown_to_html(markdown), markdown_to_html_node(markdown).to_html())
+
+    def test_headings_match_tree(self):
+        markdown = EDGE_CASES[4] + "\n\n" + EDGE_CASES[5]
+        emitter = HTMLEmitter()
+        emitter.render(markdown)
+        self.assertEqual(emitter.headings, heading_entries(markdown_to_html_node(markdown).children))
+
+    def test_streaming_matches_tree(self):
+        markdown = "\n\n".join(EDGE_CASES[2:])
+        visited = []
+        chunks = list(HTMLEmitter().iter_html(iter_blocks(markdown.split("\n")), visited.append))
+        self.assertEqual(chunks, list(iter_blocks_html(iter_blocks(markdown.split("\n")))))
+        self.assertEqual(len(visited), len(list(iter_blocks(markdown.split("\n")))))
+
+    def test_image_props_match_annotate_images(self):
+        with tempfile.TemporaryDirectory() as static_dir:
+            with open(os.path.join(static_dir, "a.png"), "wb") as file_object:
+                file_object.write(b"\x89PNG\r\n\x1a\n" + struct.pack(">I", 13) + b"IHDR" + struct.pack(">II", 3, 2) + b"\x08\x02\x00\x00\x00")
+            markdown = "![a](/a.png) ![missing](/b.png) ![remote](https://x.test/c.png)\n\n- ![in list](/a.png?v=1)"
+            tree_files: set[str] = set()
+            node = markdown_to_html_node(markdown)
+            annotate_images(node, static_dir, tree_files)
+            emitter_files: set[str] = set()
+            emitter = HTMLEmitter(lambda props: annotate_image_props(props, static_dir, emitter_files))
+            self.assertEqual(emitter.render(markdown), list(node.iter_html()))
+            self.assertEqual(emitter_files, tree_files)
+            self.assertIn('<img src="/a.png" alt="a" width="3" height="2" loading="lazy" decoding="async">', emitter.render(markdown))
+
+
+if __name__ == "__main__":
+    unittest.main()
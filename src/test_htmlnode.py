@@ -1,8 +1,18 @@
 import unittest
 
-from htmlnode import HTMLNode, LeafNode, ParentNode, text_node_to_html_node
+from htmlnode import HTMLNode, LeafNode, ParentNode, text_node_to_html_node, escape_html, escape_attribute, walk
 from textnode import TextNode, TextType
 
+# well past the default recursion limit of 1000
+DEEP = 10000
+
+
+def deep_tree(depth: int, text: str = "deep") -> ParentNode:
+    node = ParentNode("blockquote", [LeafNode(None, text)])
+    for _ in range(depth - 1):
+        node = ParentNode("blockquote", [node])
+    return node
+
 class TestHtmlNode(unittest.TestCase):
 
     # This test evaluates the equality operator for HTMLNode instances
@@ -254,5 +264,63 @@ class TestHtmlNode(unittest.TestCase):
         with self.assertRaises(ValueError):
             text_node_to_html_node(node)
 
+    # Tests that text and inline code are escaped when the node is created
+    def test_text_is_escaped(self):
+        node = text_node_to_html_node(TextNode("a < b && c > d", TextType.TEXT))
+        self.assertEqual(node.to_html(), "a &lt; b &amp;&amp; c &gt; d")
+        node = text_node_to_html_node(TextNode("<div>", TextType.CODE))
+        self.assertEqual(node.to_html(), "<code>&lt;div&gt;</code>")
+
+    # Tests that link and image attributes are escaped, quotes included
+    def test_attributes_are_escaped(self):
+        node = text_node_to_html_node(TextNode('Say "hi"', TextType.IMAGE, "/a.png?x=1&y=2"))
+        self.assertEqual(node.props, {"src": "/a.png?x=1&amp;y=2", "alt": "Say &quot;hi&quot;"})
+        node = text_node_to_html_node(TextNode("Q&A", TextType.LINK, "/q?a=1&b=2"))
+        self.assertEqual(node.to_html(), '<a href="/q?a=1&amp;b=2">Q&amp;A</a>')
+
+    # Tests that strings with nothing to escape are returned unchanged
+    def test_escape_fast_path(self):
+        text = "Nothing to escape here"
+        self.assertIs(escape_html(text), text)
+        self.assertIs(escape_attribute(text), text)
+        self.assertEqual(escape_html('"quoted"'), '"quoted"')
+
+    # Tests that serialization, equality and repr do not recurse
+    def test_deep_tree(self):
+        node = deep_tree(DEEP)
+        html = node.to_html()
+        self.assertEqual(html, "<blockquote>" * DEEP + "deep" + "</blockquote>" * DEEP)
+        self.assertEqual("".join(node.iter_html()), html)
+        self.assertEqual(node, deep_tree(DEEP))
+        self.assertNotEqual(node, deep_tree(DEEP, "other"))
+        self.assertNotEqual(node, deep_tree(DEEP - 1))
+        self.assertEqual(repr(node), "ParentNode(tag='blockquote', children=[" * DEEP + "LeafNode(tag='None', value='deep', props=None)" + "], props=None)" * DEEP)
+
+    # Tests that repr of a tree matches the repr of its children lists
+    def test_repr_nested(self):
+        leaf = LeafNode("b", "x", {"class": "y"})
+        base = HTMLNode("p", None, [leaf], None)
+        node = ParentNode("div", [leaf, base, ParentNode("i", None)])
+        self.assertEqual(repr(node), f"ParentNode(tag='div', children={[leaf, base, ParentNode('i', None)]!r}, props=None)")
+        self.assertEqual(repr(base), f"HTMLNode(tag='p', value='None', children=[{leaf!r}], props=None)")
+
+    # Tests that a child that is not a node is still rejected
+    def test_non_node_child(self):
+        with self.assertRaises(ValueError):
+            ParentNode("div", [LeafNode(None, "a"), "b"]).to_html()
+        with self.assertRaises(ValueError):
+            list(ParentNode("div", [ParentNode("p", [42])]).iter_html())
+
+    # Tests that walk visits nodes in document order and prunes subtrees
+    def test_walk(self):
+        code = ParentNode("pre", [LeafNode("code", "x")])
+        first = LeafNode(None, "a")
+        last = LeafNode("b", "c")
+        paragraph = ParentNode("p", [first, last])
+        node = ParentNode("div", [paragraph, code])
+        self.assertEqual(list(walk(node)), [node, paragraph, first, last, code, code.children[0]])
+        self.assertEqual(list(walk(node, lambda visited: visited.tag != "pre")), [node, paragraph, first, last, code])
+        self.assertEqual(sum(1 for _ in walk(deep_tree(DEEP))), DEEP + 1)
+
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
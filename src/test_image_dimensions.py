@@ -0,0 +1,80 @@
+import os
+import struct
+import tempfile
+import unittest
+
+from htmlnode import LeafNode, ParentNode
+from image_dimensions import annotate_images, cached_image_size, read_image_size
+from fixtures import write_file
+
+
+def png_bytes(width: int, height: int) -> bytes:
+    return b"\x89PNG\r\n\x1a\n" + struct.pack(">I", 13) + b"IHDR" + struct.pack(">II", width, height) + b"\x08\x06\x00\x00\x00" + b"\x00" * 64
+
+
+def jpeg_bytes(width: int, height: int) -> bytes:
+    app0 = b"\xff\xe0" + struct.pack(">H", 16) + b"JFIF\x00" + b"\x00" * 9
+    sof0 = b"\xff\xc0" + struct.pack(">HBHH", 11, 8, height, width) + b"\x01\x01\x11\x00"
+    return b"\xff\xd8" + app0 + sof0 + b"\xff\xda" + b"\x00" * 64
+
+
+def gif_bytes(width: int, height: int) -> bytes:
+    return b"GIF89a" + struct.pack("<HH", width, height) + b"\x00" * 16
+
+
+def webp_vp8x_bytes(width: int, height: int) -> bytes:
+    body = b"WEBP" + b"VP8X" + struct.pack("<I", 10) + b"\x00" * 4 + (width - 1).to_bytes(3, "little") + (height - 1).to_bytes(3, "little")
+    return b"RIFF" + struct.pack("<I", len(body)) + body
+
+
+class TestImageDimensions(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, name: str, data: bytes) -> str:
+        return write_file(os.path.join(self.tmp.name, name), data)
+
+    def test_png(self):
+        self.assertEqual(read_image_size(self.write("a.png", png_bytes(640, 480))), (640, 480))
+
+    def test_jpeg(self):
+        self.assertEqual(read_image_size(self.write("a.jpg", jpeg_bytes(1024, 768))), (1024, 768))
+
+    def test_gif(self):
+        self.assertEqual(read_image_size(self.write("a.gif", gif_bytes(16, 9))), (16, 9))
+
+    def test_webp(self):
+        self.assertEqual(read_image_size(self.write("a.webp", webp_vp8x_bytes(300, 200))), (300, 200))
+
+    def test_unknown_format(self):
+        self.assertIsNone(read_image_size(self.write("a.txt", b"hello world")))
+
+    def test_truncated_jpeg(self):
+        self.assertIsNone(read_image_size(self.write("a.jpg", b"\xff\xd8\xff\xe0\x00")))
+
+    def test_cache_invalidated_by_mtime(self):
+        path = self.write("c.png", png_bytes(10, 10))
+        self.assertEqual(cached_image_size(path), (10, 10))
+        self.write("c.png", png_bytes(20, 20))
+        os.utime(path, ns=(0, os.stat(path).st_mtime_ns + 1_000_000_000))
+        self.assertEqual(cached_image_size(path), (20, 20))
+
+    def test_annotate_images(self):
+        self.write("images/tom.png", png_bytes(800, 600))
+        local = LeafNode("img", "", {"src": "/images/tom.png", "alt": "Tom"})
+        missing = LeafNode("img", "", {"src": "/images/none.png", "alt": "None"})
+        remote = LeafNode("img", "", {"src": "https://example.com/a.png", "alt": "Remote"})
+        annotate_images(ParentNode("div", [ParentNode("p", [local, missing, remote])]), self.tmp.name)
+        self.assertEqual(
+            local.to_html(),
+            '<img src="/images/tom.png" alt="Tom" width="800" height="600" loading="lazy" decoding="async"></img>',
+        )
+        self.assertEqual(missing.props, {"src": "/images/none.png", "alt": "None", "loading": "lazy", "decoding": "async"})
+        self.assertEqual(remote.props, {"src": "https://example.com/a.png", "alt": "Remote"})
+
+
+if __name__ == "__main__":
+    unittest.main()
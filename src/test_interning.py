@@ -0,0 +1,100 @@
+import unittest
+
+from htmlnode import LeafNode, ParentNode
+from interning import FrozenNode, NodeInterner
+from markdown_to_html import markdown_to_html_node
+
+PAGE = """# Page {n}
+
+> **Note:** this site is a fan project.
+
+Some text about page {n}, with a [link](/page-{n}).
+
+- Home
+- [About](/about)
+"""
+
+
+class TestNodeInterner(unittest.TestCase):
+    def test_repeated_subtrees_are_shared(self):
+        interner = NodeInterner()
+        first = interner.intern(markdown_to_html_node(PAGE.format(n=1)))
+        second = interner.intern(markdown_to_html_node(PAGE.format(n=2)))
+        self.assertIsNot(first, second)
+        self.assertIsNot(first.children[0], second.children[0])
+        self.assertIs(first.children[1], second.children[1])
+        self.assertIs(first.children[3], second.children[3])
+        self.assertTrue(first.children[3].shared)
+        self.assertFalse(first.children[0].shared)
+
+    def test_output_is_unchanged(self):
+        interner = NodeInterner()
+        for n in range(3):
+            node = markdown_to_html_node(PAGE.format(n=n))
+            frozen = interner.intern(node)
+            self.assertEqual(list(frozen.iter_html()), list(node.iter_html()))
+            self.assertEqual(frozen.to_html(), node.to_html())
+            self.assertEqual(frozen, node)
+        self.assertIsNotNone(frozen.children[3].chunks)
+        self.assertIsNone(frozen.children[3].children[0].chunks)
+
+    def test_leaves(self):
+        interner = NodeInterner()
+        leaf = interner.intern(LeafNode("a", "x", {"href": "/"}))
+        self.assertEqual(leaf.to_html(), '<a href="/">x</a>')
+        self.assertIs(interner.intern(LeafNode("a", "x", {"href": "/"})), leaf)
+        self.assertIs(interner.intern(leaf), leaf)
+        self.assertEqual(interner.intern(LeafNode(None, "text")).to_html(), "text")
+
+    def test_hash_follows_equality(self):
+        left = FrozenNode("p", None, (FrozenNode(None, "x", None, None),), {"class": "a", "id": "b"})
+        right = FrozenNode("p", None, (FrozenNode(None, "x", None, None),), {"id": "b", "class": "a"})
+        self.assertEqual(left, right)
+        self.assertEqual(hash(left), hash(right))
+        self.assertEqual(len({left, right}), 1)
+        self.assertNotEqual(left, FrozenNode("p", None, (FrozenNode(None, "y", None, None),), {"class": "a", "id": "b"}))
+
+    def test_frozen(self):
+        node = NodeInterner().intern(ParentNode("p", [LeafNode(None, "x")], {"id": "a"}))
+        for name in ("tag", "value", "children", "props"):
+            with self.assertRaises(AttributeError):
+                setattr(node, name, None)
+        with self.assertRaises(TypeError):
+            node.props["id"] = "b"
+        self.assertIn("id", node.props)
+
+    def test_deep_tree(self):
+        node = LeafNode(None, "deep")
+        for _ in range(10000):
+            node = ParentNode("blockquote", [node])
+        frozen = NodeInterner().intern(node)
+        self.assertEqual(frozen.to_html(), node.to_html())
+        self.assertEqual(frozen, node)
+        self.assertIn("FrozenNode(tag='blockquote'", repr(frozen))
+
+    def test_invalid_trees(self):
+        for node in (ParentNode(None, [LeafNode(None, "x")]), ParentNode("p", None), LeafNode("b", None), ParentNode("p", ["x"])):
+            with self.assertRaises(ValueError):
+                NodeInterner().intern(node)
+
+    def test_max_entries(self):
+        interner = NodeInterner(max_entries=2)
+        for _ in range(2):
+            interner.intern(ParentNode("p", [LeafNode(None, "a"), LeafNode(None, "b"), LeafNode(None, "c")]))
+        self.assertEqual(len(interner.nodes), 2)
+        self.assertEqual(interner.hits, 2)
+
+    def test_stats(self):
+        interner = NodeInterner()
+        self.assertIn("0 of 0 reused", interner.describe())
+        interner.intern(ParentNode("ul", [ParentNode("li", [LeafNode(None, "x")]), ParentNode("li", [LeafNode(None, "x")])]))
+        self.assertEqual((interner.lookups, interner.hits), (5, 2))
+        self.assertGreater(interner.bytes_saved, 0)
+        self.assertIn("2 of 5 reused (40.0% hit rate)", interner.describe())
+        interner.reset_stats()
+        self.assertEqual((interner.lookups, interner.hits, interner.bytes_saved), (0, 0, 0))
+        self.assertEqual(len(interner.nodes), 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
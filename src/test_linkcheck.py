@@ -0,0 +1,131 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import linkcheck
+from build_context import BuildContext
+from copystatic import copy_files_recursive
+from depgraph import DependencyGraph
+from fingerprint import AssetManifest
+from htmlnode import LeafNode, ParentNode
+from linkcheck import DiskLinkIndex, LinkIndex, PageLinks, check_links, check_target
+from markdown_to_html import generate_pages_recursive
+from fixtures import write_file
+
+
+class TestLinkCheck(unittest.TestCase):
+    def test_page_links_lines_follow_document_order(self):
+        node = ParentNode("div", [
+            ParentNode("p", [LeafNode("a", "one", {"href": "/a/"}), LeafNode("img", "", {"src": "/x.png?s=1&amp;t=2"})]),
+            LeafNode("h2", "Title", {"id": "title"}),
+            ParentNode("p", [LeafNode("a", "again", {"href": "/a/"})]),
+        ])
+        lines = ["[one](/a/)", "![x](/x.png?s=1&t=2)", "", "## Title", "", "[again](/a/)"]
+        page = PageLinks()
+        page.add(node, enumerate(lines, 5))
+        self.assertEqual(page.links, [["href", "/a/", 5], ["src", "/x.png?s=1&t=2", 6], ["href", "/a/", 10]])
+        self.assertEqual(page.ids, ["title"])
+
+    def test_check_target(self):
+        outputs = {"index.html", "blog/tom/index.html", "about.html", "index.css"}
+        anchors = {"blog/tom/index.html": {"intro"}}
+
+        def check(target, page_url="/blog/tom/", basepath="/"):
+            return check_target(target, page_url, basepath, outputs, anchors)
+
+        for target in ("/", "/blog/tom/", "/about.html", "/index.css", "#intro", "../../about.html", "/blog/tom/#intro", "/about.html#any", "https://example.com/x", "//cdn.example.com/y", "mailto:a@b.c"):
+            self.assertIsNone(check(target), target)
+        self.assertEqual(check("/blog/tom"), "is a directory; link to /blog/tom/")
+        self.assertEqual(check("/missing.html"), "no such output")
+        self.assertEqual(check("#outro"), "no anchor '#outro' on /blog/tom/")
+        self.assertEqual(check("/site/about.html", basepath="/site/"), "already starts with the basepath /site/, which the build adds")
+
+    def test_parallel_check_matches_serial(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            open(os.path.join(tmp, "index.html"), "w").close()
+            index = LinkIndex(tmp)
+            for number in range(40):
+                page = PageLinks()
+                page.links = [["href", "/", 1], ["href", f"/missing{number}/", 2]]
+                index.record(f"content/page{number}.md", os.path.join(tmp, f"page{number}.html"), page)
+            serial = check_links(index, "/", workers=1)
+            with mock.patch.object(linkcheck, "PARALLEL_MIN_PAGES", 1), mock.patch.object(linkcheck, "CHUNK_PAGES", 7):
+                parallel = check_links(index, "/", workers=2)
+        self.assertEqual(serial, parallel)
+        self.assertEqual((serial["pages"], serial["links"], len(serial["broken"])), (40, 80, 40))
+        self.assertEqual(serial["broken"][0], {"source": "content/page0.md", "line": 2, "attribute": "href", "target": "/missing0/", "url": "/missing0/", "reason": "no such output"})
+
+
+class TestLinkIndexBuild(unittest.TestCase):
+    index_class = LinkIndex
+    extension = ".json"
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.content = os.path.join(self.tmp.name, "content", "")
+        self.public = os.path.join(self.tmp.name, "public", "")
+        self.template = os.path.join(self.tmp.name, "template.html")
+        self.links_path = os.path.join(self.tmp.name, "links" + self.extension)
+        self.graph_path = os.path.join(self.tmp.name, "depgraph.json")
+        self.write("template.html", "<title>{{ Title }}</title>{{ Content }}")
+        self.write("content/index.md", "---\ndate: 2024-01-01\n---\n# Home\n\n- [Post](/post/)\n- [Gone](/gone/)\n")
+        self.write("content/post/index.md", "# Post\n\n> [Home](/#top)\n")
+
+    def write(self, rel_path, text):
+        write_file(os.path.join(self.tmp.name, rel_path), text)
+
+    def build(self):
+        context = BuildContext(graph=DependencyGraph(self.graph_path))
+        context.links = self.index_class(self.public, self.links_path)
+        generate_pages_recursive(self.content, self.template, self.public, "/", context)
+        context.graph.save()
+        context.links.save()
+        report = check_links(context.links, "/", workers=1)
+        context.links.close()
+        return context, report
+
+    def test_reports_source_lines_and_keeps_skipped_pages(self):
+        context, report = self.build()
+        self.assertEqual(context.rebuilt, 2)
+        expected = [
+            (os.path.join(self.content, "index.md"), 7, "/gone/", "no such output"),
+            (os.path.join(self.content, "post", "index.md"), 3, "/#top", "no anchor '#top' on /"),
+        ]
+        self.assertEqual([(failure["source"], failure["line"], failure["target"], failure["reason"]) for failure in report["broken"]], expected)
+
+        context, second = self.build()
+        self.assertEqual((context.rebuilt, context.skipped), (0, 2))
+        self.assertEqual(second, report)
+
+    def test_unindexed_pages_are_rebuilt(self):
+        context = BuildContext(graph=DependencyGraph(self.graph_path))
+        generate_pages_recursive(self.content, self.template, self.public, "/", context)
+        context.graph.save()
+        context, report = self.build()
+        self.assertEqual(context.rebuilt, 2)
+        self.assertEqual(report["links"], 3)
+
+    def test_fingerprinted_assets(self):
+        self.write("static/images/tom.png", "png")
+        self.write("content/index.md", "# Home\n\n![Tom](/images/tom.png)\n\n![Gone](/images/gone.png)\n")
+        manifest = AssetManifest(os.path.join(self.tmp.name, "static"))
+        copy_files_recursive(os.path.join(self.tmp.name, "static"), self.public, manifest=manifest)
+        context = BuildContext(manifest=manifest, graph=DependencyGraph(self.graph_path))
+        context.links = self.index_class(self.public, self.links_path)
+        generate_pages_recursive(self.content, self.template, self.public, "/", context)
+        context.links.save()
+        report = check_links(context.links, "/", workers=1, asset_urls=manifest.urls)
+        context.links.close()
+        self.assertNotIn("/images/tom.png", manifest.urls["/images/tom.png"])
+        self.assertEqual([(failure["target"], failure["reason"]) for failure in report["broken"] if failure["attribute"] == "src"], [("/images/gone.png", "no such output")])
+
+
+class TestDiskLinkIndexBuild(TestLinkIndexBuild):
+    index_class = DiskLinkIndex
+    extension = ".db"
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,135 @@
+import os
+import tempfile
+import unittest
+
+from build_context import BuildContext
+from depgraph import DependencyGraph
+from listings import PAGE_SIZE, atom_feed, iter_listing_pages, iter_pages, write_listings
+from site_index import DiskSiteIndex, PageEntry, SiteIndex
+
+TEMPLATE = "<title>{{ Title }}</title><body>{{ Content }}</body>"
+
+
+def make_index(count: int) -> SiteIndex:
+    index = SiteIndex("docs")
+    for number in range(count):
+        source = f"content/blog/p{number}/index.md"
+        index.entries[source] = PageEntry(source, f"/blog/p{number}/", f"Post {number}", f"2024-01-{number + 1:02d}", ["elves"])
+    return index
+
+
+def listing_pages(index: SiteIndex, page_size: int = PAGE_SIZE) -> dict[str, list[tuple[str, str, str]]]:
+    pages: dict[str, list[tuple[str, str, str]]] = {}
+    for key, url, title, node in iter_listing_pages(index, page_size):
+        pages.setdefault(key, []).append((url, title, node.to_html()))
+    return pages
+
+
+class TestListings(unittest.TestCase):
+    def test_iter_pages(self):
+        self.assertEqual(list(iter_pages(iter([1, 2, 3, 4, 5]), 2)), [[1, 2], [3, 4], [5]])
+        self.assertEqual(list(iter_pages([], 2)), [])
+        with self.assertRaises(ValueError):
+            next(iter_pages([1], 0))
+
+    def test_listing_pagination_urls(self):
+        outputs = listing_pages(make_index(5), page_size=2)
+        self.assertEqual([url for url, _, _ in outputs["section:blog"]], ["/blog/", "/blog/page/2/", "/blog/page/3/"])
+        self.assertEqual([url for url, _, _ in outputs["tag:elves"]], ["/tags/elves/", "/tags/elves/page/2/", "/tags/elves/page/3/"])
+
+    def test_listing_page_html(self):
+        outputs = listing_pages(make_index(3), page_size=2)
+        _, title, html = outputs["section:blog"][0]
+        self.assertEqual(title, "Blog")
+        self.assertIn('<a href="/blog/p2/">Post 2</a>', html)
+        self.assertIn('<a href="/blog/page/2/" rel="next">Older &gt;</a>', html)
+        self.assertNotIn("Post 0", html)
+
+    def test_listing_yields_to_content_page(self):
+        index = make_index(1)
+        index.entries["content/blog/index.md"] = PageEntry("content/blog/index.md", "/blog/", "Blog", "2024-01-01")
+        outputs = listing_pages(index)
+        self.assertEqual(outputs["section:blog"][0][0], "/blog/page/1/")
+
+    def test_atom_feed(self):
+        feed = atom_feed(make_index(2), "https://example.com", "/site/", "Example")
+        self.assertIn("<title>Example</title>", feed)
+        self.assertIn('<link href="https://example.com/site/blog/p1/"/>', feed)
+        self.assertIn("<updated>2024-01-02T00:00:00Z</updated>", feed)
+        self.assertLess(feed.index("Post 1"), feed.index("Post 0"))
+
+    def test_write_listings_incremental(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            index = make_index(2)
+            written = write_listings(index, None, TEMPLATE, tmp, "/", "https://example.com", "Example")
+            self.assertEqual(len(written), 3)
+            self.assertTrue(os.path.exists(os.path.join(tmp, "blog", "index.html")))
+            self.assertTrue(os.path.exists(os.path.join(tmp, "tags", "elves", "index.html")))
+
+            self.assertEqual(write_listings(make_index(2), index, TEMPLATE, tmp, "/", "https://example.com", "Example"), [])
+
+            changed = make_index(2)
+            changed.entries["content/blog/p0/index.md"].tags = ["books"]
+            written = write_listings(changed, index, TEMPLATE, tmp, "/", "https://example.com", "Example")
+            self.assertEqual(
+                sorted(os.path.relpath(path, tmp) for path in written),
+                sorted([os.path.join("blog", "index.html"), os.path.join("tags", "books", "index.html"), os.path.join("tags", "elves", "index.html"), "feed.xml"]),
+            )
+
+    def test_disk_index_writes_the_same_listings(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            disk_index = DiskSiteIndex("docs", os.path.join(tmp, "index.db"))
+            for source, entry in make_index(5).entries.items():
+                disk_index.entries[source] = entry
+            self.assertEqual(listing_pages(disk_index, 2), listing_pages(make_index(5), 2))
+            feed = atom_feed(disk_index, "https://example.com", "/", "Example")
+            self.assertEqual(feed, atom_feed(make_index(5), "https://example.com", "/", "Example"))
+            disk_index.close()
+
+    def test_listing_depends_on_listed_metadata(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            graph_path = os.path.join(tmp, "depgraph.json")
+
+            def build(index: SiteIndex) -> BuildContext:
+                context = BuildContext(site_index=index, graph=DependencyGraph(graph_path))
+                write_listings(index, make_index(2), TEMPLATE, tmp, "/", "https://example.com", "Example", context=context)
+                context.graph.save()
+                return context
+
+            build(make_index(2))
+            self.assertEqual(build(make_index(2)).rebuilt, 0)
+            changed = make_index(2)
+            changed.entries["content/blog/p1/index.md"].summary = "New summary"
+            context = build(changed)
+            # the section listing, the tag listing and the feed, which
+            # carries summaries too
+            self.assertEqual(context.rebuilt, 3)
+            inputs = context.graph.current[os.path.join(tmp, "blog", "index.html")]
+            self.assertEqual([key for key in inputs if key.startswith("listing:")], ["listing:section:blog"])
+
+    def test_feed_depends_on_config(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            graph_path = os.path.join(tmp, "depgraph.json")
+            feed_path = os.path.join(tmp, "feed.xml")
+
+            def build(basepath: str, site_url: str) -> BuildContext:
+                index = make_index(2)
+                context = BuildContext(site_index=index, graph=DependencyGraph(graph_path))
+                context.config = {"basepath": basepath, "site_url": site_url}
+                written = write_listings(index, make_index(2), TEMPLATE, tmp, basepath, site_url, "Example", context=context)
+                context.graph.save()
+                return written
+
+            self.assertIn(feed_path, build("/", "https://example.com"))
+            self.assertEqual(build("/", "https://example.com"), [])
+            self.assertIn(feed_path, build("/docs/", "https://example.com"))
+            with open(feed_path, "r") as file_object:
+                self.assertIn("https://example.com/docs/blog/p0/", file_object.read())
+            self.assertEqual(build("/docs/", "https://example.com"), [])
+            self.assertIn(feed_path, build("/docs/", "https://example.org"))
+            os.remove(feed_path)
+            self.assertEqual(build("/docs/", "https://example.org"), [feed_path])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,53 @@
+import os
+import tempfile
+import unittest
+
+from mapped_source import MappedSource
+
+
+class TestMappedSource(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def source(self, data: bytes) -> MappedSource:
+        path = os.path.join(self.tmp.name, "page.md")
+        with open(path, "wb") as file_object:
+            file_object.write(data)
+        source = MappedSource(path)
+        self.addCleanup(source.close)
+        return source
+
+    def test_front_matter(self):
+        source = self.source(b"\n---\ndate: 2024-05-01\ntags: elves\n---\n# Title\n\nText\n")
+        self.assertEqual(source.metadata, {"date": "2024-05-01", "tags": "elves"})
+        self.assertEqual(list(source.lines()), ["# Title", "", "Text", ""])
+        self.assertEqual(source.title(), "Title")
+
+    def test_without_front_matter(self):
+        source = self.source(b"# Title\n---\nText")
+        self.assertEqual(source.metadata, {})
+        self.assertEqual(list(source.lines()), ["# Title", "---", "Text"])
+
+    def test_unterminated_front_matter(self):
+        with self.assertRaises(ValueError):
+            self.source(b"---\ndate: 2024-05-01\n# Title\n")
+
+    def test_crlf_line_ends(self):
+        source = self.source("---\r\ndate: 2024-05-01\r\n---\r\n# Título\r\n\r\nText".encode())
+        self.assertEqual(source.metadata, {"date": "2024-05-01"})
+        self.assertEqual(list(source.lines()), ["# Título", "", "Text"])
+
+    def test_common_indentation_removed(self):
+        source = self.source(b"    # Title\n\n      code-ish\n    text\n")
+        self.assertEqual(list(source.lines()), ["# Title", "", "  code-ish", "text", ""])
+
+    def test_missing_title(self):
+        with self.assertRaises(ValueError):
+            self.source(b"## Not a title\n").title()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,7 +1,7 @@
 import unittest
 
-from markdown_blocks import markdown_to_blocks, block_to_block_type
-from blocknode import BlockType
+from markdown_blocks import markdown_to_blocks, block_to_block_type, parse_blocks, iter_blocks
+from blocknode import Block, BlockType
 
 class TestMarkdownToBlocks(unittest.TestCase):
     def test_markdown_to_blocks_basic(self):
@@ -104,6 +104,95 @@ class TestMarkdownToBlocks(unittest.TestCase):
             markdown_to_blocks(None)  # type: ignore[arg-type]
 
 
+class TestParseBlocks(unittest.TestCase):
+    def test_fenced_code_keeps_blank_lines(self):
+        markdown = "```python\nx = 1\n\n\ny = 2\n```\n\nAfter."
+        self.assertEqual(
+            parse_blocks(markdown),
+            [Block(BlockType.CODE, ["x = 1", "", "", "y = 2"], info="python"), Block(BlockType.PARAGRAPH, ["After."])],
+        )
+        self.assertEqual(markdown_to_blocks(markdown), ["```python\nx = 1\n\n\ny = 2\n```", "After."])
+
+    def test_iter_blocks_yields_each_block_once_complete(self):
+        consumed: list[str] = []
+
+        def lines():
+            for line in ["# Title", "", "Para", "", "- a", "- b", "", "After"]:
+                consumed.append(line)
+                yield line
+
+        blocks = iter_blocks(lines())
+        self.assertEqual(next(blocks), Block(BlockType.HEADING, ["# Title"]))
+        self.assertEqual(consumed, ["# Title", "", "Para", ""])
+        self.assertEqual(next(blocks), Block(BlockType.PARAGRAPH, ["Para"]))
+        self.assertEqual(next(blocks).block_type, BlockType.UNORDERED_LIST)
+        self.assertEqual(consumed[-1], "After")
+        self.assertEqual(list(blocks), [Block(BlockType.PARAGRAPH, ["After"])])
+
+    def test_unclosed_fence_runs_to_the_end(self):
+        self.assertEqual(parse_blocks("```\na\n\n# b"), [Block(BlockType.CODE, ["a", "", "# b"])])
+
+    def test_nested_lists(self):
+        markdown = "- a\n  1. b\n  2. c\n     - d\n- e"
+        item = lambda *children: Block(BlockType.LIST_ITEM, children=list(children))
+        text = lambda line: Block(BlockType.PARAGRAPH, [line])
+        self.assertEqual(
+            parse_blocks(markdown),
+            [Block(BlockType.UNORDERED_LIST, children=[
+                item(text("a"), Block(BlockType.ORDERED_LIST, children=[
+                    item(text("b")),
+                    item(text("c"), Block(BlockType.UNORDERED_LIST, children=[item(text("d"))])),
+                ])),
+                item(text("e")),
+            ])],
+        )
+
+    def test_list_item_continuation_and_paragraphs(self):
+        blocks = parse_blocks("1. one\n   more\n2. two\n\n   again\n\nAfter")
+        items = blocks[0].children
+        self.assertEqual(items[0].children, [Block(BlockType.PARAGRAPH, ["one", "more"])])
+        self.assertEqual(items[1].children, [Block(BlockType.PARAGRAPH, ["two"]), Block(BlockType.PARAGRAPH, ["again"])])
+        self.assertEqual(blocks[1], Block(BlockType.PARAGRAPH, ["After"]))
+
+    def test_changing_list_marker_type_starts_a_new_list(self):
+        blocks = parse_blocks("- a\n1. b")
+        self.assertEqual([block.block_type for block in blocks], [BlockType.UNORDERED_LIST, BlockType.ORDERED_LIST])
+
+    def test_multi_line_and_nested_quotes(self):
+        blocks = parse_blocks("> a\n> b\n>\n> > c\nlazy")
+        self.assertEqual(
+            blocks,
+            [Block(BlockType.QUOTE, children=[
+                Block(BlockType.PARAGRAPH, ["a", "b"]),
+                Block(BlockType.QUOTE, children=[Block(BlockType.PARAGRAPH, ["c", "lazy"])]),
+            ])],
+        )
+
+    def test_code_inside_list_item(self):
+        blocks = parse_blocks("- item\n\n  ```\n  code\n\n  more\n  ```\n- next")
+        first_item = blocks[0].children[0]
+        self.assertEqual(first_item.children[1], Block(BlockType.CODE, ["code", "", "more"]))
+        self.assertEqual(len(blocks[0].children), 2)
+
+    def test_numbered_line_does_not_interrupt_paragraph(self):
+        self.assertEqual(parse_blocks("In the year\n2024. it rained"), [Block(BlockType.PARAGRAPH, ["In the year", "2024. it rained"])])
+
+    def test_common_indentation_is_ignored(self):
+        self.assertEqual(parse_blocks("    - a\n      - b"), parse_blocks("- a\n  - b"))
+
+    def test_deep_trees_compare_and_repr(self):
+        left = parse_blocks("> " * 10000 + "deep")[0]
+        right = parse_blocks("> " * 10000 + "deep")[0]
+        self.assertEqual(left, right)
+        self.assertNotEqual(left, parse_blocks("> " * 10000 + "deeper")[0])
+        self.assertTrue(repr(left).startswith("Block(BlockType.QUOTE, children=[Block(BlockType.QUOTE, children=["))
+        self.assertTrue(repr(left).endswith("lines=['deep'], info='')" + "])" * 10000))
+
+    def test_block_repr(self):
+        block = Block(BlockType.UNORDERED_LIST, children=[Block(BlockType.LIST_ITEM, children=[Block(BlockType.PARAGRAPH, ["a"])]), Block(BlockType.CODE, ["x"], info="```py")])
+        self.assertEqual(repr(block), "Block(BlockType.UNORDERED_LIST, children=[Block(BlockType.LIST_ITEM, children=[Block(BlockType.PARAGRAPH, lines=['a'], info='')]), Block(BlockType.CODE, lines=['x'], info='```py')])")
+
+
 class TestBlockToBlockType(unittest.TestCase):
     # --------- HEADING HAPPY PATHS ---------
 
@@ -1,6 +1,16 @@
+import os
+import time
+import tempfile
 import unittest
-from markdown_to_html import extract_title, markdown_to_html_node
+from markdown_to_html import PARSER_VERSION, extract_title, generate_page, iter_blocks_html, markdown_to_html_node, plan_pages
+from markdown_blocks import iter_blocks
 from htmlnode import HTMLNode
+from build_context import BuildContext
+from site_index import SiteIndex
+from parse_cache import ParseCache
+from interning import NodeInterner
+from block_cache import BlockCache
+from fixtures import write_file
 
 class TestMarkdownToHTML(unittest.TestCase):
     def test_paragraphs(self):
@@ -61,20 +71,53 @@ class TestMarkdownToHTML(unittest.TestCase):
     def test_heading_h1(self):
         md = "# Title"
         node = markdown_to_html_node(md)
-        self.assertEqual(node.to_html(), "<div><h1>Title</h1></div>")
+        self.assertEqual(node.to_html(), '<div><h1 id="title">Title</h1></div>')
 
     def test_heading_h3_with_inline(self):
         md = "### Hello **world**"
         node = markdown_to_html_node(md)
         self.assertEqual(
             node.to_html(),
-            "<div><h3>Hello <b>world</b></h3></div>",
+            '<div><h3 id="hello-world">Hello <b>world</b></h3></div>',
         )
 
     def test_heading_h6(self):
         md = "###### Max"
         node = markdown_to_html_node(md)
-        self.assertEqual(node.to_html(), "<div><h6>Max</h6></div>")
+        self.assertEqual(node.to_html(), '<div><h6 id="max">Max</h6></div>')
+
+    def test_heading_ids_are_unique_per_page(self):
+        md = "# Intro\n\n## Intro\n\n## Intro-1\n\n## Intro\n\n> ## Quoted\n\n## Tom's *Hat*?"
+        node = markdown_to_html_node(md)
+        ids = [child.props["id"] for child in node.children if child.props]
+        self.assertEqual(ids, ["intro", "intro-1", "intro-1-1", "intro-2", "toms-hat"])
+        self.assertEqual(markdown_to_html_node("# Intro").children[0].props, {"id": "intro"})
+
+    def test_toc_slot(self):
+        markdown = "# Page\n\n## One\n\n### One a\n\n## Two & more\n\ntext"
+        with tempfile.TemporaryDirectory() as tmp:
+            source = os.path.join(tmp, "page.md")
+            template = os.path.join(tmp, "template.html")
+            with open(source, "w") as file_object:
+                file_object.write(markdown)
+            with open(template, "w") as file_object:
+                file_object.write("{{ TOC }}|{{ Content }}")
+            pages = []
+            for threshold in (len(markdown), 0):
+                context = BuildContext()
+                context.mmap_threshold = threshold
+                dest = os.path.join(tmp, f"out{threshold}.html")
+                generate_page(source, template, dest, "/", context)
+                with open(dest, "r") as file_object:
+                    pages.append(file_object.read())
+        self.assertEqual(pages[0], pages[1])
+        toc, content = pages[0].split("|")
+        self.assertEqual(toc, '<nav class="toc"><ul><li><a href="#one">One</a><ul><li><a href="#one-a">One a</a></li></ul></li><li><a href="#two-more">Two &amp; more</a></li></ul></nav>')
+        self.assertIn('<h2 id="two-more">Two &amp; more</h2>', content)
+
+    def test_codeblock_info_string_is_not_markup(self):
+        html = markdown_to_html_node('```x"><script>alert(1)</script>\nx = 1\n```').to_html()
+        self.assertEqual(html, "<div><pre><code>x = 1\n</code></pre></div>")
 
     def test_codeblock_dedent_common_indent(self):
         md = """
@@ -186,6 +229,35 @@ class TestMarkdownToHTML(unittest.TestCase):
             "<div><ol><li>One</li><li>Two</li></ol></div>",
         )
 
+    def test_codeblock_with_blank_lines(self):
+        md = "```\nfirst\n\nsecond\n```"
+        node = markdown_to_html_node(md)
+        self.assertEqual(node.to_html(), "<div><pre><code>first\n\nsecond\n</code></pre></div>")
+
+    def test_nested_lists(self):
+        md = """
+    - One
+      1. Nested **one**
+      2. Nested two
+    - Two
+    """
+        node = markdown_to_html_node(md)
+        self.assertEqual(
+            node.to_html(),
+            "<div><ul>"
+            "<li>One<ol><li>Nested <b>one</b></li><li>Nested two</li></ol></li>"
+            "<li>Two</li>"
+            "</ul></div>",
+        )
+
+    def test_nested_quote_and_paragraphs(self):
+        md = "> First\n> line\n>\n> Second\n>\n> > Inner"
+        node = markdown_to_html_node(md)
+        self.assertEqual(
+            node.to_html(),
+            "<div><blockquote><p>First line</p><p>Second</p><blockquote>Inner</blockquote></blockquote></div>",
+        )
+
     def test_extract_title_basic_happy_path(self):
         self.assertEqual(extract_title("# Hello"), "Hello")
     
@@ -201,4 +273,86 @@ class TestMarkdownToHTML(unittest.TestCase):
         self.assertEqual(extract_title("   # Hello"), "Hello")
     
     def test_extract_title_multiple_h1_stops_at_first(self):
-        self.assertEqual(extract_title("# First Title\n# Second Title\nSome text"), "First Title")
\ No newline at end of file
+        self.assertEqual(extract_title("# First Title\n# Second Title\nSome text"), "First Title")
+
+    def test_deeply_nested_blocks(self):
+        markdown = "> " * 5000 + "**deep**\n\n" + "".join("  " * depth + "- item\n" for depth in range(300))
+        html = markdown_to_html_node(markdown).to_html()
+        self.assertTrue(html.startswith("<div>" + "<blockquote>" * 5000 + "<b>deep</b>" + "</blockquote>" * 5000 + "<ul><li>item<ul>"))
+        self.assertEqual(html.count("<li>item"), 300)
+
+    def test_render_time_is_linear(self):
+        text = "Tolkien's legendarium spans ages of Middle-earth, from the Music of the Ainur onward."
+        chunk = (
+            f"## Section\n\n{text}\n{text}\n\n- {text}\n  - {text}\n    {text}\n- {text}\n\n"
+            f"> {text}\n> > {text}\n\n```python\nx = 1\n\ny = 2\n```\n\n"
+        )
+        timings = []
+        for size in (256 * 1024, 2560 * 1024):
+            markdown = chunk * (size // len(chunk))
+            start = time.perf_counter()
+            markdown_to_html_node(markdown).to_html()
+            timings.append(time.perf_counter() - start)
+        # ten times the input: a linear render takes about ten times longer,
+        # a quadratic one a hundred
+        self.assertLess(timings[1], timings[0] * 30)
+
+    def test_iter_blocks_html_matches_tree(self):
+        markdown = "# Title\n\nSome **bold** text\n\n> quote\n\n1. one\n2. two\n\n```\ncode\n```"
+        self.assertEqual("".join(iter_blocks_html(iter_blocks(markdown.split("\n")))), markdown_to_html_node(markdown).to_html())
+
+    def test_mapped_source_renders_like_read_source(self):
+        markdown = "---\ndate: 2024-01-01\ntags: elves\n---\n# Big page\n\n![logo](/images/x.png)\n\nFirst *prose* paragraph.\n\n- item\n"
+        with tempfile.TemporaryDirectory() as tmp:
+            source = os.path.join(tmp, "content", "page.md")
+            template = os.path.join(tmp, "template.html")
+            os.makedirs(os.path.dirname(source))
+            with open(source, "w") as file_object:
+                file_object.write(markdown)
+            with open(template, "w") as file_object:
+                file_object.write("<title>{{ Title }}</title>{{ Content }}")
+            outputs = []
+            # the cached tree, the interned tree, cached blocks, the direct
+            # emitter and the mapped source
+            parse_cache = ParseCache(os.path.join(tmp, "cache"), PARSER_VERSION)
+            configurations = [
+                (len(markdown), parse_cache, None, None),
+                (len(markdown), None, NodeInterner(), None),
+                (len(markdown), parse_cache, None, BlockCache(os.path.join(tmp, "blocks"), PARSER_VERSION)),
+                (len(markdown), None, None, None),
+                (0, None, None, None),
+            ]
+            for number, (threshold, parse_cache, interner, block_cache) in enumerate(configurations):
+                context = BuildContext(site_index=SiteIndex(tmp), static_dir=os.path.join(tmp, "static"), parse_cache=parse_cache)
+                context.mmap_threshold = threshold
+                context.interner = interner
+                context.block_cache = block_cache
+                dest = os.path.join(tmp, f"out{number}", "page.html")
+                generate_page(source, template, dest, "/", context)
+                with open(dest, "r") as file_object:
+                    outputs.append((file_object.read(), context.site_index.entries[source]))
+        (cached_html, cached_entry), (interned_html, interned_entry), (blocks_html, blocks_entry), (small_html, small_entry), (html, entry) = outputs
+        self.assertEqual(cached_html, html)
+        self.assertEqual(interned_html, html)
+        self.assertEqual(blocks_html, html)
+        self.assertEqual(interned_entry.summary, entry.summary)
+        self.assertEqual(blocks_entry.summary, entry.summary)
+        self.assertEqual(small_html, html)
+        self.assertEqual(cached_entry.summary, entry.summary)
+        self.assertEqual(small_entry.summary, entry.summary)
+        self.assertIn('<img src="/images/x.png" alt="logo" loading="lazy" decoding="async"></img>', html)
+        self.assertEqual((entry.title, entry.date, entry.tags, entry.summary), ("Big page", "2024-01-01", ["elves"], "First prose paragraph."))
+
+    def test_plan_pages_sorted_and_md_only(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            for rel_path in ["index.md", "b/index.md", "a/index.md", "a/notes.txt"]:
+                write_file(os.path.join(tmp, rel_path), "# Title")
+            plan = list(plan_pages(tmp, "out"))
+        self.assertEqual(
+            [(os.path.relpath(source, tmp), dest) for source, dest in plan],
+            [
+                (os.path.join("a", "index.md"), os.path.join("out", "a", "index.html")),
+                (os.path.join("b", "index.md"), os.path.join("out", "b", "index.html")),
+                ("index.md", os.path.join("out", "index.html")),
+            ],
+        )
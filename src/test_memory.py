@@ -0,0 +1,23 @@
+import unittest
+
+from memory import check_memory_limit, describe_peak_rss, peak_rss
+
+
+class TestMemory(unittest.TestCase):
+    def test_peak_rss(self):
+        peak = peak_rss()
+        if peak is None:
+            self.skipTest("peak RSS is not reported on this platform")
+        self.assertGreater(peak, 1024 * 1024)
+        self.assertRegex(describe_peak_rss(1 << 40), r"^Peak memory: \d+ MB \(limit 1048576 MB\)$")
+
+    def test_limit(self):
+        if peak_rss() is None:
+            self.skipTest("peak RSS is not reported on this platform")
+        check_memory_limit(1 << 40, "page.html")
+        with self.assertRaisesRegex(MemoryError, "exceeded the limit of 1 MB at page.html"):
+            check_memory_limit(1024 * 1024, "page.html")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,56 @@
+import unittest
+
+from htmlnode import LeafNode, ParentNode
+from minify import HtmlMinifier, minify_template
+from templates import compile_template
+
+
+class TestMinify(unittest.TestCase):
+    def test_iter_html_matches_to_html(self):
+        node = ParentNode("div", [
+            ParentNode("p", [LeafNode(None, "Hi "), LeafNode("b", "Bob", {"class": "x"})]),
+            ParentNode("pre", [ParentNode("code", [LeafNode(None, "a\n  b\n")])]),
+        ])
+        self.assertEqual("".join(node.iter_html()), node.to_html())
+        self.assertEqual(list(LeafNode("b", "x").iter_html()), ["<b>", "x", "</b>"])
+
+    def test_collapses_whitespace_outside_pre(self):
+        node = ParentNode("div", [
+            ParentNode("p", [LeafNode(None, "lots   of\n\n whitespace")]),
+            ParentNode("pre", [ParentNode("code", [LeafNode(None, "keep   this\n  indented\n")])]),
+            ParentNode("p", [LeafNode("code", "inline   code")]),
+        ])
+        minifier = HtmlMinifier()
+        html = "".join(minifier.minify_chunks(node.iter_html()))
+        self.assertEqual(
+            html,
+            "<div><p>lots of whitespace</p><pre><code>keep   this\n  indented\n</code></pre><p><code>inline   code</code></p></div>",
+        )
+        self.assertEqual(minifier.last_saved, 4)
+
+    def test_preserve_tag_with_attributes(self):
+        node = ParentNode("pre", [ParentNode("code", [LeafNode(None, "a  b")], {"class": "language-python"})])
+        html = "".join(HtmlMinifier().minify_chunks(node.iter_html()))
+        self.assertEqual(html, '<pre><code class="language-python">a  b</code></pre>')
+
+    def test_minify_template(self):
+        template = "<!doctype html>\n<html>\n  <!-- a comment -->\n  <head>\n    <title>{{ Title }}</title>\n  </head>\n  <body>\n    <pre>  keep\n  me</pre>\n    <article>{{ Content }}</article>\n  </body>\n</html>"
+        self.assertEqual(
+            minify_template(template),
+            "<!doctype html><html><head><title>{{ Title }}</title></head><body><pre>  keep\n  me</pre><article>{{ Content }}</article></body></html>",
+        )
+
+    def test_stats_accumulate_per_page(self):
+        minifier = HtmlMinifier()
+        minifier.start_page()
+        minifier.minify_compiled(compile_template("<a>\n  <b></b>\n</a>"))
+        first = minifier.last_saved
+        minifier.start_page()
+        list(minifier.minify_chunks(["<p>", "a  b", "</p>"]))
+        self.assertEqual(minifier.last_saved, 1)
+        self.assertEqual(minifier.total_saved, first + 1)
+        self.assertEqual(minifier.pages, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,135 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import parse_cache
+from htmlnode import LeafNode, ParentNode
+from markdown_to_html import PARSER_VERSION, markdown_to_html_node
+from parse_cache import MemoryParseCache, ParseCache, data_to_node, node_to_data
+
+
+class TestParseCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cache_dir = os.path.join(self.tmp.name, "parse")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_round_trip(self):
+        node = ParentNode("div", [ParentNode("p", [LeafNode(None, "Hi "), LeafNode("a", "x", {"href": "/"})])], {"id": "main"})
+        self.assertEqual(data_to_node(node_to_data(node)), node)
+        node = ParentNode("div", [ParentNode("ul", []), LeafNode("b", "x"), ParentNode("p", [ParentNode("i", [LeafNode(None, "y")])]), LeafNode(None, "z")])
+        self.assertEqual(data_to_node(node_to_data(node)), node)
+        self.assertEqual(data_to_node(node_to_data(LeafNode(None, "a"))), LeafNode(None, "a"))
+
+    def test_deep_tree_is_cached(self):
+        markdown = "> " * 5000 + "deep"
+        cache = MemoryParseCache(self.cache_dir, PARSER_VERSION)
+        node = cache.get_or_parse(markdown, markdown_to_html_node)
+        self.assertEqual(ParseCache(self.cache_dir, PARSER_VERSION).get_or_parse(markdown, markdown_to_html_node), node)
+        self.assertEqual(cache.get_or_parse(markdown, markdown_to_html_node), node)
+
+    def test_get_or_parse_hits_on_second_lookup(self):
+        calls = []
+        def parse(markdown):
+            calls.append(markdown)
+            return markdown_to_html_node(markdown)
+        cache = ParseCache(self.cache_dir, PARSER_VERSION)
+        first = cache.get_or_parse("# Hello **world**", parse)
+        second = ParseCache(self.cache_dir, PARSER_VERSION).get_or_parse("# Hello **world**", parse)
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(first.to_html(), second.to_html())
+
+    def test_parser_version_is_part_of_key(self):
+        self.assertNotEqual(ParseCache(self.cache_dir, 1).key("# a"), ParseCache(self.cache_dir, 2).key("# a"))
+
+    def test_highlighter_version_is_part_of_key(self):
+        key = ParseCache(self.cache_dir, 1).key("# a")
+        with mock.patch.object(parse_cache, "HIGHLIGHTER_VERSION", parse_cache.HIGHLIGHTER_VERSION + 1):
+            self.assertNotEqual(ParseCache(self.cache_dir, 1).key("# a"), key)
+
+    def test_corrupt_entry_is_a_miss(self):
+        cache = ParseCache(self.cache_dir, PARSER_VERSION)
+        key = cache.key("# a")
+        cache.put(key, markdown_to_html_node("# a"))
+        with open(cache._entry_path(key), "wb") as file_object:
+            file_object.write(b"garbage")
+        self.assertIsNone(cache.get(key))
+        self.assertEqual(cache.misses, 1)
+
+    def test_lru_eviction(self):
+        node = markdown_to_html_node("word " * 50)
+        keys = [prefix + "0" * 62 for prefix in ("aa", "bb", "cc", "dd")]
+        probe = ParseCache(os.path.join(self.tmp.name, "probe"), PARSER_VERSION)
+        probe.put(keys[0], node)
+        entry_size = probe.size()
+
+        cache = ParseCache(self.cache_dir, PARSER_VERSION, max_bytes=entry_size * 3)
+        for number, key in enumerate(keys[:3]):
+            cache.put(key, node)
+            os.utime(cache._entry_path(key), (1000 + number, 1000 + number))
+        self.assertEqual(cache.evictions, 0)
+        self.assertIsNotNone(cache.get(keys[0]))  # refreshes 'aa', so 'bb' is now least recently used
+        cache.put(keys[3], node)
+        self.assertEqual(cache.evictions, 2)
+        self.assertLessEqual(cache.size(), entry_size * 3)
+        self.assertEqual([os.path.exists(cache._entry_path(key)) for key in keys], [True, False, False, True])
+
+    def test_rewriting_an_entry_keeps_the_size(self):
+        cache = ParseCache(self.cache_dir, PARSER_VERSION)
+        node = markdown_to_html_node("# Hello **world**")
+        key = cache.key("# Hello **world**")
+        for _ in range(3):
+            cache.put(key, node)
+        self.assertEqual(cache.size(), os.path.getsize(cache._entry_path(key)))
+
+    def test_stats_accumulate_across_runs(self):
+        cache = ParseCache(self.cache_dir, PARSER_VERSION)
+        cache.get_or_parse("# a", markdown_to_html_node)
+        cache.get_or_parse("# a", markdown_to_html_node)
+        cache.save_stats()
+        stats = ParseCache(self.cache_dir, PARSER_VERSION).stats()
+        self.assertEqual((stats["entries"], stats["hits"], stats["misses"]), (1, 1, 1))
+        self.assertEqual(stats["hit_rate"], 0.5)
+        self.assertGreater(stats["size"], 0)
+
+
+class TestMemoryParseCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cache_dir = os.path.join(self.tmp.name, "parse")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_hit_is_served_from_memory_as_a_fresh_copy(self):
+        cache = MemoryParseCache(self.cache_dir, PARSER_VERSION)
+        first = cache.get_or_parse("![x](/a.png)", markdown_to_html_node)
+        first.children[0].children[0].props["width"] = "10"
+        for path in [os.path.join(dir_path, name) for dir_path, _, names in os.walk(self.cache_dir) for name in names]:
+            os.remove(path)
+        second = cache.get_or_parse("![x](/a.png)", markdown_to_html_node)
+        self.assertEqual((cache.hits, cache.memory_hits, cache.misses), (1, 1, 1))
+        self.assertNotIn("width", second.children[0].children[0].props)
+
+    def test_disk_entries_are_shared(self):
+        ParseCache(self.cache_dir, PARSER_VERSION).get_or_parse("# a", markdown_to_html_node)
+        cache = MemoryParseCache(self.cache_dir, PARSER_VERSION)
+        cache.get_or_parse("# a", markdown_to_html_node)
+        cache.get_or_parse("# a", markdown_to_html_node)
+        self.assertEqual((cache.hits, cache.memory_hits, cache.misses), (2, 1, 0))
+
+    def test_least_recently_used_entries_leave_memory(self):
+        cache = MemoryParseCache(self.cache_dir, PARSER_VERSION, max_entries=2)
+        keys = [cache.key(markdown) for markdown in ("# a", "# b", "# c")]
+        for markdown in ("# a", "# b"):
+            cache.get_or_parse(markdown, markdown_to_html_node)
+        cache.get(keys[0])
+        cache.get_or_parse("# c", markdown_to_html_node)
+        self.assertEqual(list(cache.memory), [keys[0], keys[2]])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,63 @@
+import gzip
+import os
+import tempfile
+import unittest
+
+from precompress import precompress_tree
+from fixtures import write_file
+
+
+class TestPrecompress(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.dest = os.path.join(self.tmp.name, "docs")
+        self.state = os.path.join(self.tmp.name, "cache", "gzip.json")
+        self.write("index.html", "<p>hello</p>" * 200)
+        self.write("blog/feed.xml", "<feed></feed>" * 200)
+        self.write("tiny.css", "b{}")
+        self.write("images/a.png", "x" * 5000)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, rel_path: str, text: str) -> None:
+        write_file(os.path.join(self.dest, rel_path), text)
+
+    def test_compresses_text_outputs_above_threshold(self):
+        stats = precompress_tree(self.dest, min_size=100, workers=2)
+        self.assertEqual((stats.compressed, stats.too_small), (2, 1))
+        self.assertLess(stats.bytes_out, stats.bytes_in)
+        with gzip.open(os.path.join(self.dest, "index.html.gz"), "rt") as file_object:
+            self.assertEqual(file_object.read(), "<p>hello</p>" * 200)
+        self.assertFalse(os.path.exists(os.path.join(self.dest, "tiny.css.gz")))
+        self.assertFalse(os.path.exists(os.path.join(self.dest, "images", "a.png.gz")))
+
+    def test_output_is_deterministic(self):
+        precompress_tree(self.dest, min_size=100)
+        with open(os.path.join(self.dest, "index.html.gz"), "rb") as file_object:
+            first = file_object.read()
+        precompress_tree(self.dest, min_size=100)
+        with open(os.path.join(self.dest, "index.html.gz"), "rb") as file_object:
+            self.assertEqual(file_object.read(), first)
+
+    def test_skips_unchanged_files(self):
+        precompress_tree(self.dest, min_size=100, state_path=self.state)
+        stats = precompress_tree(self.dest, min_size=100, state_path=self.state)
+        self.assertEqual((stats.compressed, stats.unchanged), (0, 2))
+
+        self.write("index.html", "<p>changed</p>" * 200)
+        stats = precompress_tree(self.dest, min_size=100, state_path=self.state)
+        self.assertEqual((stats.compressed, stats.unchanged), (1, 1))
+
+    def test_level_change_recompresses(self):
+        precompress_tree(self.dest, level=1, min_size=100, state_path=self.state)
+        stats = precompress_tree(self.dest, level=9, min_size=100, state_path=self.state)
+        self.assertEqual(stats.compressed, 2)
+
+    def test_invalid_level(self):
+        with self.assertRaises(ValueError):
+            precompress_tree(self.dest, level=10)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,109 @@
+import os
+import tempfile
+import threading
+import http.client
+import unittest
+
+from preview import PreviewRenderer, etag_matches, make_server
+from fixtures import write_file
+
+
+class PreviewTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        root = self.tmp.name
+        self.content_dir = os.path.join(root, "content", "")
+        self.static_dir = os.path.join(root, "static")
+        self.template = os.path.join(root, "template.html")
+        self.write("content/index.md", "# Home\n\nWelcome")
+        self.write("content/blog/post/index.md", "# Post\n\n[Home](/)")
+        self.write("content/about.md", "# About")
+        self.write("static/index.css", "body {}")
+        self.write("template.html", "<title>{{ Title }}</title>{{ Content }}")
+        self.renderer = PreviewRenderer(self.content_dir, self.template, self.static_dir)
+
+    def write(self, rel_path, text, mtime_ns=None):
+        return write_file(os.path.join(self.tmp.name, rel_path), text, mtime_ns)
+
+
+class TestPreviewRenderer(PreviewTestCase):
+    def test_resolve(self):
+        source = os.path.join(self.content_dir, "blog", "post", "index.md")
+        self.assertEqual(self.renderer.resolve("/"), ("page", os.path.join(self.content_dir, "index.md")))
+        self.assertEqual(self.renderer.resolve("/blog/post/?x=1"), ("page", source))
+        self.assertEqual(self.renderer.resolve("/blog/post/index.html"), ("page", source))
+        self.assertEqual(self.renderer.resolve("/about.html"), ("page", os.path.join(self.content_dir, "about.md")))
+        self.assertEqual(self.renderer.resolve("/blog/post"), ("redirect", "/blog/post/"))
+        self.assertIsNone(self.renderer.resolve("/index.css"))
+        self.assertIsNone(self.renderer.resolve("/missing/"))
+        self.assertIsNone(self.renderer.resolve("/../content/index.md"))
+
+    def test_rendered_once_until_source_or_template_changes(self):
+        source = os.path.join(self.content_dir, "index.md")
+        first = self.renderer.page(source)
+        self.assertEqual(first.body, b'<title>Home</title><div><h1 id="home">Home</h1><p>Welcome</p></div>')
+        self.assertIs(self.renderer.page(source), first)
+        self.assertEqual(self.renderer.renders, 1)
+
+        self.write("content/index.md", "# Home\n\nWelcome back", mtime_ns=first.inputs[source] + 1)
+        second = self.renderer.page(source)
+        self.assertEqual(self.renderer.renders, 2)
+        self.assertNotEqual(second.etag, first.etag)
+
+        self.write("template.html", "<h2>{{ Title }}</h2>{{ Content }}", mtime_ns=second.inputs[os.path.abspath(self.template)] + 1)
+        self.assertTrue(self.renderer.page(source).body.startswith(b"<h2>Home</h2>"))
+        self.assertEqual(self.renderer.renders, 3)
+
+    def test_new_layout_invalidates(self):
+        source = os.path.join(self.content_dir, "blog", "post", "index.md")
+        self.renderer.page(source)
+        self.write("layouts/blog.html", "<main>{{ Content }}</main>")
+        self.assertTrue(self.renderer.page(source).body.startswith(b"<main>"))
+
+    def test_etag_matches(self):
+        self.assertTrue(etag_matches('"a", "b"', '"b"'))
+        self.assertTrue(etag_matches('W/"b"', '"b"'))
+        self.assertTrue(etag_matches("*", '"b"'))
+        self.assertFalse(etag_matches('"a"', '"b"'))
+        self.assertFalse(etag_matches(None, '"b"'))
+
+
+class TestPreviewServer(PreviewTestCase):
+    def setUp(self):
+        super().setUp()
+        self.server = make_server(self.renderer, ("127.0.0.1", 0))
+        thread = threading.Thread(target=self.server.serve_forever)
+        thread.start()
+        self.addCleanup(thread.join)
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+
+    def request(self, path, headers=None):
+        connection = http.client.HTTPConnection(*self.server.server_address[:2])
+        self.addCleanup(connection.close)
+        connection.request("GET", path, headers=headers or {})
+        response = connection.getresponse()
+        return response, response.read()
+
+    def test_page_with_etag_and_304(self):
+        response, body = self.request("/blog/post/")
+        self.assertEqual(response.status, 200)
+        self.assertEqual(response.getheader("Content-Type"), "text/html; charset=utf-8")
+        self.assertIn(b'<a href="/">Home</a>', body)
+        etag = response.getheader("ETag")
+        response, body = self.request("/blog/post/", {"If-None-Match": etag})
+        self.assertEqual((response.status, body, response.getheader("ETag")), (304, b"", etag))
+        self.assertEqual(self.renderer.renders, 1)
+
+    def test_static_redirect_and_missing(self):
+        response, body = self.request("/index.css")
+        self.assertEqual((response.status, body), (200, b"body {}"))
+        response, _ = self.request("/blog/post")
+        self.assertEqual((response.status, response.getheader("Location")), (301, "/blog/post/"))
+        response, _ = self.request("/nothing.html")
+        self.assertEqual(response.status, 404)
+
+
+if __name__ == "__main__":
+    unittest.main()
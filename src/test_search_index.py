@@ -0,0 +1,90 @@
+import os
+import json
+import tempfile
+import unittest
+from collections import Counter
+
+from build_context import BuildContext
+from depgraph import DependencyGraph
+from fixtures import write_file
+from markdown_to_html import generate_pages_recursive, markdown_to_html_node
+from search_index import SEARCH_DIR, SearchIndex, node_terms, shard_name
+
+
+class TestSearchIndex(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.public = os.path.join(self.tmp.name, "public", "")
+        self.db_path = os.path.join(self.tmp.name, "search.db")
+
+    def open(self, basepath="/"):
+        index = SearchIndex(self.public, self.db_path, basepath)
+        self.addCleanup(index.close)
+        return index
+
+    def read(self, name):
+        with open(os.path.join(self.public, SEARCH_DIR, name), "r") as file_object:
+            return json.load(file_object)
+
+    def test_node_terms(self):
+        counts = Counter()
+        node_terms(markdown_to_html_node("# Tom's *Tom*\n\nA tom & jerry `code`\n\n```python\nprint(hidden)\n```"), counts)
+        self.assertEqual(counts, Counter({"tom": 3, "jerry": 1, "code": 1}))
+
+    def test_shards_by_prefix(self):
+        index = self.open("/site/")
+        index.record("a.md", os.path.join(self.public, "a", "index.html"), "Alpha", Counter({"tolkien": 2, "tom": 1, "élan": 1}))
+        index.record("b.md", os.path.join(self.public, "b.html"), "Beta", Counter({"tolkien": 1}))
+        self.assertEqual(index.write(), (2, 2))
+        self.assertEqual(self.read("index.json"), {"prefix_length": 2, "docs": "docs.json", "shards": ["to", "él"]})
+        self.assertEqual(self.read("docs.json"), {"1": ["/site/a/", "Alpha"], "2": ["/site/b.html", "Beta"]})
+        self.assertEqual(self.read(shard_name("to")), {"tolkien": [[1, 2], [2, 1]], "tom": [[1, 1]]})
+        self.assertEqual(self.read(shard_name("él")), {"élan": [[1, 1]]})
+
+    def test_incremental_updates(self):
+        index = self.open()
+        index.record("a.md", os.path.join(self.public, "a.html"), "A", Counter({"tolkien": 1, "elves": 1}))
+        index.record("b.md", os.path.join(self.public, "b.html"), "B", Counter({"dwarves": 1}))
+        index.write()
+        index.close()
+
+        index = self.open()
+        self.assertIn("a.md", index)
+        index.record("a.md", os.path.join(self.public, "a.html"), "A", Counter({"tolkien": 1, "elves": 1}))
+        index.keep("b.md")
+        self.assertEqual(index.write(), (0, 3))
+        index.close()
+
+        index = self.open()
+        index.record("a.md", os.path.join(self.public, "a.html"), "A", Counter({"tolkien": 1, "ents": 1}))
+        self.assertEqual(index.write(), (3, 2))  # "b.md" was not seen: its shard goes too
+        self.assertNotIn("b.md", index)
+        self.assertFalse(os.path.exists(os.path.join(self.public, SEARCH_DIR, shard_name("el"))))
+        self.assertFalse(os.path.exists(os.path.join(self.public, SEARCH_DIR, shard_name("dw"))))
+        self.assertEqual(self.read(shard_name("en")), {"ents": [[1, 1]]})
+        self.assertEqual(self.read("docs.json"), {"1": ["/a.html", "A"]})
+
+    def test_build_indexes_pages_once(self):
+        content = os.path.join(self.tmp.name, "content", "")
+        template = os.path.join(self.tmp.name, "template.html")
+        for rel_path, text in (("content/index.md", "# Home\n\nShire"), ("content/post.md", "# Post\n\nMordor"), ("template.html", "{{ Content }}")):
+            write_file(os.path.join(self.tmp.name, rel_path), text)
+        graph_path = os.path.join(self.tmp.name, "depgraph.json")
+        context = BuildContext(graph=DependencyGraph(graph_path))
+        generate_pages_recursive(content, template, self.public, "/", context)
+        context.graph.save()
+
+        for expected_rebuilt in (2, 0):
+            context = BuildContext(graph=DependencyGraph(graph_path))
+            context.search = self.open()
+            generate_pages_recursive(content, template, self.public, "/", context)
+            context.graph.save()
+            context.search.write()
+            context.search.close()
+            self.assertEqual(context.rebuilt, expected_rebuilt)
+            self.assertEqual(self.read(shard_name("mo")), {"mordor": [[2, 1]]})
+
+
+if __name__ == "__main__":
+    unittest.main()
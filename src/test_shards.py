@@ -0,0 +1,95 @@
+import os
+import argparse
+import tempfile
+import unittest
+
+from shards import ShardManifest, parse_shard, shard_of, manifest_name, find_shard_manifests, copy_shard_output, merged_index
+from site_index import PageEntry
+from build_context import BuildContext
+from markdown_to_html import generate_pages_recursive
+from fixtures import write_file
+
+
+class TestShards(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = self.tmp.name
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, rel_path: str, text: str) -> str:
+        return write_file(os.path.join(self.root, rel_path), text)
+
+    def test_parse_shard(self):
+        self.assertEqual(parse_shard("2/4"), (2, 4))
+        for value in ("0/4", "5/4", "x/4", "2"):
+            with self.assertRaises(argparse.ArgumentTypeError):
+                parse_shard(value)
+
+    def test_shard_of_is_stable_and_covers_every_shard(self):
+        # the assignment must not depend on where the checkout lives
+        self.assertEqual(
+            shard_of("./content/blog/tom/index.md", "./content", 4),
+            shard_of("/srv/site/content/blog/tom/index.md", "/srv/site/content", 4),
+        )
+        shards = [shard_of(f"content/page{number}.md", "content", 4) for number in range(200)]
+        self.assertEqual(set(shards), {1, 2, 3, 4})
+        self.assertEqual(shards, [shard_of(f"content/page{number}.md", "content", 4) for number in range(200)])
+
+    def test_page_filter_limits_the_plan(self):
+        content = os.path.join(self.root, "content")
+        template = self.write("template.html", "{{ Content }}")
+        for number in range(6):
+            self.write(f"content/p{number}/index.md", f"# Page {number}")
+        plans = []
+        for index in (1, 2):
+            context = BuildContext()
+            context.page_filter = lambda path, index=index: shard_of(path, content, 2) == index
+            plans.append(generate_pages_recursive(content, template, os.path.join(self.root, "public"), "/", context))
+        self.assertEqual(len(plans[0]) + len(plans[1]), 6)
+        self.assertFalse(set(plans[0]) & set(plans[1]))
+
+    def make_shard(self, index: int, count: int, config: dict | None = None) -> str:
+        shard_dir = os.path.join(self.root, f"shard{index}")
+        self.write(f"shard{index}/page{index}/index.html", f"page {index}")
+        self.write(f"shard{index}/index.css", "body{}")
+        manifest = ShardManifest(index, count, config or {"basepath": "/"})
+        entry = PageEntry(f"./content/page{index}/index.md", f"/page{index}/", f"Page {index}", f"2024-01-0{index}")
+        manifest.add_page(entry, f"page{index}/index.html", "2024-01-01")
+        manifest.save(shard_dir)
+        return shard_dir
+
+    def test_manifest_round_trip(self):
+        shard_dir = self.make_shard(1, 2)
+        manifest = ShardManifest.load(os.path.join(shard_dir, manifest_name(1, 2)))
+        self.assertEqual((manifest.index, manifest.count, manifest.config), (1, 2, {"basepath": "/"}))
+        self.assertEqual(manifest.pages[0]["output"], "page1/index.html")
+
+    def test_find_shard_manifests_checks_completeness(self):
+        first, second = self.make_shard(1, 2), self.make_shard(2, 2)
+        found = find_shard_manifests([second, first])
+        self.assertEqual([manifest.index for _, manifest in found], [1, 2])
+        with self.assertRaises(ValueError):
+            find_shard_manifests([first])
+        with self.assertRaises(ValueError):
+            find_shard_manifests([first, first])
+
+    def test_find_shard_manifests_checks_settings(self):
+        first = self.make_shard(1, 2)
+        second = self.make_shard(2, 2, {"basepath": "/other/"})
+        with self.assertRaises(ValueError):
+            find_shard_manifests([first, second])
+
+    def test_copy_and_merge(self):
+        shards = find_shard_manifests([self.make_shard(1, 2), self.make_shard(2, 2)])
+        dest = os.path.join(self.root, "public")
+        for shard_dir, _ in shards:
+            copy_shard_output(shard_dir, dest)
+        self.assertEqual(sorted(os.listdir(dest)), ["index.css", "page1", "page2"])
+        index = merged_index([manifest for _, manifest in shards], dest)
+        self.assertEqual([entry.title for entry in index.sorted_entries()], ["Page 2", "Page 1"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,157 @@
+import os
+import tempfile
+import unittest
+
+from site_index import DiskSiteIndex, PageEntry, SiteIndex, dest_path_to_url, parse_front_matter, split_tags
+
+
+class TestSiteIndex(unittest.TestCase):
+    def test_parse_front_matter(self):
+        md = "---\ndate: 2024-05-01\ntags: Tolkien, elves\n---\n# Title"
+        metadata, body = parse_front_matter(md)
+        self.assertEqual(metadata, {"date": "2024-05-01", "tags": "Tolkien, elves"})
+        self.assertEqual(body, "# Title")
+
+    def test_parse_front_matter_absent(self):
+        md = "# Title\n\n---\n"
+        self.assertEqual(parse_front_matter(md), ({}, md))
+
+    def test_parse_front_matter_unterminated(self):
+        with self.assertRaises(ValueError):
+            parse_front_matter("---\ndate: 2024-05-01\n# Title")
+
+    def test_split_tags_dedupes_and_lowercases(self):
+        self.assertEqual(split_tags("Elves, elves, , Books"), ["elves", "books"])
+
+    def test_dest_path_to_url(self):
+        self.assertEqual(dest_path_to_url("docs/index.html", "docs"), "/")
+        self.assertEqual(dest_path_to_url("docs/blog/tom/index.html", "docs"), "/blog/tom/")
+        self.assertEqual(dest_path_to_url("docs/about.html", "docs"), "/about.html")
+
+    def test_section(self):
+        self.assertEqual(PageEntry("a.md", "/blog/tom/", "Tom", "2024-01-01").section, "blog")
+        self.assertEqual(PageEntry("a.md", "/contact/", "Contact", "2024-01-01").section, "")
+        self.assertEqual(PageEntry("a.md", "/", "Home", "2024-01-01").section, "")
+
+    def test_sorted_entries_newest_first(self):
+        index = SiteIndex("docs")
+        index.entries["a"] = PageEntry("a", "/blog/a/", "A", "2024-01-01")
+        index.entries["b"] = PageEntry("b", "/blog/b/", "B", "2024-03-01")
+        index.entries["c"] = PageEntry("c", "/blog/c/", "C", "2024-03-01")
+        self.assertEqual([entry.title for entry in index.sorted_entries()], ["B", "C", "A"])
+
+    def test_tags_grouping(self):
+        index = SiteIndex("docs")
+        index.entries["a"] = PageEntry("a", "/blog/a/", "A", "2024-01-01", ["elves"])
+        index.entries["b"] = PageEntry("b", "/blog/b/", "B", "2024-02-01", ["elves", "books"])
+        tags = index.tags()
+        self.assertEqual(list(tags), ["books", "elves"])
+        self.assertEqual([entry.title for entry in tags["elves"]], ["B", "A"])
+
+    def test_affected_listings_without_previous_is_everything(self):
+        index = SiteIndex("docs")
+        index.entries["a"] = PageEntry("a", "/blog/a/", "A", "2024-01-01", ["elves"])
+        self.assertEqual(index.affected_listings(None), {"feed", "section:blog", "tag:elves"})
+
+    def test_affected_listings_only_changed_pages(self):
+        previous = SiteIndex("docs")
+        previous.entries["a"] = PageEntry("a", "/blog/a/", "A", "2024-01-01", ["elves"])
+        previous.entries["b"] = PageEntry("b", "/news/b/", "B", "2024-01-01", ["books"])
+        current = SiteIndex("docs")
+        current.entries["a"] = PageEntry("a", "/blog/a/", "A", "2024-01-01", ["elves"])
+        current.entries["b"] = PageEntry("b", "/news/b/", "B (edited)", "2024-01-01", ["dwarves"])
+        self.assertEqual(current.affected_listings(previous), {"feed", "section:news", "tag:books", "tag:dwarves"})
+
+    def test_affected_listings_unchanged(self):
+        previous = SiteIndex("docs")
+        previous.entries["a"] = PageEntry("a", "/blog/a/", "A", "2024-01-01", ["elves"])
+        current = SiteIndex("docs")
+        current.entries["a"] = PageEntry("a", "/blog/a/", "A", "2024-01-01", ["elves"])
+        self.assertEqual(current.affected_listings(previous), set())
+
+    def test_save_and_load_round_trip(self):
+        index = SiteIndex("docs")
+        index.entries["a"] = PageEntry("a", "/blog/a/", "A", "2024-01-01", ["elves"], "Summary")
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "cache", "index.json")
+            index.save(path)
+            loaded = SiteIndex.load(path)
+        self.assertEqual(loaded.entries, index.entries)
+
+    def test_load_missing_returns_none(self):
+        self.assertIsNone(SiteIndex.load("/nonexistent/index.json"))
+
+
+ENTRIES = [
+    PageEntry("a", "/blog/a/", "A", "2024-01-01", ["elves"], "Summary of A"),
+    PageEntry("b", "/blog/b/", "B", "2024-03-01", ["elves", "books"]),
+    PageEntry("c", "/news/c/", "C", "2024-03-01", ["books"]),
+    PageEntry("d", "/about/", "About", "2024-02-01"),
+]
+
+
+class TestDiskSiteIndex(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.memory = SiteIndex("docs")
+        self.disk = DiskSiteIndex("docs", os.path.join(self.tmp.name, "index.db.new"))
+        for entry in ENTRIES:
+            self.memory.entries[entry.source] = entry
+            self.disk.entries[entry.source] = entry
+
+    def tearDown(self):
+        self.disk.close()
+        self.tmp.cleanup()
+
+    def test_behaves_like_a_dict(self):
+        self.assertEqual(list(self.disk.entries), ["a", "b", "c", "d"])
+        self.assertEqual(len(self.disk.entries), 4)
+        self.assertEqual(self.disk.entries["b"], ENTRIES[1])
+        self.assertIn("c", self.disk.entries)
+        self.assertIsNone(self.disk.entries.get("missing"))
+        with self.assertRaises(KeyError):
+            self.disk.entries["missing"]
+
+    def test_replacing_keeps_order(self):
+        self.disk.entries["a"] = PageEntry("a", "/blog/a/", "A (edited)", "2024-01-01", ["dwarves"])
+        self.assertEqual(list(self.disk.entries), ["a", "b", "c", "d"])
+        self.assertEqual(self.disk.entries["a"].title, "A (edited)")
+        self.assertEqual(list(self.disk.listings()), ["section:blog", "section:news", "tag:books", "tag:dwarves", "tag:elves"])
+
+    def test_listings_match_memory_index(self):
+        memory_listings = {key: list(entries) for key, entries in self.memory.listings().items()}
+        disk_listings = {key: list(entries) for key, entries in self.disk.listings().items()}
+        self.assertEqual(disk_listings, memory_listings)
+        self.assertEqual([entry.title for entry in disk_listings["tag:books"]], ["B", "C"])
+        self.assertEqual(len(self.disk.listings()["tag:elves"]), 2)
+        self.assertEqual(self.disk.feed_entries(2), self.memory.feed_entries(2))
+        self.assertEqual(self.disk.listing_keys(), self.memory.listing_keys())
+
+    def test_page_urls(self):
+        self.assertIn("/blog/a/", self.disk.page_urls())
+        self.assertNotIn("/blog/", self.disk.page_urls())
+
+    def test_affected_listings_against_disk_index(self):
+        self.memory.entries["c"] = PageEntry("c", "/news/c/", "C (edited)", "2024-03-01", ["books"])
+        del self.memory.entries["d"]
+        self.assertEqual(self.memory.affected_listings(self.disk), {"feed", "section:news", "tag:books"})
+
+    def test_save_and_load_round_trip(self):
+        path = os.path.join(self.tmp.name, "cache", "index.db")
+        self.disk.save(path)
+        self.assertFalse(os.path.exists(os.path.join(self.tmp.name, "index.db.new")))
+        loaded = DiskSiteIndex.load(path)
+        self.assertEqual(loaded.dest_root, "docs")
+        self.assertEqual(dict(loaded.entries.items()), self.memory.entries)
+        loaded.close()
+
+    def test_load_missing_or_invalid_returns_none(self):
+        self.assertIsNone(DiskSiteIndex.load(os.path.join(self.tmp.name, "missing.db")))
+        path = os.path.join(self.tmp.name, "index.json")
+        with open(path, "w") as file_object:
+            file_object.write("{}")
+        self.assertIsNone(DiskSiteIndex.load(path))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,57 @@
+import os
+import tempfile
+import unittest
+
+from sitemap import SitemapWriter, format_lastmod, write_sitemap
+
+
+class TestSitemap(unittest.TestCase):
+    def test_single_sitemap_applies_basepath(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            written = write_sitemap([("/", "2024-01-01"), ("/blog/tom/", None)], tmp, "https://example.com/", "/site/")
+            self.assertEqual(written, [os.path.join(tmp, "sitemap.xml")])
+            with open(written[0]) as file_object:
+                xml = file_object.read()
+        self.assertIn("<url><loc>https://example.com/site/</loc><lastmod>2024-01-01</lastmod></url>", xml)
+        self.assertIn("<url><loc>https://example.com/site/blog/tom/</loc></url>", xml)
+        self.assertTrue(xml.startswith('<?xml version="1.0" encoding="UTF-8"?>\n<urlset'))
+
+    def test_escapes_urls(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            write_sitemap([("/a&b/", None)], tmp, "https://example.com", "/")
+            with open(os.path.join(tmp, "sitemap.xml")) as file_object:
+                self.assertIn("https://example.com/a&amp;b/", file_object.read())
+
+    def test_splits_into_index(self):
+        entries = ((f"/p{number}/", None) for number in range(5))
+        with tempfile.TemporaryDirectory() as tmp:
+            written = write_sitemap(entries, tmp, "https://example.com", "/", max_urls=2)
+            self.assertEqual([os.path.basename(path) for path in written], ["sitemap-1.xml", "sitemap-2.xml", "sitemap-3.xml", "sitemap.xml"])
+            with open(os.path.join(tmp, "sitemap.xml")) as file_object:
+                index = file_object.read()
+            with open(os.path.join(tmp, "sitemap-3.xml")) as file_object:
+                last_part = file_object.read()
+        self.assertIn("<sitemapindex", index)
+        self.assertIn("<sitemap><loc>https://example.com/sitemap-2.xml</loc></sitemap>", index)
+        self.assertEqual(last_part.count("<url>"), 1)
+
+    def test_empty_sitemap(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            written = write_sitemap([], tmp, "https://example.com", "/")
+            with open(written[0]) as file_object:
+                self.assertIn("<urlset", file_object.read())
+
+    def test_close_is_idempotent(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            with SitemapWriter(tmp, "https://example.com", "/") as writer:
+                writer.add("/")
+                first = writer.close()
+            self.assertEqual(writer.close(), first)
+            self.assertEqual(writer.url_count, 1)
+
+    def test_format_lastmod(self):
+        self.assertEqual(format_lastmod(0), "1970-01-01")
+
+
+if __name__ == "__main__":
+    unittest.main()
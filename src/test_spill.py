@@ -0,0 +1,46 @@
+import os
+import tempfile
+import unittest
+
+from spill import DiskMapping, open_database
+
+
+class TestDiskMapping(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "state", "state.db")
+        self.connection = open_database(self.path)
+
+    def tearDown(self):
+        self.connection.close()
+        self.tmp.cleanup()
+
+    def test_mapping(self):
+        mapping = DiskMapping(self.connection, "records")
+        mapping["b"] = {"file:b.md": "2"}
+        mapping["a"] = (1, 2, "digest")
+        self.assertEqual(mapping["b"], {"file:b.md": "2"})
+        self.assertEqual(mapping["a"], [1, 2, "digest"])
+        self.assertEqual(list(mapping), ["a", "b"])
+        self.assertEqual(len(mapping), 2)
+        self.assertIn("a", mapping)
+        self.assertIsNone(mapping.get("c"))
+        del mapping["a"]
+        self.assertNotIn("a", mapping)
+        with self.assertRaises(KeyError):
+            del mapping["a"]
+
+    def test_committed_values_persist(self):
+        DiskMapping(self.connection, "records")["a"] = "value"
+        self.connection.commit()
+        self.connection.close()
+        self.connection = open_database(self.path)
+        self.assertEqual(DiskMapping(self.connection, "records")["a"], "value")
+
+    def test_tables_are_separate(self):
+        DiskMapping(self.connection, "previous")["a"] = 1
+        self.assertNotIn("a", DiskMapping(self.connection, "current"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,89 @@
+import os
+import tempfile
+import unittest
+
+import templates
+from templates import compile_template, load_template, select_layout
+from fixtures import write_file
+
+
+class TestTemplates(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = self.tmp.name
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, rel_path: str, text: str) -> str:
+        return write_file(os.path.join(self.root, rel_path), text)
+
+    def test_render_variables(self):
+        template = compile_template("<title>{{ Title }}</title>{{Content}}{{ Other }}")
+        self.assertEqual(
+            template.render_string({"Title": "Hi", "Content": iter(["<p>", "x", "</p>"])}),
+            "<title>Hi</title><p>x</p>{{ Other }}",
+        )
+
+    def test_include(self):
+        self.write("partials/header.html", "<header>{{ Title }}</header>")
+        path = self.write("template.html", '{% include "partials/header.html" %}<main>{{ Content }}</main>')
+        template = load_template(path)
+        self.assertEqual(template.render_string({"Title": "T", "Content": "C"}), "<header>T</header><main>C</main>")
+        self.assertEqual(len(template.inputs), 2)
+
+    def test_extends_overrides_blocks(self):
+        self.write("base.html", "<h1>{% block head %}Default{% endblock %}</h1>{% block body %}{{ Content }}{% endblock %}<footer/>")
+        self.write("layouts/mid.html", '{% extends "../base.html" %}{% block body %}<article>{{ Content }}</article>{% endblock %}')
+        path = self.write("layouts/leaf.html", '{% extends "mid.html" %}{% block head %}Leaf{% endblock head %}')
+        template = load_template(path)
+        self.assertEqual(template.render_string({"Content": "C"}), "<h1>Leaf</h1><article>C</article><footer/>")
+        self.assertEqual(len(template.inputs), 3)
+
+    def test_include_cycle_is_an_error(self):
+        path = self.write("a.html", '{% include "b.html" %}')
+        self.write("b.html", '{% include "a.html" %}')
+        with self.assertRaises(ValueError):
+            load_template(path)
+
+    def test_compiled_template_is_cached_until_an_input_changes(self):
+        self.write("partial.html", "one")
+        path = self.write("template.html", '{% include "partial.html" %}')
+        first = load_template(path)
+        self.assertIs(load_template(path), first)
+        partial = self.write("partial.html", "two")
+        os.utime(partial, ns=(0, first.inputs[partial] + 1))
+        second = load_template(path)
+        self.assertIsNot(second, first)
+        self.assertEqual(second.render_string({}), "two")
+        self.assertIs(templates._compiled_cache[os.path.abspath(path)], second)
+
+    def test_transformed_is_compiled_once(self):
+        template = compile_template("  A {{ Content }}  ")
+        first = template.transformed(str.strip)
+        self.assertIs(template.transformed(str.strip), first)
+        self.assertEqual(first.render_string({"Content": "X"}), "A X")
+
+    def test_select_layout_by_directory(self):
+        default = self.write("template.html", "")
+        blog_layout = self.write("layouts/blog.html", "")
+        content = os.path.join(self.root, "content")
+        source = os.path.join(content, "blog", "tom", "index.md")
+        layout, missing = select_layout(source, content, {}, default)
+        self.assertEqual(layout, blog_layout)
+        self.assertEqual(missing, [os.path.join(self.root, "layouts", "blog", "tom.html")])
+        self.assertEqual(select_layout(os.path.join(content, "index.md"), content, {}, default), (default, []))
+
+    def test_select_layout_from_metadata(self):
+        default = self.write("template.html", "")
+        self.write("layouts/blog.html", "")
+        post = self.write("layouts/post.html", "")
+        content = os.path.join(self.root, "content")
+        source = os.path.join(content, "blog", "index.md")
+        self.assertEqual(select_layout(source, content, {"layout": "post"}, default), (post, []))
+        with self.assertRaises(ValueError):
+            select_layout(source, content, {"layout": "missing"}, default)
+
+
+if __name__ == "__main__":
+    unittest.main()